@@ -1,11 +1,12 @@
 """
 API dependencies for dependency injection.
 """
-from typing import Optional, Annotated
-from fastapi import Depends, HTTPException, status, Header
+from typing import Any, Dict, Optional, Annotated
+from fastapi import Depends, HTTPException, status, Header, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.security import validate_token
-from app.core.errors import UnauthorizedError, ForbiddenError
+from app.core.security import decode_token, validate_token
+from app.core.errors import UnauthorizedError, ForbiddenError, RateLimitExceededError
+from app.core.rate_limit import Rate, get_rate_limit_backend
 from app.models.auth import UserSession
 from app.repositories.users_repo import UsersRepository
 from app.core.config import get_settings
@@ -16,14 +17,44 @@ settings = get_settings()
 security = HTTPBearer()
 
 
-async def get_current_user(
+async def get_token_claims(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]
+) -> Dict[str, Any]:
+    """
+    Get verified access token claims without loading the user.
+
+    Reuses the claims decoded by RateLimitMiddleware when present.
+
+    Args:
+        request: Current request
+        credentials: Bearer token from Authorization header
+
+    Returns:
+        Token payload (``sub``, ``tier``, ...)
+
+    Raises:
+        UnauthorizedError: If token is invalid or expired
+    """
+    claims = getattr(request.state, "token_claims", None)
+    if claims is None:
+        try:
+            claims = decode_token(credentials.credentials)
+        except Exception as e:
+            raise UnauthorizedError(str(e))
+    if claims.get("type") != "access" or not claims.get("sub"):
+        raise UnauthorizedError("Invalid token type, expected access")
+    return claims
+
+
+async def get_current_user(
+    claims: Annotated[Dict[str, Any], Depends(get_token_claims)]
 ) -> UserSession:
     """
     Get current authenticated user from JWT token.
 
     Args:
-        credentials: Bearer token from Authorization header
+        claims: Verified access token claims
 
     Returns:
         UserSession object
@@ -32,8 +63,7 @@ async def get_current_user(
         UnauthorizedError: If token is invalid or expired
     """
     try:
-        # Validate token and get user ID
-        user_id = validate_token(credentials.credentials, token_type="access")
+        user_id = claims["sub"]
 
         # Get user from repository
         users_repo = UsersRepository()
@@ -140,43 +170,71 @@ async def get_optional_current_user(
 
 class RateLimiter:
     """
-    Rate limiting dependency.
+    Per-user, per-tier rate limiting dependency (token bucket, see app.core.rate_limit).
+
+    Runs on token claims only, so rejecting a request costs no database read.
+    Floods from any client are shed earlier by RateLimitMiddleware.
     """
 
-    def __init__(self, calls: int, period: int):
+    def __init__(
+        self,
+        calls: int,
+        period: int,
+        burst: Optional[int] = None,
+        name: Optional[str] = None,
+        tier_calls: Optional[Dict[str, Optional[int]]] = None
+    ):
         """
         Initialize rate limiter.
 
         Args:
             calls: Number of calls allowed
             period: Time period in seconds
+            burst: Calls allowed back to back (defaults to ``calls``)
+            name: Bucket name (limiters with the same name share buckets)
+            tier_calls: Per subscription tier overrides of ``calls`` (None = unlimited);
+                defaults to no limit for Pro
         """
         self.calls = calls
         self.period = period
+        self.name = name or f"{calls}/{period}"
+        self.rates: Dict[str, Optional[Rate]] = {
+            tier: Rate(calls=tier_limit, period=period) if tier_limit else None
+            for tier, tier_limit in (tier_calls if tier_calls is not None else {"pro": None}).items()
+        }
+        self.default_rate = Rate(calls=calls, period=period, burst=burst)
 
     async def __call__(
         self,
-        current_user: Annotated[UserSession, Depends(get_current_user)]
+        response: Response,
+        claims: Annotated[Dict[str, Any], Depends(get_token_claims)]
     ) -> None:
         """
-        Check rate limit for current user.
+        Check rate limit for the token's user and tier.
 
         Args:
-            current_user: Current authenticated user
+            response: Response (receives X-RateLimit-* headers)
+            claims: Verified access token claims
 
         Raises:
-            HTTPException: If rate limit exceeded
+            RateLimitExceededError: If rate limit exceeded (with Retry-After)
         """
-        # TODO: Implement actual rate limiting with Redis
-        # For now, Pro users have no rate limit
-        if current_user.subscription_tier == "pro":
+        tier = claims.get("tier", "free")
+        rate = self.rates[tier] if tier in self.rates else self.default_rate
+        if rate is None:
             return
 
-        # Implement rate limiting logic here
-        pass
+        result = await get_rate_limit_backend().hit(f"{self.name}:{claims['sub']}", rate)
+        headers = result.headers()
+        if not result.allowed:
+            raise RateLimitExceededError(
+                retry_after=int(headers.pop("Retry-After")),
+                headers=headers,
+            )
+        response.headers.update(headers)
 
 
 # Pre-configured rate limiters
-rate_limit_standard = RateLimiter(calls=60, period=60)  # 60 calls per minute
-rate_limit_strict = RateLimiter(calls=10, period=60)  # 10 calls per minute
-rate_limit_analysis = RateLimiter(calls=5, period=3600)  # 5 analyses per hour
\ No newline at end of file
+rate_limit_standard = RateLimiter(calls=settings.rate_limit_per_minute, period=60, name="standard")  # RATE_LIMIT_PER_MINUTE
+rate_limit_strict = RateLimiter(calls=10, period=60, name="strict")  # 10 calls per minute
+rate_limit_analysis = RateLimiter(calls=5, period=3600, name="analysis")  # 5 analyses per hour
@@ -0,0 +1,59 @@
+"""
+Operational admin API endpoints.
+"""
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from app.core.config import get_settings
+from app.core.errors import NotFoundError, UnauthorizedError
+from app.core.profiling import get_profile_store
+
+router = APIRouter()
+settings = get_settings()
+
+
+async def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Require the admin bearer token (ADMIN_TOKEN).
+
+    Raises:
+        NotFoundError: If the admin API is disabled
+        UnauthorizedError: If the token is missing or wrong
+    """
+    if not settings.admin_token:
+        raise NotFoundError("Admin API")
+    expected = f"Bearer {settings.admin_token}".encode("utf-8")
+    if not authorization or not hmac.compare_digest(authorization.encode("utf-8"), expected):
+        raise UnauthorizedError("Admin token required")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    List stored request profiles, newest first.
+
+    Returns:
+        Profile summaries (request ID, path, duration, format)
+    """
+    return {"profiles": [report.summary() for report in get_profile_store().list()]}
+
+
+@router.get("/profiles/{request_id}", dependencies=[Depends(require_admin)])
+async def get_profile(request_id: str):
+    """
+    Get a request profile.
+
+    Args:
+        request_id: Request ID (X-Profile-Id response header of the profiled request)
+
+    Returns:
+        pyinstrument HTML report, or cProfile statistics as text
+    """
+    report = get_profile_store().get(request_id)
+    if report is None:
+        raise NotFoundError("Profile", request_id)
+    if report.format == "html":
+        return HTMLResponse(report.content)
+    return PlainTextResponse(report.content)
@@ -1,22 +1,34 @@
 """
 Feng Shui analysis API endpoints.
 """
-from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Form, BackgroundTasks
+from typing import Annotated, AsyncIterator, Optional
+import asyncio
+from fastapi import APIRouter, Depends, UploadFile, File, Form, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
 from app.api.deps import get_current_verified_user, rate_limit_analysis
 from app.models.auth import UserSession
 from app.models.analysis import (
     CreateAnalysisJobRequest,
+    AnalysisJob,
     AnalysisJobResponse,
     AnalysisResultResponse,
     JobStatus
 )
 from app.services.analysis.dispatcher import AnalysisDispatcher
+from app.services.analysis.events import get_job_event_broker
+from app.services.media_service import MediaService
+from app.services.upload_service import UploadService
+from app.core.logging import get_logger
+from app.core.metrics import ANALYSIS_JOBS, ANALYSIS_PIPELINE_DURATION
 from app.core.errors import NotFoundError, ValidationError, QuotaExceededError
 from app.utils.ids import generate_prefixed_id
 from datetime import datetime
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Comment frame sent while idle so proxies keep the event stream open
+SSE_KEEPALIVE_SECONDS = 15
 
 
 @router.post("/jobs", response_model=AnalysisJobResponse)
@@ -72,11 +84,14 @@ async def create_analysis_job(
     if scene_type in ["workspace", "floorplan"] and not (media_file or media_id_list):
         raise ValidationError(f"{scene_type} analysis requires an image")
 
-    # Handle direct file upload
+    # Handle direct file upload (prefer /media/uploads for large files on mobile networks)
     if media_file:
-        # TODO: Upload to GCS and get media ID
-        # For now, create a mock media ID
-        uploaded_media_id = generate_prefixed_id("media")
+        uploaded_media_id = await UploadService().store_file(
+            user_id=current_user.user_id,
+            file_type=media_file.content_type,
+            file_size=media_file.size,
+            file=media_file
+        )
         media_id_list = [uploaded_media_id]
 
     # Create analysis job
@@ -95,6 +110,14 @@ async def create_analysis_job(
     # TODO: Save job to database
     # await analysis_repo.create_job(job_data)
 
+    # Track progress for the event stream
+    get_job_event_broker().register_job(
+        job_id=job_id,
+        user_id=current_user.user_id,
+        scene_type=scene_type,
+        created_at=job_data["created_at"]
+    )
+
     # Start analysis in background
     background_tasks.add_task(
         run_analysis,
@@ -133,16 +156,20 @@ async def get_analysis_job(
     # TODO: Get job from database
     # job = await analysis_repo.get_job(job_id)
 
-    # Mock response for now
-    job = {
-        "job_id": job_id,
-        "user_id": current_user.user_id,
-        "status": JobStatus.COMPLETED,
-        "scene_type": "workspace",
-        "result_id": generate_prefixed_id("result"),
-        "created_at": datetime.utcnow(),
-        "completed_at": datetime.utcnow()
-    }
+    # Jobs running on this instance are tracked by the event broker
+    job = get_job_event_broker().get_job(job_id)
+
+    if job is None:
+        # Mock response for now
+        job = {
+            "job_id": job_id,
+            "user_id": current_user.user_id,
+            "status": JobStatus.COMPLETED,
+            "scene_type": "workspace",
+            "result_id": generate_prefixed_id("result"),
+            "created_at": datetime.utcnow(),
+            "completed_at": datetime.utcnow()
+        }
 
     if not job or job["user_id"] != current_user.user_id:
         raise NotFoundError("Analysis job", job_id)
@@ -157,6 +184,63 @@ async def get_analysis_job(
     )
 
 
+@router.get("/jobs/{job_id}/events")
+async def stream_analysis_job_events(
+    job_id: str,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)],
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream analysis job progress as Server-Sent Events.
+
+    Events:
+        status: Status transitions (pending, running, completed, failed)
+        section: Partial sections as the pipeline produces them
+        result: Final result summary
+
+    Args:
+        job_id: Job ID
+        last_event_id: Resume after this event ID (sent automatically by EventSource)
+
+    Returns:
+        text/event-stream response that ends when the job finishes
+    """
+    broker = get_job_event_broker()
+    job = broker.get_job(job_id)
+
+    if not job or job["user_id"] != current_user.user_id:
+        raise NotFoundError("Analysis job", job_id)
+
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def event_stream() -> AsyncIterator[str]:
+        events = broker.subscribe(job_id, last_event_id=resume_from).__aiter__()
+        next_event = asyncio.ensure_future(events.__anext__())
+        try:
+            while True:
+                done, _ = await asyncio.wait({next_event}, timeout=SSE_KEEPALIVE_SECONDS)
+                if not done:
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    event = next_event.result()
+                except StopAsyncIteration:
+                    return
+                yield event.to_sse()
+                next_event = asyncio.ensure_future(events.__anext__())
+        finally:
+            next_event.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/results/{result_id}", response_model=AnalysisResultResponse)
 async def get_analysis_result(
     result_id: str,
@@ -253,27 +337,70 @@ async def run_analysis(
     Background task to run analysis.
 
     This would be better implemented with Cloud Tasks or Pub/Sub in production.
+    Progress is published to the job event broker for the SSE stream.
     """
+    broker = get_job_event_broker()
+
     try:
         # Update job status to running
         # await analysis_repo.update_job_status(job_id, JobStatus.RUNNING)
+        broker.publish_status(job_id, JobStatus.RUNNING)
+        snapshot = broker.get_job(job_id) or {}
 
         # Get Bazi profile
         # bazi_profile = await profiles_repo.get_profile(bazi_profile_id)
+        bazi_profile = {}
+
+        # Resolve media download URLs
+        media_service = MediaService()
+        if media_set_id:
+            media_set = await media_service.get_media_set(media_set_id, user_id)
+            media_urls = media_set["download_urls"]
+        else:
+            media_urls = [
+                (await media_service.get_download_url(media_id, user_id))["download_url"]
+                for media_id in media_ids or []
+            ]
+
+        job = AnalysisJob(
+            job_id=job_id,
+            user_id=user_id,
+            scene_type=scene_type,
+            bazi_profile_id=bazi_profile_id,
+            media_ids=media_ids,
+            media_set_id=media_set_id,
+            status=JobStatus.RUNNING,
+            created_at=snapshot.get("created_at", datetime.utcnow()),
+            started_at=datetime.utcnow()
+        )
 
         # Dispatch to appropriate pipeline
         dispatcher = AnalysisDispatcher()
-        # result = await dispatcher.dispatch(...)
+        result = await dispatcher.dispatch(
+            job=job,
+            bazi_profile=bazi_profile,
+            media_urls=media_urls,
+            on_section=broker.section_callback(job_id)
+        )
+
+        ANALYSIS_PIPELINE_DURATION.observe(result.processing_time_seconds, scene_type)
+        ANALYSIS_JOBS.inc(scene_type, JobStatus.COMPLETED.value)
 
         # Save result
         # await analysis_repo.save_result(result)
 
         # Update job status to completed
         # await analysis_repo.update_job_status(job_id, JobStatus.COMPLETED, result.result_id)
-
-        pass
+        broker.publish_result(job_id, {
+            "result_id": result.result_id,
+            "overall_score": result.overall_score,
+            "summary": result.summary
+        })
+        broker.publish_status(job_id, JobStatus.COMPLETED, result_id=result.result_id)
 
     except Exception as e:
         # Update job status to failed
         # await analysis_repo.update_job_status(job_id, JobStatus.FAILED, error=str(e))
-        pass
\ No newline at end of file
+        logger.error(f"Analysis job {job_id} failed: {e}")
+        ANALYSIS_JOBS.inc(scene_type, JobStatus.FAILED.value)
+        broker.publish_status(job_id, JobStatus.FAILED, error_message=str(e))
@@ -132,8 +132,10 @@ async def login(request: LoginRequest):
     if not user_data.get("is_active", True):
         raise InvalidCredentialsError("Account is deactivated")
 
-    # Create tokens
-    access_token = create_access_token(subject=user_data["user_id"])
+    # Create tokens (the tier claim lets rate limits apply without a user lookup;
+    # refresh tokens carry no tier, it is re-read on every refresh)
+    claims = {"tier": user_data.get("subscription_tier", "free")}
+    access_token = create_access_token(subject=user_data["user_id"], extra_claims=claims)
     refresh_token = create_refresh_token(subject=user_data["user_id"])
 
     # Update last login
@@ -213,8 +215,11 @@ async def refresh_token(request: RefreshTokenRequest):
 
     # TODO: Check if token is revoked (from Redis)
 
-    # Create new access token
-    access_token = create_access_token(subject=user_id)
+    # Re-read the tier so up- and downgrades apply from the next access token
+    user = await UsersRepository().get_user_by_id(user_id)
+    if user is None or not user.is_active:
+        raise InvalidCredentialsError("Account not found or deactivated")
+    access_token = create_access_token(subject=user_id, extra_claims={"tier": user.subscription_tier})
 
     logger.info(f"Token refreshed for user: {user_id}")
 
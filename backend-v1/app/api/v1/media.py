@@ -2,24 +2,20 @@
 Media upload and management API endpoints.
 """
 from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Form, Header, Query, Request, Response, status
 
 from app.api.deps import get_current_verified_user
 from app.models.auth import UserSession
-from app.core.errors import ValidationError, NotFoundError
+from app.models.media import BatchInitUploadRequest, BatchCommitUploadRequest
 from app.core.config import get_settings
-from app.utils.ids import generate_prefixed_id
+from app.services.media_service import MediaService
+from app.services.upload_service import RECOMMENDED_CHUNK_BYTES, MAX_CHUNK_BYTES, UploadService
 from app.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 settings = get_settings()
 
-# Allowed file types
-ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/jpg", "image/webp"}
-MAX_FILE_SIZE = settings.max_image_size_mb * 1024 * 1024  # Convert MB to bytes
-
 
 @router.post("/:init")
 async def init_media_upload(
@@ -39,67 +35,34 @@ async def init_media_upload(
     Returns:
         Media ID and signed upload URL
     """
-    # Validate file type
-    if file_type not in ALLOWED_IMAGE_TYPES:
-        raise ValidationError(
-            message="Invalid file type",
-            details={"allowed_types": list(ALLOWED_IMAGE_TYPES)}
-        )
-
-    # Validate file size
-    if file_size > MAX_FILE_SIZE:
-        raise ValidationError(
-            message=f"File size exceeds maximum of {settings.max_image_size_mb}MB",
-            details={"max_size_mb": settings.max_image_size_mb}
-        )
-
-    # Generate media ID
-    media_id = generate_prefixed_id("media")
-
-    # Generate GCS path
-    extension = file_type.split("/")[1]
-    gcs_path = f"users/{current_user.user_id}/media/{media_id}.{extension}"
-
-    # TODO: Generate signed URL for GCS upload
-    # from google.cloud import storage
-    # storage_client = storage.Client()
-    # bucket = storage_client.bucket(settings.gcs_bucket)
-    # blob = bucket.blob(gcs_path)
-    # signed_url = blob.generate_signed_url(
-    #     version="v4",
-    #     expiration=timedelta(minutes=15),
-    #     method="PUT",
-    #     content_type=file_type
-    # )
-
-    signed_url = f"https://storage.googleapis.com/{settings.gcs_bucket}/{gcs_path}?upload_token=mock"
-
-    # Store media metadata (pending state)
-    media_metadata = {
-        "media_id": media_id,
-        "user_id": current_user.user_id,
-        "file_name": file_name,
-        "file_type": file_type,
-        "file_size": file_size,
-        "gcs_path": gcs_path,
-        "status": "pending",  # pending, ready, failed
-        "created_at": datetime.utcnow()
-    }
-
-    # TODO: Save metadata to database
-    # await media_repo.create_media(media_metadata)
+    # Validates type/size and signs the upload URL (cached signing credentials)
+    return await MediaService().init_upload(
+        user_id=current_user.user_id,
+        file_type=file_type,
+        file_size=file_size,
+        file_name=file_name
+    )
+
+
+@router.post("/:batchInit")
+async def batch_init_media_upload(
+    request: BatchInitUploadRequest,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)]
+):
+    """
+    Initialize several uploads in one request (e.g. all 8 lookaround images).
 
-    logger.info(f"Media upload initiated: {media_id} for user {current_user.user_id}")
+    Args:
+        request: Files to upload
 
-    return {
-        "media_id": media_id,
-        "upload_url": signed_url,
-        "method": "PUT",
-        "headers": {
-            "Content-Type": file_type
-        },
-        "expires_in": 900  # 15 minutes
-    }
+    Returns:
+        Media IDs and signed upload URLs, in request order
+    """
+    uploads = await MediaService().batch_init_uploads(
+        user_id=current_user.user_id,
+        files=[spec.model_dump() for spec in request.files]
+    )
+    return {"uploads": uploads}
 
 
 @router.post("/:commit")
@@ -116,75 +79,177 @@ async def commit_media_upload(
     Returns:
         Media status
     """
-    # TODO: Verify upload completion
-    # - Check if file exists in GCS
-    # - Validate file integrity
-    # - Update status to 'ready'
-
-    # TODO: Get media from database
-    # media = await media_repo.get_media(media_id)
-
-    # if not media or media.user_id != current_user.user_id:
-    #     raise NotFoundError("Media", media_id)
-
-    # if media.status != "pending":
-    #     raise ValidationError("Media is not in pending state")
-
-    # TODO: Update status
-    # await media_repo.update_media_status(media_id, "ready")
-
-    logger.info(f"Media upload committed: {media_id}")
+    # Verifies ownership and pending state, hashes the upload; duplicate_of points at an earlier near-identical photo
+    result = await MediaService().commit_upload(media_id, current_user.user_id)
 
     return {
         "media_id": media_id,
         "status": "ready",
+        "duplicate_of": result["duplicate_of"],
         "message": "Upload confirmed successfully"
     }
 
 
-@router.get("/{media_id}")
-async def get_media_download_url(
-    media_id: str,
+@router.post("/:batchCommit")
+async def batch_commit_media_upload(
+    request: BatchCommitUploadRequest,
     current_user: Annotated[UserSession, Depends(get_current_verified_user)]
 ):
     """
-    Get signed download URL for media.
+    Confirm several uploads in one request, optionally creating a media set.
 
     Args:
-        media_id: Media ID
+        request: Media IDs and optional set type
 
     Returns:
-        Signed download URL
+        Per-media status ("ready" with duplicate_of, or "failed" with the error)
+        and the media set, created only when every media was committed
+    """
+    return await MediaService().batch_commit_uploads(
+        user_id=current_user.user_id,
+        media_ids=request.media_ids,
+        set_type=request.set_type
+    )
+
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    response: Response,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)],
+    file_type: str = Form(...),
+    file_size: int = Form(...),
+    file_name: Optional[str] = Form(None),
+    checksum_sha256: Optional[str] = Form(None)
+):
     """
-    # TODO: Get media from database
-    # media = await media_repo.get_media(media_id)
+    Start a resumable chunked upload.
 
-    # if not media or media.user_id != current_user.user_id:
-    #     raise NotFoundError("Media", media_id)
+    Chunks are then sent with ``PATCH /uploads/{upload_id}``; after a dropped
+    connection, ``HEAD /uploads/{upload_id}`` returns the offset to resume from.
 
-    # if media.status != "ready":
-    #     raise ValidationError("Media is not ready for download")
+    Args:
+        file_type: MIME type of the file
+        file_size: File size in bytes
+        file_name: Original filename
+        checksum_sha256: Optional hex SHA-256 of the whole file
 
-    # TODO: Generate signed download URL
-    # from google.cloud import storage
-    # storage_client = storage.Client()
-    # bucket = storage_client.bucket(settings.gcs_bucket)
-    # blob = bucket.blob(media.gcs_path)
-    # download_url = blob.generate_signed_url(
-    #     version="v4",
-    #     expiration=timedelta(minutes=60),
-    #     method="GET"
-    # )
+    Returns:
+        Upload ID, media ID and chunking parameters
+    """
+    session = await UploadService().create_upload(
+        user_id=current_user.user_id,
+        file_type=file_type,
+        file_size=file_size,
+        file_name=file_name,
+        checksum_sha256=checksum_sha256
+    )
 
-    download_url = f"https://storage.googleapis.com/{settings.gcs_bucket}/mock-path/{media_id}?download_token=mock"
+    response.headers["Location"] = f"/{settings.api_version}/media/uploads/{session.upload_id}"
+    response.headers["Upload-Offset"] = "0"
 
     return {
-        "media_id": media_id,
-        "download_url": download_url,
-        "expires_in": 3600  # 1 hour
+        **session.to_dict(),
+        "chunk_size": RECOMMENDED_CHUNK_BYTES,
+        "max_chunk_size": MAX_CHUNK_BYTES
     }
 
 
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)]
+):
+    """
+    Get the current offset of a resumable upload.
+
+    Args:
+        upload_id: Upload ID
+
+    Returns:
+        Empty response with ``Upload-Offset`` and ``Upload-Length`` headers
+    """
+    session = await UploadService().get_upload(upload_id, current_user.user_id)
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "Upload-Offset": str(session.offset),
+            "Upload-Length": str(session.length),
+            "Cache-Control": "no-store"
+        }
+    )
+
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)],
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum")
+):
+    """
+    Append a chunk to a resumable upload.
+
+    The body is the raw chunk (``application/offset+octet-stream``), sent at
+    the server's current offset. The final chunk completes the upload and
+    marks the media ready; if that fails, an empty PATCH at the full length
+    retries the completion.
+
+    Args:
+        upload_id: Upload ID
+        upload_offset: Offset the chunk starts at
+        upload_checksum: Optional "sha256 <base64 digest>" of the chunk
+
+    Returns:
+        Upload state with the new offset
+    """
+    session = await UploadService().append_chunk(
+        upload_id=upload_id,
+        user_id=current_user.user_id,
+        offset=upload_offset,
+        body=request.stream(),
+        checksum=upload_checksum
+    )
+
+    response.headers["Upload-Offset"] = str(session.offset)
+    return session.to_dict()
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: str,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)]
+):
+    """
+    Cancel a resumable upload.
+
+    Args:
+        upload_id: Upload ID
+    """
+    await UploadService().abort_upload(upload_id, current_user.user_id)
+    return None
+
+
+@router.get("/{media_id}")
+async def get_media_download_url(
+    media_id: str,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)],
+    size: Optional[int] = Query(None, description="Derivative size: 128, 512 or 1024 (px, WebP)")
+):
+    """
+    Get signed download URL for media.
+
+    Args:
+        media_id: Media ID
+        size: Optional derivative size; rendered on first request
+
+    Returns:
+        Signed download URL
+    """
+    return await MediaService().get_download_url(media_id, current_user.user_id, size=size)
+
+
 @router.delete("/{media_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_media(
     media_id: str,
@@ -196,23 +261,7 @@ async def delete_media(
     Args:
         media_id: Media ID
     """
-    # TODO: Get media from database
-    # media = await media_repo.get_media(media_id)
-
-    # if not media or media.user_id != current_user.user_id:
-    #     raise NotFoundError("Media", media_id)
-
-    # TODO: Delete from GCS
-    # from google.cloud import storage
-    # storage_client = storage.Client()
-    # bucket = storage_client.bucket(settings.gcs_bucket)
-    # blob = bucket.blob(media.gcs_path)
-    # blob.delete()
-
-    # TODO: Delete from database
-    # await media_repo.delete_media(media_id)
-
-    logger.info(f"Media deleted: {media_id}")
+    await MediaService().delete_media(media_id, current_user.user_id)
 
     return None
 
@@ -236,40 +285,12 @@ async def create_media_set(
     # Parse media IDs
     media_id_list = [id.strip() for id in media_ids.split(",") if id.strip()]
 
-    # Validate count based on set type
-    if set_type == "lookaround8" and len(media_id_list) != 8:
-        raise ValidationError(
-            message="Lookaround8 requires exactly 8 images",
-            details={"provided": len(media_id_list), "required": 8}
-        )
-
-    # TODO: Verify all media IDs belong to user and are ready
-    # for media_id in media_id_list:
-    #     media = await media_repo.get_media(media_id)
-    #     if not media or media.user_id != current_user.user_id:
-    #         raise NotFoundError("Media", media_id)
-
-    # Create media set
-    set_id = generate_prefixed_id("mediaset")
-
-    set_data = {
-        "set_id": set_id,
-        "user_id": current_user.user_id,
-        "media_ids": media_id_list,
-        "set_type": set_type,
-        "created_at": datetime.utcnow()
-    }
-
-    # TODO: Save to database
-    # await media_repo.create_media_set(set_data)
-
-    logger.info(f"Media set created: {set_id} with {len(media_id_list)} images")
-
-    return {
-        "set_id": set_id,
-        "media_count": len(media_id_list),
-        "set_type": set_type
-    }
+    # Checks ownership and readiness in one batched read, validates count and rejects near-duplicate directions for lookaround8
+    return await MediaService().create_media_set(
+        user_id=current_user.user_id,
+        media_ids=media_id_list,
+        set_type=set_type
+    )
 
 
 @router.get("/sets/{set_id}")
@@ -286,10 +307,25 @@ async def get_media_set(
     Returns:
         Media set with download URLs
     """
-    # TODO: Get media set from database
-    # media_set = await media_repo.get_media_set(set_id)
+    return await MediaService().get_media_set(set_id, current_user.user_id)
 
-    # if not media_set or media_set.user_id != current_user.user_id:
-    #     raise NotFoundError("Media set", set_id)
 
-    raise NotFoundError("Media set", set_id)
\ No newline at end of file
+@router.get("/sets/{set_id}/urls")
+async def get_media_set_urls(
+    set_id: str,
+    current_user: Annotated[UserSession, Depends(get_current_verified_user)]
+):
+    """
+    Get signed download URLs for every media in a set, in one request.
+
+    Args:
+        set_id: Media set ID
+
+    Returns:
+        Download URLs in set order
+    """
+    media_set = await MediaService().get_media_set(set_id, current_user.user_id)
+    return {
+        "set_id": set_id,
+        "urls": media_set["urls"]
+    }
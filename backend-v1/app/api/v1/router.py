@@ -9,7 +9,8 @@ from app.api.v1 import (
     media,
     analysis,
     reports,
-    entitlements
+    entitlements,
+    admin
 )
 
 api_router = APIRouter()
@@ -22,6 +23,7 @@ api_router.include_router(media.router, prefix="/media", tags=["Media"])
 api_router.include_router(analysis.router, prefix="/analysis", tags=["Analysis"])
 api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
 api_router.include_router(entitlements.router, prefix="/entitlements", tags=["Entitlements"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 # Optional: Add chat routes only if enabled
 # if settings.enable_chat:
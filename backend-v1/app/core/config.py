@@ -1,7 +1,7 @@
 """
 Application configuration using Pydantic Settings.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -15,6 +15,17 @@ class Settings(BaseSettings):
     api_version: str = Field(default="v1", env="API_VERSION")
     debug: bool = Field(default=False, env="DEBUG")
 
+    # Logging (records wait in a bounded queue for the writer thread; 0 = write synchronously)
+    log_queue_size: int = Field(default=10000, env="LOG_QUEUE_SIZE")
+    # Logger name -> fraction of INFO/DEBUG records kept outside development; WARNING+ is never sampled
+    log_sample_rates: Dict[str, float] = Field(
+        default={"app.api.v1.auth": 0.01, "app.services.auth_service": 0.01},
+        env="LOG_SAMPLE_RATES"
+    )
+    # Repeated WARNING+ records from one call site: burst, refilled over the period
+    log_dedup_burst: int = Field(default=10, env="LOG_DEDUP_BURST")
+    log_dedup_period_seconds: int = Field(default=60, env="LOG_DEDUP_PERIOD_SECONDS")
+
     # Server
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
@@ -30,6 +41,32 @@ class Settings(BaseSettings):
     gcs_bucket: str = Field(..., env="GCS_BUCKET")
     firestore_database: str = Field(default="(default)", env="FIRESTORE_DATABASE")
 
+    # Object storage backend for uploads: "gcs", or "local" (filesystem, for tests/dev)
+    storage_backend: str = Field(default="gcs", env="STORAGE_BACKEND")
+    local_storage_dir: str = Field(default=".storage", env="LOCAL_STORAGE_DIR")
+
+    # Signed download URL cache (per process, optionally shared through Redis)
+    signed_url_cache_size: int = Field(default=10000, env="SIGNED_URL_CACHE_SIZE")
+    signed_url_min_remaining_minutes: int = Field(default=10, env="SIGNED_URL_MIN_REMAINING_MINUTES")
+    signed_url_cache_redis: bool = Field(default=False, env="SIGNED_URL_CACHE_REDIS")
+
+    # Metrics (/metrics requires "Authorization: Bearer <token>" when set; disabled in production until set)
+    metrics_token: Optional[str] = Field(None, env="METRICS_TOKEN")
+
+    # Profiling (requests with a signed X-Profile header are profiled; unset = disabled)
+    profiling_secret: Optional[str] = Field(None, env="PROFILING_SECRET")
+
+    # Admin API (/v1/admin requires "Authorization: Bearer <token>"; unset = disabled)
+    admin_token: Optional[str] = Field(None, env="ADMIN_TOKEN")
+
+    # Tracing (fraction of requests traced; spans go to the logs, or memory for tests)
+    trace_sample_rate: float = Field(default=0.0, env="TRACE_SAMPLE_RATE")
+    trace_exporter: str = Field(default="log", env="TRACE_EXPORTER")  # "log" or "memory"
+
+    # Readiness probes (results cached between kubelet probes; each probe has its own timeout)
+    readiness_cache_seconds: float = Field(default=5.0, env="READINESS_CACHE_SECONDS")
+    readiness_probe_timeout_seconds: float = Field(default=1.0, env="READINESS_PROBE_TIMEOUT_SECONDS")
+
     # Redis
     redis_url: Optional[str] = Field(None, env="REDIS_URL")
 
@@ -44,11 +81,33 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")
     rate_limit_per_hour: int = Field(default=1000, env="RATE_LIMIT_PER_HOUR")
+    rate_limit_preauth_per_minute: int = Field(default=300, env="RATE_LIMIT_PREAUTH_PER_MINUTE")  # Per client, before auth
+    rate_limit_backend: str = Field(default="memory", env="RATE_LIMIT_BACKEND")  # "memory" or "redis"
+
+    # Resumable upload sessions ("redis" lets a resumed upload land on any instance)
+    upload_session_backend: str = Field(default="redis", env="UPLOAD_SESSION_BACKEND")  # "memory" or "redis"
 
     # Analysis Settings
     max_image_size_mb: int = Field(default=10, env="MAX_IMAGE_SIZE_MB")
     analysis_timeout_seconds: int = Field(default=300, env="ANALYSIS_TIMEOUT_SECONDS")
 
+    # AI Model (Gemini-compatible generateContent endpoint; unset = mock responses)
+    ai_model_base_url: Optional[str] = Field(None, env="AI_MODEL_BASE_URL")
+    ai_model_api_key: Optional[str] = Field(None, env="AI_MODEL_API_KEY")
+    ai_model_name: str = Field(default="gemini-2.5-pro", env="AI_MODEL_NAME")
+    ai_model_max_connections: int = Field(default=20, env="AI_MODEL_MAX_CONNECTIONS")
+    ai_model_max_keepalive: int = Field(default=10, env="AI_MODEL_MAX_KEEPALIVE")
+    ai_model_max_retries: int = Field(default=3, env="AI_MODEL_MAX_RETRIES")
+    prompt_token_budget: int = Field(default=1024, env="PROMPT_TOKEN_BUDGET")  # Estimated tokens; larger prompts are compacted
+
+    # Image preprocessing before model calls (downscale + re-encode in a process pool)
+    image_preprocess_enabled: bool = Field(default=True, env="IMAGE_PREPROCESS_ENABLED")
+    image_preprocess_workers: int = Field(default=2, env="IMAGE_PREPROCESS_WORKERS")
+    image_max_side_px: int = Field(default=1536, env="IMAGE_MAX_SIDE_PX")
+    image_target_kb: int = Field(default=350, env="IMAGE_TARGET_KB")
+    image_output_format: str = Field(default="WEBP", env="IMAGE_OUTPUT_FORMAT")
+    derivative_workers: int = Field(default=2, env="DERIVATIVE_WORKERS")
+
     # CORS
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:5173"],
@@ -63,6 +122,13 @@ class Settings(BaseSettings):
     free_analysis_per_month: int = Field(default=3, env="FREE_ANALYSIS_PER_MONTH")
     free_chat_messages_per_day: int = Field(default=10, env="FREE_CHAT_MESSAGES_PER_DAY")
 
+    # Chat memory (recent turns verbatim, older turns compressed in the background)
+    chat_memory_backend: str = Field(default="memory", env="CHAT_MEMORY_BACKEND")  # "memory" or "redis"
+    chat_recent_turns: int = Field(default=8, env="CHAT_RECENT_TURNS")
+    chat_summarize_batch: int = Field(default=8, env="CHAT_SUMMARIZE_BATCH")
+    chat_buffer_turns: int = Field(default=24, env="CHAT_BUFFER_TURNS")  # Ring buffer size per session
+    chat_session_ttl_seconds: int = Field(default=7 * 86400, env="CHAT_SESSION_TTL_SECONDS")
+
     @validator("environment")
     def validate_environment(cls, v):
         """Validate environment value."""
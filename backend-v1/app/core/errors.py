@@ -23,11 +23,12 @@ class APIError(HTTPException):
         code: str,
         message: str,
         details: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
     ):
         self.code = code
         self.message = message
         self.details = details
-        super().__init__(status_code=status_code, detail=message)
+        super().__init__(status_code=status_code, detail=message, headers=headers)
 
     def to_response(self) -> JSONResponse:
         """Convert to JSON response."""
@@ -39,7 +40,7 @@ class APIError(HTTPException):
         }
         if self.details:
             content["error"]["details"] = self.details
-        return JSONResponse(status_code=self.status_code, content=content)
+        return JSONResponse(status_code=self.status_code, content=content, headers=self.headers)
 
 
 # Authentication Errors
@@ -153,15 +154,23 @@ class InvalidFileTypeError(ValidationError):
 class RateLimitExceededError(APIError):
     """Raised when rate limit is exceeded."""
 
-    def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[int] = None):
+    def __init__(
+        self,
+        message: str = "Rate limit exceeded",
+        retry_after: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
         details = {}
+        headers = dict(headers or {})
         if retry_after:
             details["retry_after_seconds"] = retry_after
+            headers["Retry-After"] = str(retry_after)
         super().__init__(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             code="RATE_LIMIT_EXCEEDED",
             message=message,
             details=details,
+            headers=headers or None,
         )
 
 
@@ -169,12 +178,12 @@ class RateLimitExceededError(APIError):
 class QuotaExceededError(APIError):
     """Raised when user exceeds their quota."""
 
-    def __init__(self, resource: str, limit: int):
+    def __init__(self, resource: str, limit: int, period: str = "monthly"):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN,
             code="QUOTA_EXCEEDED",
-            message=f"Monthly {resource} limit ({limit}) exceeded",
-            details={"resource": resource, "limit": limit},
+            message=f"{period.capitalize()} {resource} limit ({limit}) exceeded",
+            details={"resource": resource, "limit": limit, "period": period},
         )
 
 
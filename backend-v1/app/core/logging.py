@@ -1,52 +1,259 @@
 """
 Structured logging configuration.
+
+Records are handed to a bounded queue and formatted/written by a
+background listener thread, so logging never blocks the event loop on
+stdout or file I/O. When the queue is full, records are dropped and
+counted rather than blocking.
+
+Volume controls: INFO/DEBUG records can be sampled per logger, and
+WARNING+ records repeated from the same call site are rate limited.
 """
 import logging
+import logging.handlers
 import json
+import queue
+import random
 import sys
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from contextvars import ContextVar
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is used without it
+    orjson = None
+
 # Context variable for request ID
 request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 
+_listener: Optional[logging.handlers.QueueListener] = None
+_handlers: List[logging.Handler] = []
+
 
 class StructuredFormatter(logging.Formatter):
-    """Custom formatter that outputs JSON structured logs."""
+    """
+    Custom formatter that outputs JSON structured logs.
+
+    Serializes with orjson when installed. Fields that are the same for
+    every record (service, version, ...) are bound once, and the
+    timestamp's date/time part is reused within the same second.
+    """
+
+    def __init__(self, static_fields: Optional[Dict[str, Any]] = None):
+        """
+        Initialize formatter.
+
+        Args:
+            static_fields: Fields added to every record (e.g. service and version)
+        """
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+        self._second: Tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        """ISO 8601 UTC timestamp of the record's creation (log time, not write time)."""
+        second = int(created)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, prefix)
+        return f"{prefix}.{min(round((created - second) * 1_000_000), 999_999):06d}"
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_obj: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
+            **self.static_fields,
         }
 
-        # Add request ID if available
-        request_id = request_id_var.get()
+        # Add request ID if available (captured at log time when queued)
+        request_id = getattr(record, "request_id", None) or request_id_var.get()
         if request_id:
             log_obj["request_id"] = request_id
 
-        # Add exception info if present
+        # Sampled records carry their rate so counts can be scaled back up
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            log_obj["sample_rate"] = sample_rate
+
+        # Add exception info if present (formatted once per record)
         if record.exc_info:
-            log_obj["exception"] = self.formatException(record.exc_info)
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            log_obj["exception"] = record.exc_text
 
         # Add extra fields
-        if hasattr(record, "extra_fields"):
-            log_obj.update(record.extra_fields)
+        extra_fields = getattr(record, "extra_fields", None)
+        if extra_fields:
+            log_obj.update(extra_fields)
 
+        if orjson is not None:
+            try:
+                return orjson.dumps(log_obj, default=str).decode()
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits; stdlib json handles them
         return json.dumps(log_obj, default=str)
 
 
+class _PerRecordFilter(logging.Filter):
+    """
+    Filter whose decision is made once per record, so it can sit on both the
+    queue handler and the writer's handlers without double counting.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        attr = f"_filtered_{id(self)}"
+        decision = record.__dict__.get(attr)
+        if decision is None:
+            decision = self.decide(record)
+            setattr(record, attr, decision)
+        return decision
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        raise NotImplementedError
+
+
+class SamplingFilter(_PerRecordFilter):
+    """
+    Keep a fraction of records below WARNING, per logger.
+
+    Rates apply to a logger and its children (the longest configured
+    prefix wins); WARNING and above always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialize filter.
+
+        Args:
+            rates: Logger name -> fraction of INFO/DEBUG records to keep (0..1)
+        """
+        super().__init__()
+        self.rates = dict(rates)
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix in sorted(self.rates, key=len, reverse=True):
+                if name == prefix or name.startswith(prefix + "."):
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        return False
+
+
+class DedupFilter(_PerRecordFilter):
+    """
+    Token bucket per call site for WARNING+ records.
+
+    Each call site may log ``burst`` records at once and one more every
+    ``period / burst`` seconds; the next record let through reports how
+    many were suppressed in between.
+    """
+
+    MAX_SITES = 10000
+
+    def __init__(self, burst: int = 10, period: float = 60.0):
+        """
+        Initialize filter.
+
+        Args:
+            burst: Records allowed back to back per call site
+            period: Seconds to refill the whole burst
+        """
+        super().__init__()
+        self.burst = burst
+        self.refill = burst / period
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}  # site -> [tokens, updated, suppressed]
+        self._lock = threading.Lock()
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_SITES:
+                    self._buckets.clear()
+                bucket = self._buckets[site] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.refill)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} similar suppressed]"
+            record.args = None
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks: records arriving while the queue is
+    full are dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Capture what can't be recovered on the listener thread.
+
+        The message is merged with its args now (they may be mutated later)
+        and the request ID is read from this thread's context; formatting
+        itself is left to the listener's handlers.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 def setup_logging(
     level: str = "INFO",
     json_logs: bool = True,
     log_file: Optional[str] = None,
+    queue_size: int = 10000,
+    static_fields: Optional[Dict[str, Any]] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
+    dedup_burst: int = 10,
+    dedup_period: float = 60.0,
 ) -> None:
     """
     Configure application logging.
@@ -55,15 +262,24 @@ def setup_logging(
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         json_logs: Whether to output JSON formatted logs
         log_file: Optional file path for log output
+        queue_size: Max records waiting for the writer thread (0 = write synchronously)
+        static_fields: Fields added to every JSON record (e.g. service and version)
+        sample_rates: Logger name -> fraction of INFO/DEBUG records to keep
+        dedup_burst: WARNING+ records allowed back to back per call site (0 = no limit)
+        dedup_period: Seconds to refill a call site's burst
     """
+    global _listener, _handlers
+
     log_level = getattr(logging, level.upper(), logging.INFO)
 
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
 
-    # Remove existing handlers
+    # Remove existing handlers (and stop a previous writer thread)
+    shutdown_logging()
     root_logger.handlers.clear()
+    _handlers = []
 
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -71,20 +287,43 @@ def setup_logging(
 
     # Set formatter
     if json_logs:
-        formatter = StructuredFormatter()
+        formatter = StructuredFormatter(static_fields)
     else:
         formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    _handlers.append(console_handler)
 
     # Add file handler if specified
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        _handlers.append(file_handler)
+
+    # Volume controls (decided once per record, whichever handler sees it first)
+    filters: List[logging.Filter] = []
+    if sample_rates:
+        filters.append(SamplingFilter(sample_rates))
+    if dedup_burst > 0:
+        filters.append(DedupFilter(dedup_burst, dedup_period))
+    for handler in _handlers:
+        for log_filter in filters:
+            handler.addFilter(log_filter)
+
+    if queue_size > 0:
+        # Format and write on a background thread
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        for log_filter in filters:
+            queue_handler.addFilter(log_filter)
+        root_logger.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in _handlers:
+            root_logger.addHandler(handler)
 
     # Suppress noisy loggers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -92,6 +331,41 @@ def setup_logging(
     logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the writer thread (called on application shutdown).
+
+    Later records are written synchronously so nothing logged during
+    teardown is lost.
+    """
+    global _listener
+    if _listener is None:
+        return
+
+    root_logger = logging.getLogger()
+    dropped = get_dropped_log_count()
+    _listener.stop()  # Drains the queue before returning
+    _listener = None
+
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in _handlers:
+        root_logger.addHandler(handler)
+
+    if dropped:
+        root_logger.warning(f"Dropped {dropped} log record(s) while the log queue was full")
+
+
+def get_dropped_log_count() -> int:
+    """Number of log records dropped because the log queue was full."""
+    return sum(
+        handler.dropped
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, DroppingQueueHandler)
+    )
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the given name.
@@ -108,8 +382,25 @@ def get_logger(name: str) -> logging.Logger:
 class LoggerAdapter(logging.LoggerAdapter):
     """
     Custom logger adapter that adds request context.
+
+    With a ``sample_rate`` below 1, only that fraction of INFO/DEBUG calls
+    is logged (decided before any formatting); WARNING+ always is.
     """
 
+    def __init__(self, logger: logging.Logger, extra: Optional[Dict[str, Any]] = None, sample_rate: float = 1.0):
+        super().__init__(logger, extra or {})
+        self.sample_rate = sample_rate
+
+    def log(self, level, msg, *args, **kwargs):
+        """Log, dropping sampled-out INFO/DEBUG calls."""
+        if self.sample_rate < 1.0 and level < logging.WARNING:
+            if random.random() >= self.sample_rate:
+                return
+            kwargs["extra"] = {**kwargs.get("extra", {}), "sample_rate": self.sample_rate}
+        # Attribute the record to our caller, not this method
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+        super().log(level, msg, *args, **kwargs)
+
     def process(self, msg, kwargs):
         """Add request ID to log records."""
         request_id = request_id_var.get()
@@ -119,15 +410,16 @@ class LoggerAdapter(logging.LoggerAdapter):
         return msg, kwargs
 
 
-def get_context_logger(name: str) -> LoggerAdapter:
+def get_context_logger(name: str, sample_rate: float = 1.0) -> LoggerAdapter:
     """
     Get a logger that includes request context.
 
     Args:
         name: Logger name
+        sample_rate: Fraction of INFO/DEBUG calls to log (for hot paths)
 
     Returns:
         Logger adapter with context
     """
     logger = get_logger(name)
-    return LoggerAdapter(logger, {})
\ No newline at end of file
+    return LoggerAdapter(logger, {}, sample_rate=sample_rate)
\ No newline at end of file
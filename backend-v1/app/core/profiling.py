@@ -0,0 +1,166 @@
+"""
+Opt-in per-request profiling.
+
+A request carrying a valid ``X-Profile`` header (signed with
+PROFILING_SECRET) is run under a profiler and the report is kept in memory
+under its request ID, retrievable through the admin API. pyinstrument is
+used when installed (sampling, follows the request across awaits);
+otherwise cProfile, which also counts other requests interleaved on the
+event loop while the profiled one runs.
+
+Mint a header with:
+    python -m app.core.profiling /v1/bazi/four_sentences --ttl 600
+"""
+import argparse
+import cProfile
+import hashlib
+import hmac
+import io
+import pstats
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Reports kept in memory (oldest evicted first)
+MAX_PROFILES = 50
+
+# Functions shown in cProfile text reports
+CPROFILE_TOP_FUNCTIONS = 60
+
+
+def sign_profile_header(path: str, ttl_seconds: int = 600, secret: Optional[str] = None) -> str:
+    """
+    Create an ``X-Profile`` header value for a request path.
+
+    Args:
+        path: Request path to profile (exact match)
+        ttl_seconds: Validity of the header
+        secret: Signing secret (defaults to PROFILING_SECRET)
+
+    Returns:
+        Header value ``<expires>.<signature>``
+    """
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(secret or settings.profiling_secret, expires, path)}"
+
+
+def verify_profile_header(value: str, path: str) -> bool:
+    """Check an ``X-Profile`` header against the request path and expiry."""
+    if not settings.profiling_secret:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(settings.profiling_secret, int(expires), path))
+
+
+def _signature(secret: str, expires: int, path: str) -> str:
+    return hmac.new(secret.encode(), f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+
+
+@dataclass
+class ProfileReport:
+    """Profiling report of one request."""
+    request_id: str
+    method: str
+    path: str
+    duration_ms: float
+    status_code: Optional[int]
+    format: str  # "html" (pyinstrument) or "text" (cProfile)
+    content: str
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def summary(self) -> Dict[str, Any]:
+        """Report metadata without the content."""
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration_ms, 1),
+            "status_code": self.status_code,
+            "format": self.format,
+            "created_at": self.created_at,
+        }
+
+
+class RequestProfiler:
+    """Profiler for one request (pyinstrument if available, else cProfile)."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="enabled")
+            self.format = "html"
+        except ImportError:
+            self._profiler = cProfile.Profile()
+            self.format = "text"
+
+    def start(self) -> None:
+        if self.format == "html":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        """Stop profiling and render the report."""
+        if self.format == "html":
+            self._profiler.stop()
+            return self._profiler.output_html()
+
+        self._profiler.disable()
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(CPROFILE_TOP_FUNCTIONS)
+        return out.getvalue()
+
+
+class ProfileStore:
+    """Bounded in-memory store of profiling reports, keyed by request ID."""
+
+    def __init__(self, max_entries: int = MAX_PROFILES):
+        self.max_entries = max_entries
+        self._reports: "OrderedDict[str, ProfileReport]" = OrderedDict()
+
+    def add(self, report: ProfileReport) -> None:
+        self._reports[report.request_id] = report
+        while len(self._reports) > self.max_entries:
+            self._reports.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[ProfileReport]:
+        return self._reports.get(request_id)
+
+    def list(self) -> List[ProfileReport]:
+        """Reports, newest first."""
+        return list(reversed(self._reports.values()))
+
+
+_store = ProfileStore()
+
+
+def get_profile_store() -> ProfileStore:
+    """Get the process-wide profile store."""
+    return _store
+
+
+def main() -> None:
+    """Print an X-Profile header value for a path."""
+    parser = argparse.ArgumentParser(description="Mint an X-Profile header (uses PROFILING_SECRET)")
+    parser.add_argument("path", help="Request path, e.g. /v1/bazi/four_sentences")
+    parser.add_argument("--ttl", type=int, default=600, help="Validity in seconds")
+    args = parser.parse_args()
+
+    if not settings.profiling_secret:
+        parser.error("PROFILING_SECRET is not set")
+    print(f"X-Profile: {sign_profile_header(args.path, args.ttl)}")
+
+
+if __name__ == "__main__":
+    main()
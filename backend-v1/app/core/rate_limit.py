@@ -0,0 +1,259 @@
+"""
+Token-bucket rate limiting (GCRA).
+
+The generic cell rate algorithm stores a single number per key, the
+"theoretical arrival time" (TAT) of the next request, which makes a check
+one read and one write. ``MemoryRateLimitBackend`` keeps TATs in sharded
+in-process dicts (single node); ``RedisRateLimitBackend`` runs the same
+algorithm as an atomic Lua script so limits hold across instances.
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    A rate limit: ``calls`` per ``period`` seconds, with up to ``burst``
+    calls allowed back to back (defaults to ``calls``).
+    """
+    calls: int
+    period: float
+    burst: Optional[int] = None
+
+    @property
+    def interval(self) -> float:
+        """Seconds between calls at the sustained rate (emission interval)."""
+        return self.period / self.calls
+
+    @property
+    def tolerance(self) -> float:
+        """How far ahead of now the TAT may run (burst capacity in seconds)."""
+        return self.interval * (self.burst or self.calls)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # Seconds until the call would be allowed (0 if allowed)
+    reset_after: float  # Seconds until the bucket is full again
+
+    def headers(self) -> Dict[str, str]:
+        """Rate limit response headers."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra(tat: Optional[float], now: float, rate: Rate, cost: int = 1) -> Tuple[Optional[float], RateLimitResult]:
+    """
+    One GCRA step.
+
+    Args:
+        tat: Stored theoretical arrival time (None for a new key)
+        now: Current time (same clock as ``tat``)
+        rate: Rate limit
+        cost: Tokens consumed by the call
+
+    Returns:
+        (new TAT to store, or None if denied; result)
+    """
+    interval = rate.interval
+    tolerance = rate.tolerance
+    limit = rate.burst or rate.calls
+
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval * cost
+    allow_at = new_tat - tolerance
+
+    if now < allow_at:
+        return None, RateLimitResult(
+            allowed=False,
+            limit=limit,
+            remaining=0,
+            retry_after=allow_at - now,
+            reset_after=tat - now,
+        )
+
+    return new_tat, RateLimitResult(
+        allowed=True,
+        limit=limit,
+        remaining=int((now - allow_at) / interval),
+        retry_after=0.0,
+        reset_after=new_tat - now,
+    )
+
+
+class RateLimitBackend(ABC):
+    """Storage for rate limit state."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        """
+        Consume ``cost`` tokens from a key's bucket if available.
+
+        Args:
+            key: Bucket key (e.g. limiter name + user ID)
+            rate: Rate limit
+            cost: Tokens consumed
+
+        Returns:
+            RateLimitResult
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In-process backend (single node).
+
+    A check never awaits between reading and writing a TAT, so it is atomic
+    on the event loop without locks. Keys are spread over shards, each an
+    LRU capped at ``max_keys_per_shard``: once a shard is full, its least
+    recently checked keys are evicted (forgetting their bucket), so a flood
+    of distinct keys costs bounded memory and O(1) work per check. Expired
+    keys are swept at most once per ``SWEEP_INTERVAL_SECONDS`` per shard.
+    """
+
+    SWEEP_INTERVAL_SECONDS = 30.0
+
+    def __init__(self, shards: int = 64, max_keys_per_shard: int = 4096):
+        """
+        Initialize backend.
+
+        Args:
+            shards: Number of shards (rounded up to a power of two)
+            max_keys_per_shard: Hard cap on keys held per shard
+        """
+        count = 1 << max(0, shards - 1).bit_length()
+        self._mask = count - 1
+        self._shards: List["OrderedDict[str, float]"] = [OrderedDict() for _ in range(count)]
+        self._swept_at: List[float] = [0.0] * count
+        self._max_keys = max_keys_per_shard
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        return self.hit_nowait(key, rate, cost)
+
+    def hit_nowait(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        """Synchronous ``hit`` (for callers outside a coroutine)."""
+        index = hash(key) & self._mask
+        shard = self._shards[index]
+        now = time.monotonic()
+        tat = shard.get(key)
+        new_tat, result = gcra(tat, now, rate, cost)
+        if new_tat is not None:
+            shard[key] = new_tat
+        if key in shard:
+            # Keys still being checked (including denied ones) are kept longest
+            shard.move_to_end(key)
+        if len(shard) > self._max_keys:
+            if now - self._swept_at[index] >= self.SWEEP_INTERVAL_SECONDS:
+                self._swept_at[index] = now
+                self._sweep(shard, now)
+            while len(shard) > self._max_keys:
+                shard.popitem(last=False)
+        return result
+
+    def _sweep(self, shard: "OrderedDict[str, float]", now: float) -> None:
+        """Drop keys whose bucket is full again (TAT in the past)."""
+        for key in [key for key, tat in shard.items() if tat <= now]:
+            del shard[key]
+
+
+# KEYS[1] = bucket key; ARGV = interval ms, tolerance ms, cost.
+# Uses the server clock so all instances agree on "now".
+GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+  tat = now
+end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - tolerance
+
+if now < allow_at then
+  return {0, 0, tostring(allow_at - now), tostring(tat - now)}
+end
+
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), '0', tostring(new_tat - now)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Redis backend (shared across instances).
+
+    Each check is one EVALSHA round trip. If Redis is unreachable, checks
+    fall back to a per-process memory backend rather than failing requests.
+    """
+
+    def __init__(self, redis, prefix: str = "rl:"):
+        """
+        Initialize backend.
+
+        Args:
+            redis: ``redis.asyncio.Redis`` client
+            prefix: Key prefix
+        """
+        self._script = redis.register_script(GCRA_LUA)
+        self._prefix = prefix
+        self._fallback = MemoryRateLimitBackend()
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        try:
+            allowed, remaining, retry_after_ms, reset_after_ms = await self._script(
+                keys=[self._prefix + key],
+                args=[rate.interval * 1000, rate.tolerance * 1000, cost],
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limit check failed, using local limits: {e}")
+            return await self._fallback.hit(key, rate, cost)
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=rate.burst or rate.calls,
+            remaining=int(remaining),
+            retry_after=float(retry_after_ms) / 1000,
+            reset_after=float(reset_after_ms) / 1000,
+        )
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Get the configured rate limit backend (Redis if enabled and configured)."""
+    global _backend
+    if _backend is None:
+        redis = get_redis() if settings.rate_limit_backend == "redis" else None
+        if redis is not None:
+            _backend = RedisRateLimitBackend(redis)
+        else:
+            if settings.rate_limit_backend == "redis":
+                logger.warning("RATE_LIMIT_BACKEND=redis but REDIS_URL is not set; using in-memory limits")
+            _backend = MemoryRateLimitBackend()
+    return _backend
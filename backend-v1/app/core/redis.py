@@ -0,0 +1,30 @@
+"""
+Shared Redis connection.
+"""
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_client = None
+
+
+def get_redis():
+    """
+    Get the shared async Redis client.
+
+    Returns:
+        ``redis.asyncio.Redis`` (connection pooled), or None if REDIS_URL is not set
+    """
+    global _client
+    if _client is None and settings.redis_url:
+        import redis.asyncio as redis
+        _client = redis.from_url(settings.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
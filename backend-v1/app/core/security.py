@@ -2,26 +2,43 @@
 Security utilities for authentication and authorization.
 """
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any, Dict, Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.core.config import get_settings
 from app.core.errors import InvalidCredentialsError, TokenExpiredError
+from app.core.tracing import traced
 
 settings = get_settings()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def _jwt():
+    """python-jose's ``jwt`` module (imported on first use, off the startup path)."""
+    from jose import jwt
+    return jwt
+
+
+@lru_cache(maxsize=None)
+def _pwd_context():
+    """Password hashing context (passlib and bcrypt are imported on first use)."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def warm_up() -> None:
+    """Import the JWT and password hashing libraries ahead of the first request."""
+    _jwt()
+    _pwd_context()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def hash_password(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def create_access_token(
@@ -57,7 +74,7 @@ def create_access_token(
     if extra_claims:
         to_encode.update(extra_claims)
 
-    encoded_jwt = jwt.encode(
+    encoded_jwt = _jwt().encode(
         to_encode,
         settings.jwt_secret_key,
         algorithm=settings.jwt_algorithm,
@@ -98,7 +115,7 @@ def create_refresh_token(
     if extra_claims:
         to_encode.update(extra_claims)
 
-    encoded_jwt = jwt.encode(
+    encoded_jwt = _jwt().encode(
         to_encode,
         settings.jwt_secret_key,
         algorithm=settings.jwt_algorithm,
@@ -106,6 +123,7 @@ def create_refresh_token(
     return encoded_jwt
 
 
+@traced("auth.decode_token")
 def decode_token(token: str) -> Dict[str, Any]:
     """
     Decode and validate a JWT token.
@@ -120,6 +138,7 @@ def decode_token(token: str) -> Dict[str, Any]:
         InvalidCredentialsError: If token is invalid
         TokenExpiredError: If token has expired
     """
+    jwt = _jwt()
     try:
         payload = jwt.decode(
             token,
@@ -129,7 +148,7 @@ def decode_token(token: str) -> Dict[str, Any]:
         return payload
     except jwt.ExpiredSignatureError:
         raise TokenExpiredError()
-    except JWTError:
+    except jwt.JWTError:
         raise InvalidCredentialsError("Invalid token")
 
 
@@ -178,7 +197,7 @@ def create_email_verification_token(email: str) -> str:
         "exp": expire,
         "type": "email_verification",
     }
-    return jwt.encode(
+    return _jwt().encode(
         to_encode,
         settings.jwt_secret_key,
         algorithm=settings.jwt_algorithm,
@@ -227,7 +246,7 @@ def create_password_reset_token(user_id: str) -> str:
         "exp": expire,
         "type": "password_reset",
     }
-    return jwt.encode(
+    return _jwt().encode(
         to_encode,
         settings.jwt_secret_key,
         algorithm=settings.jwt_algorithm,
@@ -0,0 +1,294 @@
+"""
+Lightweight span tracing.
+
+Spans follow the OpenTelemetry data model (128-bit trace ID, 64-bit span
+ID, parent link, attributes, events, status, nanosecond timestamps) and
+are serialised with OTLP field names, but need no SDK.
+
+Spans are correlated through ``request_id_var``: the trace ID of a
+request is derived from its request ID, so every span of a request
+(including background jobs it starts) shares one trace and can be joined
+with the request's log lines. Sampling is decided from the trace ID alone
+(like OpenTelemetry's ``TraceIdRatioBased``), so a trace is kept or
+dropped as a whole without threading any state; unsampled spans are a
+shared no-op object.
+
+Usage:
+    with start_span("workspace.prompt", scene_type="workspace") as span:
+        ...
+        span.set_attribute("prompt_chars", len(prompt))
+
+    @traced()
+    async def get_media(...): ...
+"""
+import functools
+import hashlib
+import inspect
+import os
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from app.core.config import get_settings
+from app.core.logging import get_logger, request_id_var
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Spans kept by the in-memory exporter (oldest dropped first)
+MEMORY_EXPORTER_MAX_SPANS = 10000
+
+# Sampling reads the last 56 bits of the trace ID (random in UUID4s, whose
+# variant bits sit just above them)
+_SAMPLE_BITS = 56
+_SAMPLE_SPACE = 2 ** _SAMPLE_BITS
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@functools.lru_cache(maxsize=4096)
+def _trace_id_for(request_id: str) -> str:
+    """128-bit trace ID (hex) for a request ID (UUIDs map to themselves)."""
+    try:
+        return uuid.UUID(request_id).hex
+    except ValueError:
+        return hashlib.sha256(request_id.encode()).hexdigest()[:32]
+
+
+def _is_sampled(trace_id: str, rate: float) -> bool:
+    """Deterministic sampling decision from the low bits of the trace ID."""
+    return int(trace_id[-_SAMPLE_BITS // 4:], 16) < rate * _SAMPLE_SPACE
+
+
+class Span:
+    """A timed operation; use as a context manager."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "attributes", "events",
+        "status", "status_description", "start_time_ns", "end_time_ns",
+        "_tracer", "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_description: Optional[str] = None
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_time_ns - self.start_time_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        """Record a point-in-time event on the span."""
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Record an exception and mark the span as failed."""
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+        self.status = "ERROR"
+        self.status_description = f"{type(exc).__name__}: {exc}"
+
+    def __enter__(self) -> "Span":
+        self.start_time_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_time_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.record_exception(exc)
+        elif self.status == "UNSET":
+            self.status = "OK"
+        self._tracer.exporter.export([self])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span in OTLP/JSON field names."""
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status},
+        }
+        if self.status_description:
+            data["status"]["message"] = self.status_description
+        if self.events:
+            data["events"] = self.events
+        return data
+
+
+class _NonRecordingSpan:
+    """Span returned when a trace is not sampled (all operations are no-ops)."""
+
+    __slots__ = ()
+
+    is_recording = False
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NonRecordingSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class SpanExporter:
+    """Receives finished spans."""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        raise NotImplementedError
+
+
+class LogSpanExporter(SpanExporter):
+    """Writes each finished span as a structured log record (picked up with the JSON logs)."""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        for span in spans:
+            logger.info(
+                f"span {span.name} {span.duration_ms:.1f}ms",
+                extra={"extra_fields": {"span": span.to_dict()}},
+            )
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in memory (tests and local debugging)."""
+
+    def __init__(self, max_spans: int = MEMORY_EXPORTER_MAX_SPANS):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self._spans.extend(spans)
+
+    def get_finished_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """Finished spans in completion order, optionally for one trace."""
+        if trace_id is None:
+            return list(self._spans)
+        return [span for span in self._spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to an exporter."""
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float = 0.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(self, name: str, **attributes: Any):
+        """
+        Start a span as a child of the current one.
+
+        A span without a parent starts the trace of the current request
+        (or a fresh trace outside requests).
+
+        Args:
+            name: Span name (``<component>.<operation>``)
+            **attributes: Span attributes
+
+        Returns:
+            Span context manager (a no-op span when the trace is not sampled)
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, attributes)
+        if self.sample_rate <= 0.0:
+            return NON_RECORDING_SPAN
+
+        request_id = request_id_var.get()
+        trace_id = _trace_id_for(request_id) if request_id else os.urandom(16).hex()
+        if not _is_sampled(trace_id, self.sample_rate):
+            return NON_RECORDING_SPAN
+        if request_id:
+            attributes["request_id"] = request_id
+        return Span(self, name, trace_id, None, attributes)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer (configured from TRACE_* settings)."""
+    global _tracer
+    if _tracer is None:
+        exporter = InMemorySpanExporter() if settings.trace_exporter == "memory" else LogSpanExporter()
+        _tracer = Tracer(exporter, settings.trace_sample_rate)
+    return _tracer
+
+
+def start_span(name: str, **attributes: Any):
+    """Start a span on the process-wide tracer (see ``Tracer.start_span``)."""
+    return get_tracer().start_span(name, **attributes)
+
+
+def current_span():
+    """The active span (a no-op span outside sampled traces)."""
+    return _current_span.get() or NON_RECORDING_SPAN
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator running a function (sync or async) inside a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -3,15 +3,32 @@ FastAPI application entry point.
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import logging
 
 from app.core.config import get_settings
-from app.core.logging import setup_logging
-from app.core.errors import APIError
+from app.core.logging import setup_logging, shutdown_logging, get_dropped_log_count
+from app.core.metrics import get_registry
+from app.core.errors import APIError, NotFoundError, UnauthorizedError
 from app.middlewares.request_id import RequestIDMiddleware
+from app.middlewares.rate_limit import RateLimitMiddleware
+from app.middlewares.metrics import MetricsMiddleware
+from app.middlewares.profiling import ProfilingMiddleware
+from app.services.analysis.events import get_job_event_broker
+from app.services.signed_url_cache import get_signed_url_cache
+from app.services.readiness import get_readiness_checker
 from app.api.v1.router import api_router
+from app.services.ai.model_client import close_model_clients
+from app.services.chat_memory import close_chat_memory
+from app.services.ai.image_preprocess import close_image_preprocessor
+from app.services.object_store import close_object_store
+from app.services.derivative_service import close_derivative_pool
+from app.core.redis import close_redis
+from app.repositories.db import get_db
+from app.core.security import warm_up as warm_up_security
 
 # Get settings
 settings = get_settings()
@@ -19,12 +36,32 @@ settings = get_settings()
 # Setup logging
 setup_logging(
     level="DEBUG" if settings.debug else "INFO",
-    json_logs=not settings.is_development
+    json_logs=not settings.is_development,
+    queue_size=settings.log_queue_size,
+    static_fields={"service": "octa-backend", "version": settings.api_version, "environment": settings.environment},
+    sample_rates=None if settings.is_development else settings.log_sample_rates,
+    dedup_burst=settings.log_dedup_burst,
+    dedup_period=settings.log_dedup_period_seconds
 )
 
 logger = logging.getLogger(__name__)
 
 
+async def warm_up_clients() -> None:
+    """
+    Import heavy SDKs and build shared clients in a worker thread.
+
+    Runs in the background after startup, so the server starts accepting
+    requests without waiting for it and the first database request usually
+    finds the client ready.
+    """
+    try:
+        await asyncio.to_thread(warm_up_security)
+        await asyncio.to_thread(get_db)
+    except Exception as e:
+        logger.warning(f"Client warm-up failed (clients will be created on first use): {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -35,13 +72,22 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Debug mode: {settings.debug}")
 
-    # Initialize services here if needed
-    # e.g., database connections, cache, etc.
+    # Heavy clients are built off the startup path
+    warm_up = asyncio.create_task(warm_up_clients())
 
     yield
 
+    warm_up.cancel()
+
     # Shutdown
     logger.info("Shutting down Octa Backend API")
+    await close_chat_memory()
+    await close_model_clients()
+    await close_image_preprocessor()
+    await close_object_store()
+    close_derivative_pool()
+    await close_redis()
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -55,7 +101,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add middlewares
+# Add middlewares (last added runs first: CORS, request ID, metrics, rate limiting, then profiling)
+if settings.profiling_secret:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(RequestIDMiddleware)
 
 # CORS middleware
@@ -65,7 +115,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Request-ID"]
+    expose_headers=[
+        "X-Request-ID", "X-Profile-Id", "Location", "Upload-Offset", "Upload-Length",
+        "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"
+    ]
 )
 
 
@@ -119,23 +172,67 @@ async def health_check():
 async def readiness_check():
     """
     Readiness probe - checks if the service is ready to accept requests.
+
+    Dependency probes are cached for READINESS_CACHE_SECONDS; returns 503
+    when any dependency is unreachable or too slow.
     """
-    # TODO: Add actual readiness checks (database, external services, etc.)
-    ready = True
-    checks = {
-        "database": True,  # TODO: Check Firestore connection
-        "storage": True,   # TODO: Check GCS access
-        "cache": True      # TODO: Check Redis if used
+    status = await get_readiness_checker().get_status()
+    content = {
+        "status": "ready" if status.ready else "not_ready",
+        "checks": status.checks,
+        "latency_ms": status.latency_ms,
+        "version": settings.api_version
     }
+    if status.errors:
+        content["errors"] = status.errors
+    return JSONResponse(status_code=200 if status.ready else 503, content=content)
 
-    if not all(checks.values()):
-        ready = False
 
-    return {
-        "status": "ready" if ready else "not_ready",
-        "checks": checks,
-        "version": settings.api_version
-    }
+# Metrics read from their owners at scrape time
+metrics_registry = get_registry()
+metrics_registry.register_collector(
+    "analysis_jobs_active",
+    "Unfinished analysis jobs on this instance (queue depth)",
+    lambda: [({"status": status}, count) for status, count in get_job_event_broker().count_active_jobs().items()]
+)
+metrics_registry.register_collector(
+    "signed_url_cache_hit_ratio",
+    "Signed download URL cache hit ratio since start",
+    lambda: [({}, get_signed_url_cache().stats()["hit_rate"])]
+)
+metrics_registry.register_collector(
+    "signed_url_cache_lookups_total",
+    "Signed download URL cache lookups by outcome",
+    lambda: [
+        ({"outcome": outcome}, get_signed_url_cache().stats()[outcome])
+        for outcome in ("local_hits", "redis_hits", "misses")
+    ],
+    kind="counter"
+)
+metrics_registry.register_collector(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+    lambda: [({}, get_dropped_log_count())],
+    kind="counter"
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Metrics in the Prometheus text exposition format.
+
+    Requires METRICS_TOKEN as a bearer token when set; in production the
+    endpoint is disabled until it is set.
+    """
+    if not settings.metrics_token:
+        if settings.is_production:
+            raise NotFoundError("Metrics")
+    else:
+        expected = f"Bearer {settings.metrics_token}".encode("utf-8")
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode("utf-8"), expected):
+            raise UnauthorizedError("Metrics token required")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 
 # Include API routes
@@ -0,0 +1,71 @@
+"""
+Request metrics middleware.
+"""
+import time
+from typing import Dict, Optional
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+# Not timed: scrapes and probes would drown out real traffic
+EXCLUDED_PATHS = frozenset({"/metrics", "/healthz", "/readyz"})
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template and requests
+    in flight.
+
+    Routes are labelled by template (``/v1/media/{media_id}``), never by raw
+    path, so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: Optional[Dict[object, str]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                self._route_template(scope),
+                str(status_code),
+            )
+
+    def _route_template(self, scope: Scope) -> str:
+        """Path template of the matched route (set in the scope by the router)."""
+        route = scope.get("route")
+        if isinstance(route, BaseRoute) and hasattr(route, "path"):
+            return route.path
+
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            # Older Starlette only records the endpoint; map endpoints to templates once
+            self._templates = {
+                getattr(r, "endpoint", None): r.path
+                for r in getattr(scope.get("app"), "routes", ())
+                if hasattr(r, "path")
+            }
+        return self._templates.get(endpoint, "unmatched")
@@ -0,0 +1,67 @@
+"""
+Opt-in request profiling middleware.
+
+Only installed when PROFILING_SECRET is set; requests without an
+``X-Profile`` header pass straight through.
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import get_logger, request_id_var
+from app.core.profiling import ProfileReport, RequestProfiler, get_profile_store, verify_profile_header
+
+logger = get_logger(__name__)
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests that carry a signed X-Profile header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._active = False  # One profiled request at a time (profilers hook the whole thread)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                header = value.decode("latin-1")
+                break
+        if header is None or self._active or not verify_profile_header(header, scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_var.get() or scope.get("state", {}).get("request_id", "unknown")
+        status_code = None
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = RequestProfiler()
+        self._active = True
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            content = profiler.stop()
+            self._active = False
+            duration_ms = (time.perf_counter() - start) * 1000
+            get_profile_store().add(ProfileReport(
+                request_id=request_id,
+                method=scope["method"],
+                path=scope["path"],
+                duration_ms=duration_ms,
+                status_code=status_code,
+                format=profiler.format,
+                content=content,
+            ))
+            logger.info(f"Profiled {scope['method']} {scope['path']} ({duration_ms:.0f} ms) as {request_id}")
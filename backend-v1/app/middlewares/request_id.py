@@ -2,29 +2,45 @@
 Request ID middleware for tracking requests.
 """
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.logging import request_id_var
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Middleware to add request ID to all requests."""
+class RequestIDMiddleware:
+    """
+    Middleware to add request ID to all requests.
 
-    async def dispatch(self, request: Request, call_next):
-        """Process request and add request ID."""
-        # Generate or get request ID
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+    Pure ASGI (no BaseHTTPMiddleware task and stream wrapping), so streamed
+    responses keep their backpressure.
+    """
 
-        # Set request ID in context
-        request_id_var.set(request_id)
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Add to request state
-        request.state.request_id = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request and add request ID."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Process request
-        response = await call_next(request)
+        # Generate or get request ID
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id:
+            request_id = str(uuid.uuid4())
+
+        # Set request ID in context (each request runs in its own task) and request state
+        request_id_var.set(request_id)
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (b"x-request-id", request_id.encode("latin-1"))
 
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
+        async def send_with_request_id(message: Message) -> None:
+            # Add request ID to response headers
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
 
-        return response
\ No newline at end of file
+        await self.app(scope, receive, send_with_request_id)
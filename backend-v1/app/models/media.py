@@ -0,0 +1,59 @@
+"""
+Media upload models.
+"""
+from typing import Optional, List, Dict
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel, Field
+
+# Largest batch accepted by the batch media endpoints
+MAX_BATCH_SIZE = 20
+
+
+class MediaStatus(str, Enum):
+    """Media upload status."""
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class MediaMetadata(BaseModel):
+    """Stored media metadata."""
+    media_id: str
+    user_id: str
+    file_name: Optional[str] = None
+    file_type: str
+    file_size: int
+    gcs_path: str
+    status: MediaStatus = MediaStatus.PENDING
+    hashes: Optional[Dict[str, str]] = None  # Perceptual hashes (hex), see ImageHashes.to_dict
+    duplicate_of: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
+class MediaSet(BaseModel):
+    """Stored media set (e.g. the 8 lookaround directions, in order)."""
+    set_id: str
+    user_id: str
+    media_ids: List[str]
+    set_type: str
+    created_at: datetime
+
+
+class MediaUploadSpec(BaseModel):
+    """One file to be uploaded."""
+    file_type: str
+    file_size: int = Field(..., gt=0)
+    file_name: Optional[str] = None
+
+
+class BatchInitUploadRequest(BaseModel):
+    """Batch upload initialization request."""
+    files: List[MediaUploadSpec] = Field(..., min_items=1, max_items=MAX_BATCH_SIZE)
+
+
+class BatchCommitUploadRequest(BaseModel):
+    """Batch upload commit request (optionally creating a media set)."""
+    media_ids: List[str] = Field(..., min_items=1, max_items=MAX_BATCH_SIZE)
+    set_type: Optional[str] = None  # e.g. "lookaround8": create a set from the committed media
@@ -1,7 +1,11 @@
 """
 Prompt management system for Feng Shui analysis.
 """
-from .base import PromptTemplate, PromptManager
+from .base import CacheablePromptTemplate, PromptParts, PromptTemplate, PromptManager
+from .tokens import estimate_tokens
 from .workspace_prompts import WorkspaceAnalysisPrompts
 
-__all__ = ["PromptTemplate", "PromptManager", "WorkspaceAnalysisPrompts"]
\ No newline at end of file
+__all__ = [
+    "CacheablePromptTemplate", "PromptParts", "PromptTemplate", "PromptManager",
+    "WorkspaceAnalysisPrompts", "estimate_tokens",
+]
\ No newline at end of file
@@ -1,16 +1,53 @@
 """
 Base classes for prompt management.
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Mapping, Optional, List, Tuple
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from string import Template
+from types import MappingProxyType
+import hashlib
 import json
 from pathlib import Path
 
 
+def _compile(template: str) -> Tuple[List[str], Tuple[Tuple[int, str], ...]]:
+    """
+    Split a ``string.Template`` into literal and slot segments.
+
+    Returns:
+        (parts, slots): ``parts`` holds literals and, at each slot index,
+        the raw placeholder (kept when a variable is not supplied, like
+        ``safe_substitute``); ``slots`` maps part index -> variable name
+    """
+    parts: List[str] = []
+    slots: List[Tuple[int, str]] = []
+    literal: List[str] = []
+    position = 0
+    for match in Template.pattern.finditer(template):
+        literal.append(template[position:match.start()])
+        position = match.end()
+        name = match.group("named") or match.group("braced")
+        if name is None:
+            # "$$" escape, or an invalid "$" that safe_substitute leaves alone
+            literal.append("$" if match.group("escaped") is not None else match.group())
+            continue
+        parts.append("".join(literal))
+        literal = []
+        slots.append((len(parts), name))
+        parts.append(match.group())
+    literal.append(template[position:])
+    parts.append("".join(literal))
+    return parts, tuple(slots)
+
+
 class PromptTemplate:
     """
     A template for generating prompts with variable substitution.
+
+    The template is split into literal and slot segments once, so ``format``
+    is a fill-and-join; ``version`` is a content hash of the template text,
+    usable as a cache key for anything derived from the prompt.
     """
 
     def __init__(self, template: str, variables: Optional[List[str]] = None):
@@ -23,7 +60,9 @@ class PromptTemplate:
         """
         self.template = template
         self.variables = variables or []
-        self._template_obj = Template(template)
+        self.version = hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+        self._required = frozenset(self.variables)
+        self._parts, self._slots = _compile(template)
 
     def format(self, **kwargs) -> str:
         """
@@ -36,12 +75,20 @@ class PromptTemplate:
             Formatted prompt string
         """
         # Check required variables
-        missing = [v for v in self.variables if v not in kwargs]
-        if missing:
+        if not self._required.issubset(kwargs):
+            missing = [v for v in self.variables if v not in kwargs]
             raise ValueError(f"Missing required variables: {missing}")
 
         # Safe substitute (keeps undefined variables as-is)
-        return self._template_obj.safe_substitute(**kwargs)
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            if name in kwargs:
+                parts[index] = str(kwargs[name])
+        return "".join(parts)
+
+    def format_parts(self, **kwargs) -> "PromptParts":
+        """Format as PromptParts (a plain template has no cacheable prefix)."""
+        return PromptParts(prefix="", suffix=self.format(**kwargs), prefix_id="", version=self.version)
 
     def get_system_prompt(self) -> str:
         """Get the base system prompt without variables."""
@@ -61,6 +108,87 @@ class PromptTemplate:
             return cls(content, variables)
 
 
+@dataclass(frozen=True)
+class PromptParts:
+    """A prompt split into a static, cacheable prefix and a per-request suffix."""
+    prefix: str
+    suffix: str
+    prefix_id: str  # Content hash of the prefix (stable while the prefix text is unchanged)
+    version: str = ""  # Version of the template the prompt was formatted from
+    estimated_tokens: int = 0  # Set by callers that enforce a token budget
+    compaction: str = "none"  # Compaction applied to fit the budget ("none", "compact")
+
+    @property
+    def text(self) -> str:
+        """The whole prompt."""
+        return self.prefix + self.suffix
+
+
+class CacheablePromptTemplate(PromptTemplate):
+    """
+    Prompt template with a static prefix and a templated suffix.
+
+    The prefix (persona, guidance, output schema) is identical across
+    requests, so sent first - as the system instruction - it can be served
+    from the model provider's prompt cache; only the short suffix carries
+    request data. ``format`` still returns the whole prompt.
+    """
+
+    def __init__(self, prefix: str, suffix: str, variables: Optional[List[str]] = None):
+        """
+        Initialize a cacheable prompt template.
+
+        Args:
+            prefix: Static prompt text (must not contain placeholders)
+            suffix: Template string with ${variable} placeholders
+            variables: List of required variables
+
+        Raises:
+            ValueError: If the prefix contains a placeholder
+        """
+        prefix_parts, prefix_slots = _compile(prefix)
+        if prefix_slots:
+            names = [name for _, name in prefix_slots]
+            raise ValueError(f"Prompt prefix must be static, found variables: {names}")
+        super().__init__(prefix + suffix, variables)
+        self.prefix = "".join(prefix_parts)
+        self.prefix_id = hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()[:16]
+        self._suffix = PromptTemplate(suffix, variables)
+
+    def format_parts(self, **kwargs) -> PromptParts:
+        """
+        Format the suffix, keeping the static prefix separate.
+
+        Args:
+            **kwargs: Variables to substitute
+
+        Returns:
+            PromptParts with the cacheable prefix and the formatted suffix
+        """
+        return PromptParts(
+            prefix=self.prefix,
+            suffix=self._suffix.format(**kwargs),
+            prefix_id=self.prefix_id,
+            version=self.version,
+        )
+
+
+PromptRegistry = Mapping[str, Mapping[str, PromptTemplate]]
+
+
+def freeze_prompts(prompts: Dict[str, Dict[str, PromptTemplate]]) -> PromptRegistry:
+    """
+    Make a language -> name -> template mapping read-only.
+
+    Registries are compiled once at import and shared by every manager
+    instance.
+    """
+    return MappingProxyType({
+        language: MappingProxyType(dict(templates))
+        for language, templates in prompts.items()
+    })
+
+
 class PromptManager(ABC):
     """
     Abstract base class for managing prompts for a specific feature.
@@ -120,7 +248,7 @@ class MultiLanguagePromptManager(PromptManager):
             default_language: Default language code
         """
         self.default_language = default_language
-        self.language_prompts: Dict[str, Dict[str, PromptTemplate]] = {}
+        self.language_prompts: Dict[str, Mapping[str, PromptTemplate]] = {}
         super().__init__(default_language)
 
     def _load_prompts(self):
@@ -140,6 +268,19 @@ class MultiLanguagePromptManager(PromptManager):
         Returns:
             Formatted prompt string
         """
+        return self.get_template(name, language).format(**variables)
+
+    def get_template(self, name: str, language: Optional[str] = None) -> PromptTemplate:
+        """
+        Get a compiled prompt template by name and language.
+
+        Args:
+            name: Prompt name
+            language: Language code (optional, uses default if not provided)
+
+        Returns:
+            PromptTemplate (its ``version`` identifies the prompt text)
+        """
         lang = language or self.default_language
 
         if lang not in self.language_prompts:
@@ -149,11 +290,9 @@ class MultiLanguagePromptManager(PromptManager):
         if lang not in self.language_prompts or name not in self.language_prompts[lang]:
             raise ValueError(f"Prompt '{name}' not found for language '{lang}'")
 
-        return self.language_prompts[lang][name].format(**variables)
+        return self.language_prompts[lang][name]
 
     def add_prompt(self, name: str, template: PromptTemplate, language: Optional[str] = None):
-        """Add a prompt template for a specific language."""
+        """Add a prompt template for a specific language (shared registries are not modified)."""
         lang = language or self.default_language
-        if lang not in self.language_prompts:
-            self.language_prompts[lang] = {}
-        self.language_prompts[lang][name] = template
\ No newline at end of file
+        self.language_prompts[lang] = {**self.language_prompts.get(lang, {}), name: template}
\ No newline at end of file
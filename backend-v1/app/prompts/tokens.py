@@ -0,0 +1,39 @@
+"""
+Prompt token estimation.
+
+A local approximation of model tokenizers, good enough to enforce prompt
+budgets without a network round trip: CJK characters are about one token
+each, other text about four characters per token. Estimates err on the
+high side for Chinese, which keeps budgets conservative.
+"""
+import re
+from functools import lru_cache
+
+# CJK ideographs, kana, hangul and full-width punctuation: ~1 token per character
+_WIDE_CHARS = re.compile(r"[⺀-鿿가-힯豈-﫿＀-￯　-〿]")
+
+# Other text (Latin, digits, JSON punctuation, whitespace)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens a model will count for ``text``.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    narrow = len(text) - wide
+    return wide + -(-narrow // CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=256)
+def estimate_static_tokens(text: str) -> int:
+    """Token estimate for static prompt text (prefixes), computed once per text."""
+    return estimate_tokens(text)
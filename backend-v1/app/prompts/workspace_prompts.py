@@ -1,26 +1,34 @@
 """
 Prompts for workspace Feng Shui analysis.
 """
-from typing import Dict, Any
-from .base import MultiLanguagePromptManager, PromptTemplate
+from dataclasses import replace
+from typing import Dict, Any, Optional
+from .base import (
+    CacheablePromptTemplate,
+    MultiLanguagePromptManager,
+    PromptParts,
+    PromptRegistry,
+    PromptTemplate,
+    freeze_prompts,
+)
 from .structured_workspace_prompts import (
     build_structured_workspace_prompts,
     normalize_day_master_element,
 )
+from .tokens import estimate_static_tokens, estimate_tokens
 
+# One-character element names for the compact Chinese prompts
+ELEMENT_ABBREVIATIONS = {"wood": "木", "fire": "火", "earth": "土", "metal": "金", "water": "水"}
 
-class WorkspaceAnalysisPrompts(MultiLanguagePromptManager):
-    """
-    Manages prompts for workspace Feng Shui analysis.
-    """
 
-    def _load_prompts(self):
-        """Load all workspace analysis prompts."""
+def _build_workspace_prompts() -> PromptRegistry:
+    """Compile the workspace analysis prompts (once, at import)."""
+    prompts: Dict[str, Dict[str, PromptTemplate]] = {}
 
-        # Chinese prompts
-        self.language_prompts["zh"] = {
-            "system": PromptTemplate(
-                template="""你是一位专业的风水大师，精通传统风水学和现代空间设计。
+    # Chinese prompts
+    prompts["zh"] = {
+        "system": PromptTemplate(
+            template="""你是一位专业的风水大师，精通传统风水学和现代空间设计。
 你的任务是分析用户的工位照片，并结合其八字信息提供个性化的风水建议。
 
 分析原则：
@@ -33,18 +41,11 @@ class WorkspaceAnalysisPrompts(MultiLanguagePromptManager):
 ${bazi_info}
 
 请以JSON格式返回分析结果。""",
-                variables=["bazi_info"]
-            ),
-
-            "analysis": PromptTemplate(
-                template="""请分析这张工位照片的风水情况。
+            variables=["bazi_info"]
+        ),
 
-用户信息：
-- 八字：${year_pillar} ${month_pillar} ${day_pillar} ${hour_pillar}
-- 日主：${day_master}
-- 五行分布：木${wood}% 火${fire}% 土${earth}% 金${metal}% 水${water}%
-- 喜用神：${lucky_elements}
-- 忌神：${unlucky_elements}
+        "analysis": CacheablePromptTemplate(
+            prefix="""请分析这张工位照片的风水情况，并结合文末的用户八字信息给出建议。
 
 分析要点：
 1. 办公桌位置评估
@@ -97,13 +98,33 @@ ${bazi_info}
     ],
     "summary": "总体评价（100字以内）"
 }""",
-                variables=["year_pillar", "month_pillar", "day_pillar", "hour_pillar",
-                          "day_master", "wood", "fire", "earth", "metal", "water",
-                          "lucky_elements", "unlucky_elements"]
-            ),
+            suffix="""
+
+---
+用户信息：
+- 八字：${year_pillar} ${month_pillar} ${day_pillar} ${hour_pillar}
+- 日主：${day_master}
+- 五行分布：木${wood}% 火${fire}% 土${earth}% 金${metal}% 水${water}%
+- 喜用神：${lucky_elements}
+- 忌神：${unlucky_elements}
 
-            "quick_analysis": PromptTemplate(
-                template="""快速分析工位风水。
+请按上述JSON格式返回分析结果。""",
+            variables=["year_pillar", "month_pillar", "day_pillar", "hour_pillar",
+                      "day_master", "wood", "fire", "earth", "metal", "water",
+                      "lucky_elements", "unlucky_elements"]
+        ),
+
+        # Used when "analysis" exceeds the prompt token budget
+        "analysis_compact": CacheablePromptTemplate(
+            prefix="""分析这张工位照片的风水（办公桌位置、五行平衡、能量流动），结合文末用户八字给出可执行的改善建议。返回JSON：
+{"overall_score":0-100,"desk_position":{"score":0-100,"description":"","issues":[]},"element_balance":{"current_elements":{"wood":%,"fire":%,"earth":%,"metal":%,"water":%},"compatibility_score":0-100,"missing_elements":[],"excess_elements":[]},"energy_flow":{"score":0-100,"positive_aspects":[],"negative_aspects":[]},"recommendations":[{"category":"placement/color/decoration/direction","priority":"high/medium/low","title":"","description":"","expected_benefit":""}],"summary":"100字以内"}""",
+            suffix="""
+用户：八字${pillars}；日主${day_master}；五行${elements}；喜${lucky_elements}；忌${unlucky_elements}""",
+            variables=["pillars", "day_master", "elements", "lucky_elements", "unlucky_elements"]
+        ),
+
+        "quick_analysis": PromptTemplate(
+            template="""快速分析工位风水。
 
 用户喜用神：${lucky_elements}
 用户忌神：${unlucky_elements}
@@ -118,14 +139,14 @@ ${bazi_info}
         }
     ]
 }""",
-                variables=["lucky_elements", "unlucky_elements"]
-            )
-        }
+            variables=["lucky_elements", "unlucky_elements"]
+        )
+    }
 
-        # English prompts
-        self.language_prompts["en"] = {
-            "system": PromptTemplate(
-                template="""You are a professional Feng Shui master, skilled in both traditional Feng Shui and modern space design.
+    # English prompts
+    prompts["en"] = {
+        "system": PromptTemplate(
+            template="""You are a professional Feng Shui master, skilled in both traditional Feng Shui and modern space design.
 Your task is to analyze the user's workspace photo and provide personalized Feng Shui advice based on their Bazi information.
 
 Analysis principles:
@@ -138,18 +159,11 @@ User's Bazi information:
 ${bazi_info}
 
 Please return the analysis in JSON format.""",
-                variables=["bazi_info"]
-            ),
-
-            "analysis": PromptTemplate(
-                template="""Please analyze the Feng Shui of this workspace photo.
+            variables=["bazi_info"]
+        ),
 
-User Information:
-- Bazi: ${year_pillar} ${month_pillar} ${day_pillar} ${hour_pillar}
-- Day Master: ${day_master}
-- Five Elements: Wood ${wood}% Fire ${fire}% Earth ${earth}% Metal ${metal}% Water ${water}%
-- Lucky Elements: ${lucky_elements}
-- Unlucky Elements: ${unlucky_elements}
+        "analysis": CacheablePromptTemplate(
+            prefix="""Please analyze the Feng Shui of this workspace photo, tailoring the advice to the user's Bazi information given at the end.
 
 Analysis Points:
 1. Desk Position Assessment
@@ -202,14 +216,50 @@ Return in JSON format:
     ],
     "summary": "Overall evaluation (within 100 words)"
 }""",
-                variables=["year_pillar", "month_pillar", "day_pillar", "hour_pillar",
-                          "day_master", "wood", "fire", "earth", "metal", "water",
-                          "lucky_elements", "unlucky_elements"]
-            )
-        }
+            suffix="""
+
+---
+User Information:
+- Bazi: ${year_pillar} ${month_pillar} ${day_pillar} ${hour_pillar}
+- Day Master: ${day_master}
+- Five Elements: Wood ${wood}% Fire ${fire}% Earth ${earth}% Metal ${metal}% Water ${water}%
+- Lucky Elements: ${lucky_elements}
+- Unlucky Elements: ${unlucky_elements}
+
+Return the analysis in the JSON format above.""",
+            variables=["year_pillar", "month_pillar", "day_pillar", "hour_pillar",
+                      "day_master", "wood", "fire", "earth", "metal", "water",
+                      "lucky_elements", "unlucky_elements"]
+        ),
+
+        # Used when "analysis" exceeds the prompt token budget
+        "analysis_compact": CacheablePromptTemplate(
+            prefix="""Analyze the Feng Shui of this workspace photo (desk position, five-element balance, energy flow) and give actionable advice for the user's Bazi at the end. Return JSON:
+{"overall_score":0-100,"desk_position":{"score":0-100,"description":"","issues":[]},"element_balance":{"current_elements":{"wood":%,"fire":%,"earth":%,"metal":%,"water":%},"compatibility_score":0-100,"missing_elements":[],"excess_elements":[]},"energy_flow":{"score":0-100,"positive_aspects":[],"negative_aspects":[]},"recommendations":[{"category":"placement/color/decoration/direction","priority":"high/medium/low","title":"","description":"","expected_benefit":""}],"summary":"within 100 words"}""",
+            suffix="""
+User: Bazi ${pillars}; day master ${day_master}; elements ${elements}; lucky ${lucky_elements}; unlucky ${unlucky_elements}""",
+            variables=["pillars", "day_master", "elements", "lucky_elements", "unlucky_elements"]
+        )
+    }
 
-        # Build structured prompts by day master element (Chinese only for now)
-        self.element_prompts = build_structured_workspace_prompts()
+    return freeze_prompts(prompts)
+
+
+WORKSPACE_PROMPTS = _build_workspace_prompts()
+
+# Structured prompts by day master element (Chinese only for now)
+STRUCTURED_WORKSPACE_PROMPTS = build_structured_workspace_prompts()
+
+
+class WorkspaceAnalysisPrompts(MultiLanguagePromptManager):
+    """
+    Manages prompts for workspace Feng Shui analysis.
+    """
+
+    def _load_prompts(self):
+        """Use the shared compiled workspace analysis prompts."""
+        self.language_prompts.update(WORKSPACE_PROMPTS)
+        self.element_prompts = STRUCTURED_WORKSPACE_PROMPTS
 
     def get_workspace_analysis_prompt(
         self,
@@ -228,8 +278,52 @@ Return in JSON format:
         Returns:
             Formatted prompt string
         """
-        # Prepare variables from Bazi data
-        variables = {
+        return self.get_workspace_analysis_parts(bazi_data, language, analysis_type).text
+
+    def get_workspace_analysis_parts(
+        self,
+        bazi_data: Dict[str, Any],
+        language: str = "zh",
+        analysis_type: str = "full",
+        token_budget: Optional[int] = None
+    ) -> PromptParts:
+        """
+        Get workspace analysis prompt split for prefix caching.
+
+        Send ``prefix`` as the system instruction and ``suffix`` (the user's
+        Bazi data) as the user turn, so the prefix is shared by every request.
+
+        With a ``token_budget``, a full analysis prompt over the budget is
+        replaced by the compact variant (no guidance section, abbreviated
+        Bazi encoding). The compact prompt is returned even if it is still
+        over the budget; check ``estimated_tokens``.
+
+        Args:
+            bazi_data: User's Bazi information
+            language: Language code
+            analysis_type: Type of analysis (full, quick)
+            token_budget: Maximum estimated prompt tokens (None for no limit)
+
+        Returns:
+            PromptParts with the static prefix, its ID, the dynamic suffix
+            and the estimated token count
+        """
+        template = self.get_workspace_analysis_template(language, analysis_type)
+        parts = template.format_parts(**self._bazi_variables(bazi_data))
+        tokens = estimate_static_tokens(parts.prefix) + estimate_tokens(parts.suffix)
+        if token_budget is None or tokens <= token_budget or analysis_type == "quick":
+            return replace(parts, estimated_tokens=tokens)
+
+        compact = self.get_template("analysis_compact", language).format_parts(
+            **self._compact_bazi_variables(bazi_data, language)
+        )
+        tokens = estimate_static_tokens(compact.prefix) + estimate_tokens(compact.suffix)
+        return replace(compact, estimated_tokens=tokens, compaction="compact")
+
+    @staticmethod
+    def _bazi_variables(bazi_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Template variables for the full analysis prompts."""
+        return {
             "year_pillar": f"{bazi_data.get('year_gan', '')}{bazi_data.get('year_zhi', '')}",
             "month_pillar": f"{bazi_data.get('month_gan', '')}{bazi_data.get('month_zhi', '')}",
             "day_pillar": f"{bazi_data.get('day_gan', '')}{bazi_data.get('day_zhi', '')}",
@@ -244,13 +338,54 @@ Return in JSON format:
             "unlucky_elements": ', '.join(bazi_data.get('unlucky_elements', []))
         }
 
-        # Select prompt based on analysis type
-        if analysis_type == "quick":
-            prompt_name = "quick_analysis"
+    @staticmethod
+    def _compact_bazi_variables(bazi_data: Dict[str, Any], language: str) -> Dict[str, Any]:
+        """
+        Template variables for the compact analysis prompts.
+
+        Pillars are joined without the unknown hour, element shares drop
+        zeros and, in Chinese, element names shrink to one character
+        (``木30火10`` instead of ``木30% 火10% 土0% ...``).
+        """
+        if language == "zh":
+            def name(element: str) -> str:
+                return ELEMENT_ABBREVIATIONS.get(element.lower(), element)
+            separator = ""
         else:
-            prompt_name = "analysis"
+            def name(element: str) -> str:
+                return element
+            separator = ","
+
+        pillars = [
+            f"{bazi_data.get(f'{pillar}_gan', '')}{bazi_data.get(f'{pillar}_zhi', '')}"
+            for pillar in ("year", "month", "day", "hour")
+        ]
+        elements = bazi_data.get('elements', {})
+        return {
+            "pillars": " ".join(pillar for pillar in pillars if pillar),
+            "day_master": bazi_data.get('day_master', ''),
+            "elements": separator.join(
+                f"{name(element)}{elements[element]}"
+                for element in ELEMENT_ABBREVIATIONS if elements.get(element)
+            ),
+            "lucky_elements": separator.join(name(e) for e in bazi_data.get('lucky_elements', [])),
+            "unlucky_elements": separator.join(name(e) for e in bazi_data.get('unlucky_elements', [])),
+        }
+
+    def get_workspace_analysis_template(self, language: str = "zh", analysis_type: str = "full") -> PromptTemplate:
+        """
+        Get the compiled template behind ``get_workspace_analysis_prompt``.
 
-        return self.get_prompt(prompt_name, language=language, **variables)
+        Args:
+            language: Language code
+            analysis_type: Type of analysis (full, quick)
+
+        Returns:
+            PromptTemplate (``version`` identifies the prompt text)
+        """
+        # Select prompt based on analysis type
+        prompt_name = "quick_analysis" if analysis_type == "quick" else "analysis"
+        return self.get_template(prompt_name, language)
 
     def get_system_prompt(self, language: str = "zh") -> str:
         """Get the system prompt for workspace analysis."""
@@ -282,6 +417,6 @@ Return in JSON format:
         return self.element_prompts[normalized].format(
             day_master_element=day_master_element,
             desk_orientation=desk_orientation,
-            workspace_photo=workspace_photo,
+            workspace_image=workspace_photo,
             user_gender=user_gender,
         )
@@ -0,0 +1,27 @@
+"""
+Shared Firestore client.
+
+``google.cloud.firestore`` (gRPC and protobuf) is the heaviest import in
+the app, so it is imported when the client is first needed rather than at
+application import; one client is then shared by all repositories.
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    from google.cloud import firestore
+
+settings = get_settings()
+
+
+@lru_cache()
+def get_db() -> "firestore.Client":
+    """Shared Firestore client (created once per process)."""
+    from google.cloud import firestore
+
+    return firestore.Client(
+        project=settings.google_cloud_project,
+        database=settings.firestore_database,
+    )
@@ -0,0 +1,206 @@
+"""
+Media repository for data access.
+
+Media documents live under their owner (``users/{uid}/media/{media_id}``),
+so ownership is part of the document path: a batched ``get_all`` over a
+user's media references validates existence, ownership and status of a
+whole set in one round trip.
+
+The Firestore client is synchronous, so every call that goes over the
+network runs in a worker thread to keep the event loop free.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from app.models.media import MediaMetadata, MediaSet, MediaStatus
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.tracing import traced
+from app.repositories.db import get_db
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+
+class MediaRepository:
+    """Repository for media metadata and media sets."""
+
+    def __init__(self):
+        """Initialize Firestore client."""
+        self.db = get_db()
+        self.users = self.db.collection("users")
+
+    def _media(self, user_id: str):
+        """Per-user media collection."""
+        return self.users.document(user_id).collection("media")
+
+    def _sets(self, user_id: str):
+        """Per-user media set collection."""
+        return self.users.document(user_id).collection("media_sets")
+
+    @traced()
+    async def create_media_batch(self, media: List[Dict[str, Any]]) -> None:
+        """
+        Create media documents in one batched write.
+
+        Args:
+            media: Media metadata dicts (must include media_id and user_id)
+        """
+        batch = self.db.batch()
+        for data in media:
+            batch.set(self._media(data["user_id"]).document(data["media_id"]), data)
+        await asyncio.to_thread(batch.commit)
+        logger.info(f"Created {len(media)} media document(s)")
+
+    @traced()
+    async def create_media(self, data: Dict[str, Any]) -> None:
+        """
+        Create a media document.
+
+        Args:
+            data: Media metadata (must include media_id and user_id)
+        """
+        await self.create_media_batch([data])
+
+    @traced()
+    async def get_media(self, user_id: str, media_id: str) -> Optional[MediaMetadata]:
+        """
+        Get a user's media.
+
+        Args:
+            user_id: Owner user ID
+            media_id: Media ID
+
+        Returns:
+            MediaMetadata or None if not found (or owned by someone else)
+        """
+        doc = await asyncio.to_thread(self._media(user_id).document(media_id).get)
+        if not doc.exists:
+            return None
+        return MediaMetadata(**doc.to_dict())
+
+    @traced()
+    async def get_all(self, user_id: str, media_ids: List[str]) -> Dict[str, MediaMetadata]:
+        """
+        Get several of a user's media in one round trip.
+
+        Args:
+            user_id: Owner user ID
+            media_ids: Media IDs
+
+        Returns:
+            Media ID -> MediaMetadata for the media that exist
+        """
+        if not media_ids:
+            return {}
+        refs = [self._media(user_id).document(media_id) for media_id in dict.fromkeys(media_ids)]
+        docs = await asyncio.to_thread(lambda: list(self.db.get_all(refs)))
+        return {
+            doc.id: MediaMetadata(**doc.to_dict())
+            for doc in docs
+            if doc.exists
+        }
+
+    @traced()
+    async def check_set_membership(
+        self,
+        user_id: str,
+        media_ids: List[str],
+        status: MediaStatus = MediaStatus.READY,
+    ) -> Dict[str, Any]:
+        """
+        Validate that media can form a set, in one round trip.
+
+        Args:
+            user_id: Owner user ID
+            media_ids: Media IDs
+            status: Required media status
+
+        Returns:
+            Dict with ``media`` (found documents), ``missing`` (unknown or not
+            owned) and ``not_ready`` (wrong status) media IDs
+        """
+        media = await self.get_all(user_id, media_ids)
+        return {
+            "media": media,
+            "missing": [media_id for media_id in media_ids if media_id not in media],
+            "not_ready": [
+                media_id for media_id in media_ids
+                if media_id in media and media[media_id].status != status
+            ],
+        }
+
+    @traced()
+    async def update_media(self, user_id: str, media_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Update media fields.
+
+        Args:
+            user_id: Owner user ID
+            media_id: Media ID
+            fields: Fields to update
+        """
+        await asyncio.to_thread(
+            self._media(user_id).document(media_id).update,
+            {**fields, "updated_at": datetime.utcnow()},
+        )
+
+    @traced()
+    async def delete_media(self, user_id: str, media_id: str) -> None:
+        """Delete a media document."""
+        await asyncio.to_thread(self._media(user_id).document(media_id).delete)
+        logger.info(f"Deleted media document: {media_id}")
+
+    @traced()
+    async def list_media_hashes(self, user_id: str) -> Dict[str, Dict[str, str]]:
+        """
+        Get perceptual hashes of a user's ready media (to rebuild the hash index).
+
+        Uses the (status, created_at) composite index on the media collection.
+
+        Args:
+            user_id: Owner user ID
+
+        Returns:
+            Media ID -> stored hashes
+        """
+        query = (
+            self._media(user_id)
+            .where("status", "==", MediaStatus.READY.value)
+            .order_by("created_at", direction="DESCENDING")
+            .select(["hashes"])
+        )
+        hashes = {}
+        for doc in await asyncio.to_thread(lambda: list(query.stream())):
+            data = doc.to_dict()
+            if data.get("hashes"):
+                hashes[doc.id] = data["hashes"]
+        return hashes
+
+    @traced()
+    async def create_media_set(self, data: Dict[str, Any]) -> None:
+        """
+        Create a media set document.
+
+        Args:
+            data: Media set dict (must include set_id and user_id)
+        """
+        await asyncio.to_thread(self._sets(data["user_id"]).document(data["set_id"]).set, data)
+        logger.info(f"Created media set: {data['set_id']}")
+
+    @traced()
+    async def get_media_set(self, user_id: str, set_id: str) -> Optional[MediaSet]:
+        """
+        Get a user's media set.
+
+        Args:
+            user_id: Owner user ID
+            set_id: Media set ID
+
+        Returns:
+            MediaSet or None if not found
+        """
+        doc = await asyncio.to_thread(self._sets(user_id).document(set_id).get)
+        if not doc.exists:
+            return None
+        return MediaSet(**doc.to_dict())
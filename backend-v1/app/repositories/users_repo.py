@@ -3,11 +3,12 @@ Users repository for data access.
 """
 from typing import Optional, List
 from datetime import datetime
-from google.cloud import firestore
 from app.models.users import UserProfile
 from app.utils.ids import generate_prefixed_id
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.tracing import traced
+from app.repositories.db import get_db
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -18,12 +19,10 @@ class UsersRepository:
 
     def __init__(self):
         """Initialize Firestore client."""
-        self.db = firestore.Client(
-            project=settings.google_cloud_project,
-            database=settings.firestore_database,
-        )
+        self.db = get_db()
         self.collection = self.db.collection("users")
 
+    @traced()
     async def create_user(
         self,
         email: str,
@@ -71,6 +70,7 @@ class UsersRepository:
         user_data.pop("hashed_password")
         return UserProfile(**user_data)
 
+    @traced()
     async def get_user_by_id(self, user_id: str) -> Optional[UserProfile]:
         """
         Get user by ID.
@@ -89,6 +89,7 @@ class UsersRepository:
         data.pop("hashed_password", None)  # Remove password
         return UserProfile(**data)
 
+    @traced()
     async def get_user_by_email(self, email: str) -> Optional[dict]:
         """
         Get user by email (includes hashed password for auth).
@@ -107,6 +108,7 @@ class UsersRepository:
 
         return None
 
+    @traced()
     async def update_user(
         self,
         user_id: str,
@@ -160,6 +162,7 @@ class UsersRepository:
         logger.info(f"Updated user: {user_id}")
         return await self.get_user_by_id(user_id)
 
+    @traced()
     async def delete_user(self, user_id: str) -> bool:
         """
         Soft delete user (mark as inactive).
@@ -181,6 +184,7 @@ class UsersRepository:
             logger.error(f"Failed to delete user {user_id}: {e}")
             return False
 
+    @traced()
     async def verify_user_email(self, user_id: str) -> bool:
         """
         Mark user email as verified.
@@ -202,6 +206,7 @@ class UsersRepository:
             logger.error(f"Failed to verify user {user_id}: {e}")
             return False
 
+    @traced()
     async def check_email_exists(self, email: str) -> bool:
         """
         Check if email already exists.
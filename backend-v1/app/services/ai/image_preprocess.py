@@ -0,0 +1,219 @@
+"""
+Image preprocessing stage for vision model calls.
+
+Uploaded photos (up to ``max_image_size_mb``) are fetched once, downscaled to
+the model's working resolution and re-encoded in a process pool, then sent
+inline. This cuts upload bytes, image tokens and model latency, and strips
+EXIF metadata (GPS etc.) before anything leaves our infrastructure.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.services.ai.model_client import ImagePart
+from app.utils.images import NormalizedImage, normalize_image
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Timeout for fetching the original image from storage (seconds)
+FETCH_TIMEOUT_SECONDS = 30.0
+
+
+class ImagePreprocessor:
+    """
+    Fetches images and normalizes them in a pool of worker processes.
+
+    Decoding and resampling are CPU bound and hold the GIL, so they run in
+    separate processes to keep the event loop responsive.
+    """
+
+    def __init__(
+        self,
+        max_side: int,
+        target_bytes: int,
+        output_format: str = "WEBP",
+        workers: int = 2,
+        max_fetch_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize preprocessor.
+
+        Args:
+            max_side: Longest output side in pixels
+            target_bytes: Output size budget per image
+            output_format: "WEBP" or "JPEG"
+            workers: Worker process count
+            max_fetch_bytes: Reject originals larger than this
+        """
+        self.max_side = max_side
+        self.target_bytes = target_bytes
+        self.output_format = output_format
+        self.workers = workers
+        self.max_fetch_bytes = max_fetch_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use."""
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Pooled client for storage downloads (separate from the model client)."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(FETCH_TIMEOUT_SECONDS, connect=10.0),
+                follow_redirects=True,
+            )
+        return self._http
+
+    async def preprocess(self, data: bytes) -> NormalizedImage:
+        """
+        Normalize encoded image bytes in the worker pool.
+
+        Args:
+            data: Original image bytes
+
+        Returns:
+            NormalizedImage
+
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        loop = asyncio.get_running_loop()
+        job = partial(
+            normalize_image,
+            data,
+            max_side=self.max_side,
+            target_bytes=self.target_bytes,
+            output_format=self.output_format,
+        )
+        return await loop.run_in_executor(self._get_executor(), job)
+
+    async def fetch(self, url: str) -> bytes:
+        """
+        Download an image, enforcing the upload size limit.
+
+        Args:
+            url: Image URL (signed storage URL)
+
+        Returns:
+            Image bytes
+
+        Raises:
+            ValueError: If the image exceeds the size limit
+            httpx.HTTPError: If the download fails
+        """
+        async with self._get_http().stream("GET", url) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if self.max_fetch_bytes and size > self.max_fetch_bytes:
+                    raise ValueError(f"Image exceeds {self.max_fetch_bytes} bytes")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def load_image_part(self, url: str) -> ImagePart:
+        """
+        Fetch and normalize an image into an inline model input.
+
+        Args:
+            url: Image URL
+
+        Returns:
+            Inline ImagePart
+
+        Raises:
+            ValueError: If the image is too large or cannot be decoded
+            httpx.HTTPError: If the download fails
+        """
+        start = time.perf_counter()
+        original = await self.fetch(url)
+        image = await self.preprocess(original)
+        logger.info(
+            f"Image preprocessed: {image.original_size} -> {len(image.data)} bytes, "
+            f"{image.width}x{image.height} q{image.quality} in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return ImagePart(mime_type=image.mime_type, data=image.data)
+
+    async def aclose(self) -> None:
+        """Shut down the worker pool and download client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def get_image_preprocessor() -> ImagePreprocessor:
+    """Get the shared image preprocessor."""
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor(
+            max_side=settings.image_max_side_px,
+            target_bytes=settings.image_target_kb * 1024,
+            output_format=settings.image_output_format,
+            workers=settings.image_preprocess_workers,
+            max_fetch_bytes=settings.max_image_size_mb * 1024 * 1024,
+        )
+    return _preprocessor
+
+
+async def close_image_preprocessor() -> None:
+    """Shut down the shared preprocessor (called on application shutdown)."""
+    global _preprocessor
+    if _preprocessor is not None:
+        await _preprocessor.aclose()
+        _preprocessor = None
+
+
+async def prepare_image_part(image_url: str) -> ImagePart:
+    """
+    Build the model input for an image URL.
+
+    Sends a normalized inline image when preprocessing is enabled, and falls
+    back to passing the URL through if the image cannot be fetched or decoded.
+
+    Args:
+        image_url: Image URL
+
+    Returns:
+        ImagePart
+    """
+    if settings.image_preprocess_enabled:
+        try:
+            return await get_image_preprocessor().load_image_part(image_url)
+        except (ValueError, httpx.HTTPError, BrokenProcessPool) as e:
+            logger.warning(f"Image preprocessing failed, sending URL instead: {e}")
+
+    return ImagePart(mime_type=guess_image_mime_type(image_url), uri=image_url)
+
+
+def guess_image_mime_type(image_url: str) -> str:
+    """Guess image MIME type from the URL extension."""
+    path = image_url.split("?", 1)[0].lower()
+    if path.endswith(".png"):
+        return "image/png"
+    if path.endswith(".webp"):
+        return "image/webp"
+    return "image/jpeg"
@@ -0,0 +1,41 @@
+"""
+Canned model responses used when no model endpoint is configured.
+"""
+
+# Workspace analysis response matching the "analysis" prompt JSON schema
+MOCK_ANALYSIS_RESPONSE = {
+    "overall_score": 75,
+    "desk_position": {
+        "score": 70,
+        "description": "办公桌位置基本合理，背后有墙但缺少支撑感",
+        "issues": ["背后缺少高背椅或书柜支撑", "正对窗户可能造成注意力分散"]
+    },
+    "element_balance": {
+        "current_elements": {"wood": 30, "fire": 10, "earth": 20, "metal": 25, "water": 15},
+        "compatibility_score": 65,
+        "missing_elements": ["fire"],
+        "excess_elements": ["wood"]
+    },
+    "energy_flow": {
+        "score": 80,
+        "positive_aspects": ["空间开阔", "光线充足"],
+        "negative_aspects": ["缺少植物调节气场", "线路杂乱影响能量流动"]
+    },
+    "recommendations": [
+        {
+            "category": "placement",
+            "priority": "high",
+            "title": "添加背后支撑",
+            "description": "在座椅后方放置书柜或高大的植物，增强靠山之势",
+            "expected_benefit": "提升事业稳定性和贵人运"
+        },
+        {
+            "category": "decoration",
+            "priority": "medium",
+            "title": "增加火元素装饰",
+            "description": "添加红色或紫色的装饰品，如台灯或艺术品",
+            "expected_benefit": "平衡五行，激发创造力和热情"
+        }
+    ],
+    "summary": "工位整体风水良好，主要需要加强背后支撑和五行平衡。建议增加火元素装饰并整理线路以优化能量流动。"
+}
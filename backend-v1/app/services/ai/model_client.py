@@ -0,0 +1,366 @@
+"""
+Shared async client for LLM / vision model calls.
+
+All pipelines talk to the model through a single pooled ``httpx.AsyncClient``
+per endpoint host, so TLS handshakes and HTTP/2 connections are reused across
+analysis jobs instead of being rebuilt per request.
+"""
+import asyncio
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.errors import ExternalServiceError
+from app.core.logging import get_logger
+from app.core.metrics import MODEL_PROMPT_TOKENS
+from app.core.tracing import current_span, start_span
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Status codes worth retrying (throttling and transient upstream failures)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Backoff parameters (seconds)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+# Never start an attempt with less than this much budget left
+MIN_ATTEMPT_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class ImagePart:
+    """
+    Image input for a model call.
+
+    Either ``uri`` (gs:// or https:// reference) or inline ``data`` must be set.
+    """
+    mime_type: str
+    uri: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def to_part(self) -> Dict[str, Any]:
+        """Convert to a generateContent request part."""
+        if self.data is not None:
+            return {
+                "inline_data": {
+                    "mime_type": self.mime_type,
+                    "data": base64.b64encode(self.data).decode("ascii"),
+                }
+            }
+        return {"file_data": {"mime_type": self.mime_type, "file_uri": self.uri}}
+
+
+class ModelClient:
+    """
+    Pooled async client for a Gemini-compatible ``generateContent`` endpoint.
+
+    Features:
+    - HTTP/2 with keep-alive connection reuse
+    - Per-host connection limits (one pool per endpoint host)
+    - Timeout budget per call, derived from ``analysis_timeout_seconds``
+    - Retries with exponential backoff and full jitter
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout_budget: float = 300.0,
+        max_retries: int = 3,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize model client.
+
+        Args:
+            base_url: Endpoint base URL (e.g. https://generativelanguage.googleapis.com/v1beta)
+            model: Model name
+            api_key: Optional API key sent as ``x-goog-api-key``
+            max_connections: Max concurrent connections to the host
+            max_keepalive_connections: Max idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept
+            timeout_budget: Total seconds allowed per call, retries included
+            max_retries: Retries after the first attempt
+            http2: Whether to negotiate HTTP/2
+            transport: Optional transport override (tests, stub server)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout_budget = timeout_budget
+        self.max_retries = max_retries
+
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["x-goog-api-key"] = api_key
+
+        # Per-attempt timeouts are set on each request from the remaining budget
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            http2=http2 and transport is None,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout_budget, connect=10.0, pool=5.0),
+            transport=transport,
+        )
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Underlying pooled HTTP client (shared keep-alive connections)."""
+        return self._client
+
+    async def generate(
+        self,
+        prompt: str,
+        images: Sequence[ImagePart] = (),
+        system_instruction: Optional[str] = None,
+        response_mime_type: Optional[str] = "application/json",
+        timeout_budget: Optional[float] = None,
+    ) -> str:
+        """
+        Generate a completion and return the concatenated text.
+
+        Args:
+            prompt: User prompt text
+            images: Image inputs
+            system_instruction: Optional system instruction
+            response_mime_type: Requested response MIME type
+            timeout_budget: Override of the total time budget (seconds)
+
+        Returns:
+            Model response text
+
+        Raises:
+            ExternalServiceError: If the model call fails after retries
+        """
+        body = self._build_body(prompt, images, system_instruction, response_mime_type)
+        with start_span("model.generate", model=self.model, images=len(images)):
+            response = await self._send_with_retries(
+                f"/models/{self.model}:generateContent",
+                body,
+                timeout_budget or self.timeout_budget,
+            )
+            payload = response.json()
+            self._record_usage(payload.get("usageMetadata"))
+            return self._extract_text(payload)
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        images: Sequence[ImagePart] = (),
+        system_instruction: Optional[str] = None,
+        response_mime_type: Optional[str] = "application/json",
+        timeout_budget: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate a completion, yielding text chunks as the model produces them.
+
+        Connection and throttling failures are retried until the first chunk
+        arrives; after that a failure ends the stream with an error.
+
+        Args:
+            prompt: User prompt text
+            images: Image inputs
+            system_instruction: Optional system instruction
+            response_mime_type: Requested response MIME type
+            timeout_budget: Override of the total time budget (seconds)
+
+        Yields:
+            Response text chunks
+
+        Raises:
+            ExternalServiceError: If the model call fails
+        """
+        body = self._build_body(prompt, images, system_instruction, response_mime_type)
+        # Span covers the time to response headers; the caller's span covers the stream
+        with start_span("model.stream_connect", model=self.model, images=len(images)):
+            response = await self._send_with_retries(
+                f"/models/{self.model}:streamGenerateContent?alt=sse",
+                body,
+                timeout_budget or self.timeout_budget,
+                stream=True,
+            )
+        usage = None
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = json.loads(line[5:])
+                # Usage is cumulative; the last chunk carries the totals
+                usage = payload.get("usageMetadata", usage)
+                text = self._extract_text(payload)
+                if text:
+                    yield text
+        except (httpx.TimeoutException, httpx.TransportError, ValueError) as e:
+            raise ExternalServiceError("ai_model", f"Model stream interrupted: {type(e).__name__}: {e}")
+        finally:
+            await response.aclose()
+        self._record_usage(usage)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    def _build_body(
+        self,
+        prompt: str,
+        images: Sequence[ImagePart],
+        system_instruction: Optional[str],
+        response_mime_type: Optional[str],
+    ) -> Dict[str, Any]:
+        """Build generateContent request body."""
+        parts: List[Dict[str, Any]] = [{"text": prompt}]
+        parts.extend(image.to_part() for image in images)
+
+        body: Dict[str, Any] = {"contents": [{"role": "user", "parts": parts}]}
+        if system_instruction:
+            body["system_instruction"] = {"parts": [{"text": system_instruction}]}
+        if response_mime_type:
+            body["generation_config"] = {"response_mime_type": response_mime_type}
+        return body
+
+    async def _send_with_retries(
+        self,
+        path: str,
+        body: Dict[str, Any],
+        budget: float,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        POST with retries, never exceeding the total time budget.
+
+        With ``stream=True`` the successful response is returned unread and
+        must be closed by the caller.
+        """
+        deadline = time.monotonic() + budget
+        last_error: Optional[str] = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining < MIN_ATTEMPT_SECONDS:
+                break
+
+            retry_after: Optional[float] = None
+            try:
+                request = self._client.build_request(
+                    "POST",
+                    path,
+                    json=body,
+                    timeout=httpx.Timeout(remaining, connect=min(10.0, remaining), pool=min(5.0, remaining)),
+                )
+                response = await self._client.send(request, stream=stream)
+                if response.status_code < 400:
+                    return response
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+
+                last_error = f"HTTP {response.status_code}"
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(f"Model call failed with non-retryable status {response.status_code}: {response.text[:200]}")
+                    break
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            if attempt == self.max_retries:
+                break
+
+            # Exponential backoff with full jitter, honouring Retry-After
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if time.monotonic() + delay + MIN_ATTEMPT_SECONDS > deadline:
+                break
+
+            logger.warning(f"Model call attempt {attempt + 1} failed ({last_error}), retrying in {delay:.2f}s")
+            current_span().add_event("retry", attempt=attempt + 1, error=last_error, delay_seconds=round(delay, 3))
+            await asyncio.sleep(delay)
+
+        raise ExternalServiceError("ai_model", f"Model call failed: {last_error or 'timeout budget exhausted'}")
+
+    def _record_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Count prompt tokens served from the provider's prompt cache vs. processed anew."""
+        if not usage:
+            return
+        prompt_tokens = usage.get("promptTokenCount", 0)
+        cached_tokens = usage.get("cachedContentTokenCount", 0)
+        MODEL_PROMPT_TOKENS.inc(self.model, "hit", amount=cached_tokens)
+        MODEL_PROMPT_TOKENS.inc(self.model, "miss", amount=prompt_tokens - cached_tokens)
+        span = current_span()
+        span.set_attribute("prompt_tokens", prompt_tokens)
+        span.set_attribute("cached_tokens", cached_tokens)
+
+    @staticmethod
+    def _extract_text(payload: Dict[str, Any]) -> str:
+        """Extract text from a generateContent response."""
+        texts = []
+        for candidate in payload.get("candidates", [])[:1]:
+            for part in candidate.get("content", {}).get("parts", []):
+                if "text" in part:
+                    texts.append(part["text"])
+        return "".join(texts)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+# Shared clients keyed by endpoint base URL (one connection pool per host)
+_clients: Dict[str, ModelClient] = {}
+
+
+def get_model_client() -> Optional[ModelClient]:
+    """
+    Get the shared model client for the configured endpoint.
+
+    Returns:
+        ModelClient, or None if no model endpoint is configured
+    """
+    if not settings.ai_model_base_url:
+        return None
+
+    client = _clients.get(settings.ai_model_base_url)
+    if client is None:
+        client = ModelClient(
+            base_url=settings.ai_model_base_url,
+            model=settings.ai_model_name,
+            api_key=settings.ai_model_api_key,
+            max_connections=settings.ai_model_max_connections,
+            max_keepalive_connections=settings.ai_model_max_keepalive,
+            timeout_budget=float(settings.analysis_timeout_seconds),
+            max_retries=settings.ai_model_max_retries,
+        )
+        _clients[settings.ai_model_base_url] = client
+    return client
+
+
+async def close_model_clients() -> None:
+    """Close all shared model clients (called on application shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,264 @@
+"""
+Incremental JSON parser for streamed model responses.
+
+Model output arrives as text chunks, often wrapped in markdown fences or
+prefixed with prose. The parser scans each character once, skips anything
+before the first ``{``, and reports fields as soon as their value closes,
+so partial sections can be shown before the response finishes.
+"""
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+# Next character that ends a string run (closing quote or escape)
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Next character that ends a bare scalar (number, true, false, null)
+_SCALAR_END = re.compile(r'[,}\]\s]')
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    """An open object or array."""
+    __slots__ = ("kind", "start", "key", "expect_key")
+
+    def __init__(self, kind: str, start: int):
+        self.kind = kind  # "{" or "["
+        self.start = start
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for a single top-level JSON object.
+
+    ``feed`` returns ``(path, value)`` pairs for fields that completed in the
+    chunk. Nested objects are reported through their fields down to
+    ``emit_depth`` levels (e.g. ``si_xiang_problems.qinglong``); scalars and
+    arrays are reported whole. Once the top-level object closes, ``result``
+    holds the decoded object and any trailing text (closing fences) is ignored.
+    """
+
+    def __init__(self, emit_depth: int = 2):
+        """
+        Initialize parser.
+
+        Args:
+            emit_depth: Deepest object nesting level whose fields are reported
+        """
+        self.emit_depth = emit_depth
+        self.result: Optional[Dict[str, Any]] = None
+        self._reset()
+
+    @property
+    def done(self) -> bool:
+        """Whether the top-level object has been fully parsed."""
+        return self.result is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of model output.
+
+        Args:
+            chunk: Next piece of response text
+
+        Returns:
+            Fields completed within this chunk as (dotted path, value)
+        """
+        if self.result is not None or not chunk:
+            return []
+
+        completed: List[Tuple[str, Any]] = []
+        # Each pass past an invalid root restarts on the remaining text, so
+        # recovery never nests however many fragments precede the object
+        while chunk:
+            chunk = self._scan(chunk, completed)
+        return completed
+
+    def _scan(self, chunk: str, completed: List[Tuple[str, Any]]) -> str:
+        """
+        Scan one chunk, appending completed fields.
+
+        Returns:
+            Text after an invalid top-level value, to be scanned again ("" otherwise)
+        """
+        if not self._stack:
+            # Still looking for the start of the object (skips fences / prose)
+            start = chunk.find("{")
+            if start < 0:
+                return ""
+            chunk = chunk[start:]
+
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+
+        i = 0
+        n = len(chunk)
+        while i < n:
+            if self._escape_pending:
+                # Escaped character carried over from the previous chunk
+                self._escape_pending = False
+                i += 1
+                continue
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(chunk, i)
+                if match is None:
+                    break
+                i = match.start()
+                if chunk[i] == "\\":
+                    # Skip escaped character (may straddle a chunk boundary)
+                    if i + 1 < n:
+                        i += 2
+                    else:
+                        self._escape_pending = True
+                        i += 1
+                    continue
+                self._in_string = False
+                self._close_string(base + i, completed)
+                i += 1
+                continue
+
+            if self._scalar_start is not None:
+                match = _SCALAR_END.search(chunk, i)
+                if match is None:
+                    break
+                i = match.start()
+                self._complete_value(self._scalar_start, base + i, completed)
+                self._scalar_start = None
+                continue
+
+            char = chunk[i]
+            if char in _WHITESPACE or char == ":":
+                i += 1
+            elif char == '"':
+                self._in_string = True
+                self._string_start = base + i
+                frame = self._stack[-1] if self._stack else None
+                self._string_is_key = frame is not None and frame.expect_key
+                i += 1
+            elif char == ",":
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].expect_key = True
+                i += 1
+            elif char in "{[":
+                self._stack.append(_Frame(char, base + i))
+                i += 1
+            elif char in "}]":
+                frame = self._stack.pop()
+                end = base + i + 1
+                if not self._stack:
+                    self._finish_root(frame.start, end)
+                    if self.result is not None:
+                        return ""
+                    # Not valid JSON (e.g. braces in leading prose): rescan the rest
+                    self._reset()
+                    return chunk[i + 1:]
+                self._complete_value(frame.start, end, completed, container=frame.kind)
+                i += 1
+            else:
+                self._scalar_start = base + i
+                i += 1
+
+        return ""
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        """
+        Finish parsing.
+
+        Returns:
+            The decoded top-level object, or None if the input never completed one
+        """
+        return self.result
+
+    def _reset(self) -> None:
+        """Reset scanning state (keeps configuration)."""
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape_pending = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._scalar_start: Optional[int] = None
+
+    def _slice(self, start: int, end: int) -> str:
+        """Extract buffered text between two absolute offsets."""
+        first = bisect_right(self._offsets, start) - 1
+        parts = []
+        index = first
+        while index < len(self._chunks) and self._offsets[index] < end:
+            chunk_start = self._offsets[index]
+            chunk = self._chunks[index]
+            parts.append(chunk[max(0, start - chunk_start):end - chunk_start])
+            index += 1
+        return "".join(parts)
+
+    def _close_string(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        """Handle a closing quote at absolute offset ``end``."""
+        if self._string_is_key:
+            frame = self._stack[-1]
+            try:
+                frame.key = json.loads(self._slice(self._string_start, end + 1))
+            except ValueError:
+                frame.key = None
+            frame.expect_key = False
+        else:
+            self._complete_value(self._string_start, end + 1, completed)
+
+    def _complete_value(
+        self,
+        start: int,
+        end: int,
+        completed: List[Tuple[str, Any]],
+        container: Optional[str] = None,
+    ) -> None:
+        """Report a value that closed inside the current frame, if in range."""
+        depth = len(self._stack)
+        if depth > self.emit_depth:
+            return
+        # Objects above the emit depth are reported through their fields instead
+        if container == "{" and depth < self.emit_depth:
+            return
+
+        keys = []
+        for frame in self._stack:
+            if frame.kind != "{" or frame.key is None:
+                return
+            keys.append(frame.key)
+
+        try:
+            value = json.loads(self._slice(start, end))
+        except ValueError:
+            return
+        completed.append((".".join(keys), value))
+
+    def _finish_root(self, start: int, end: int) -> None:
+        """Decode the completed top-level object."""
+        try:
+            value = json.loads(self._slice(start, end))
+        except ValueError:
+            return
+        if isinstance(value, dict):
+            self.result = value
+
+
+def parse_json_response(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a complete model response that may contain fences or prose.
+
+    Args:
+        text: Full response text
+
+    Returns:
+        Decoded top-level object, or None if none was found
+    """
+    parser = IncrementalJSONParser(emit_depth=0)
+    parser.feed(text)
+    return parser.close()
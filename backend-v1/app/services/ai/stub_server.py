@@ -0,0 +1,121 @@
+"""
+Local stub of a Gemini-compatible model endpoint.
+
+Used by tests (via ``httpx.ASGITransport``) and benchmarks (run standalone)
+so the model client can be exercised without network access or API cost.
+
+Usage:
+    python -m app.services.ai.stub_server --port 8089 --latency-ms 200
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.ai.mock_responses import MOCK_ANALYSIS_RESPONSE
+
+# Characters per streamed chunk (roughly a handful of tokens)
+STREAM_CHUNK_CHARS = 16
+
+
+def create_stub_app(
+    response_text: Optional[str] = None,
+    latency_ms: float = 0.0,
+    failure_rate: float = 0.0,
+) -> FastAPI:
+    """
+    Create the stub model server app.
+
+    Args:
+        response_text: Text returned by the model (defaults to mock workspace analysis JSON)
+        latency_ms: Artificial latency per request
+        failure_rate: Fraction of requests answered with HTTP 503 (exercises retries)
+
+    Returns:
+        FastAPI application
+    """
+    if response_text is None:
+        response_text = json.dumps(MOCK_ANALYSIS_RESPONSE, ensure_ascii=False)
+
+    app = FastAPI(title="Octa Model Stub")
+    app.state.request_count = 0
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        """Return a canned generateContent response."""
+        app.state.request_count += 1
+        body: Dict[str, Any] = await request.json()
+
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+
+        if failure_rate and random.random() < failure_rate:
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"code": 503, "message": "stub overloaded"}},
+                headers={"Retry-After": "0"},
+            )
+
+        return {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": response_text}]},
+                    "finishReason": "STOP",
+                }
+            ],
+            "modelVersion": model,
+            "usageMetadata": {
+                "promptTokenCount": sum(len(p.get("text", "")) for c in body.get("contents", []) for p in c.get("parts", [])),
+                "candidatesTokenCount": len(response_text),
+            },
+        }
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request, alt: str = "sse"):
+        """Stream the canned response as SSE chunks (latency spread across chunks)."""
+        app.state.request_count += 1
+        await request.json()
+
+        if failure_rate and random.random() < failure_rate:
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"code": 503, "message": "stub overloaded"}},
+                headers={"Retry-After": "0"},
+            )
+
+        pieces = [response_text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(response_text), STREAM_CHUNK_CHARS)]
+        delay = (latency_ms / 1000.0) / max(1, len(pieces))
+
+        async def frames():
+            for piece in pieces:
+                if delay:
+                    await asyncio.sleep(delay)
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n"
+
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    """Run the stub server with uvicorn."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stub model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_stub_app(latency_ms=args.latency_ms, failure_rate=args.failure_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ from app.models.analysis import SceneType, AnalysisJob, AnalysisResult
 from app.services.analysis.workspace_pipeline import WorkspaceAnalysisPipeline
 from app.services.analysis.floorplan_pipeline import FloorplanAnalysisPipeline
 from app.services.analysis.lookaround8_pipeline import Lookaround8AnalysisPipeline
+from app.services.analysis.events import SectionCallback
 from app.core.logging import get_logger
+from app.core.tracing import current_span, traced
 
 logger = get_logger(__name__)
 
@@ -24,12 +26,14 @@ class AnalysisDispatcher:
             SceneType.LOOKAROUND8: Lookaround8AnalysisPipeline(),
         }
 
+    @traced("analysis.dispatch")
     async def dispatch(
         self,
         job: AnalysisJob,
         bazi_profile: Dict[str, Any],
         media_urls: list[str],
-        language: str = "zh"
+        language: str = "zh",
+        on_section: Optional[SectionCallback] = None
     ) -> AnalysisResult:
         """
         Dispatch analysis job to appropriate pipeline.
@@ -39,6 +43,7 @@ class AnalysisDispatcher:
             bazi_profile: User's Bazi profile
             media_urls: URLs of media files
             language: Language for analysis
+            on_section: Optional callback receiving partial sections from the pipeline
 
         Returns:
             Analysis result
@@ -47,6 +52,10 @@ class AnalysisDispatcher:
             ValueError: If scene type is not supported
         """
         logger.info(f"Dispatching analysis job {job.job_id} for scene type {job.scene_type}")
+        span = current_span()
+        span.set_attribute("job_id", job.job_id)
+        span.set_attribute("scene_type", job.scene_type.value)
+        span.set_attribute("media_count", len(media_urls))
 
         # Get appropriate pipeline
         pipeline = self.pipelines.get(job.scene_type)
@@ -63,7 +72,8 @@ class AnalysisDispatcher:
                 job=job,
                 image_url=media_urls[0],
                 bazi_profile=bazi_profile,
-                language=language
+                language=language,
+                on_section=on_section
             )
 
         elif job.scene_type == SceneType.FLOORPLAN:
@@ -75,7 +85,8 @@ class AnalysisDispatcher:
                 job=job,
                 image_url=media_urls[0],
                 bazi_profile=bazi_profile,
-                language=language
+                language=language,
+                on_section=on_section
             )
 
         elif job.scene_type == SceneType.LOOKAROUND8:
@@ -87,7 +98,8 @@ class AnalysisDispatcher:
                 job=job,
                 image_urls=media_urls,
                 bazi_profile=bazi_profile,
-                language=language
+                language=language,
+                on_section=on_section
             )
 
         else:
@@ -0,0 +1,242 @@
+"""
+In-process event broker for analysis job progress.
+
+Pipelines publish status transitions and partial sections while they run;
+the ``/analysis/jobs/{job_id}/events`` endpoint streams them to clients as
+Server-Sent Events instead of clients polling the job status endpoint.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.models.analysis import JobStatus
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Callback used by pipelines to publish partial results: (section, payload)
+SectionCallback = Callable[[str, Any], Awaitable[None]]
+
+# Finished jobs are kept this long so late subscribers can replay them
+FINISHED_JOB_RETENTION_SECONDS = 600
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED}
+
+
+@dataclass
+class JobEvent:
+    """A single job event."""
+    event_id: int
+    event: str  # status, section, result
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        """Encode as a Server-Sent Events frame."""
+        payload = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.event_id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+@dataclass
+class _JobChannel:
+    """Event history, subscribers and latest snapshot for one job."""
+    job_id: str
+    user_id: str
+    snapshot: Dict[str, Any]
+    history: List[JobEvent] = field(default_factory=list)
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    finished_at: Optional[float] = None
+
+
+class JobEventBroker:
+    """
+    Publish/subscribe broker for analysis job events.
+
+    Events are kept per job so a client reconnecting with ``Last-Event-ID``
+    receives what it missed before switching to live delivery.
+    """
+
+    def __init__(self):
+        """Initialize broker."""
+        self._channels: Dict[str, _JobChannel] = {}
+
+    def register_job(
+        self,
+        job_id: str,
+        user_id: str,
+        scene_type: str,
+        created_at: datetime,
+    ) -> None:
+        """
+        Register a newly created job.
+
+        Args:
+            job_id: Job ID
+            user_id: Owner user ID
+            scene_type: Scene type
+            created_at: Creation time
+        """
+        self._prune()
+        self._channels[job_id] = _JobChannel(
+            job_id=job_id,
+            user_id=user_id,
+            snapshot={
+                "job_id": job_id,
+                "user_id": user_id,
+                "status": JobStatus.PENDING,
+                "scene_type": scene_type,
+                "result_id": None,
+                "created_at": created_at,
+                "completed_at": None,
+            },
+        )
+        self._append(job_id, "status", {"status": JobStatus.PENDING.value})
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest job snapshot.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Job snapshot dict or None if unknown
+        """
+        channel = self._channels.get(job_id)
+        return dict(channel.snapshot) if channel else None
+
+    def count_active_jobs(self) -> Dict[str, int]:
+        """Number of unfinished jobs on this instance, by status (queue depth)."""
+        counts = {JobStatus.PENDING.value: 0, JobStatus.RUNNING.value: 0}
+        for channel in self._channels.values():
+            if channel.finished_at is None:
+                status = JobStatus(channel.snapshot["status"]).value
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def publish_status(self, job_id: str, status: JobStatus, **fields: Any) -> None:
+        """
+        Publish a status transition.
+
+        Args:
+            job_id: Job ID
+            status: New status
+            **fields: Extra snapshot fields (result_id, error_message, ...)
+        """
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+
+        channel.snapshot["status"] = status
+        channel.snapshot.update(fields)
+        if status in TERMINAL_STATUSES:
+            channel.snapshot["completed_at"] = datetime.utcnow()
+            channel.finished_at = time.monotonic()
+
+        self._append(job_id, "status", {"status": status.value, **fields})
+
+        if status in TERMINAL_STATUSES:
+            # Wake subscribers so their streams end after the terminal event
+            for queue in channel.subscribers:
+                queue.put_nowait(None)
+
+    def publish_section(self, job_id: str, section: str, payload: Any) -> None:
+        """
+        Publish a partial analysis section.
+
+        Args:
+            job_id: Job ID
+            section: Section name (e.g. "direction.N", "si_xiang_problems.qinglong")
+            payload: Section content
+        """
+        self._append(job_id, "section", {"section": section, "content": payload})
+
+    def publish_result(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Publish the final result summary."""
+        self._append(job_id, "result", payload)
+
+    def section_callback(self, job_id: str) -> SectionCallback:
+        """Create a pipeline section callback bound to a job."""
+        async def _on_section(section: str, payload: Any) -> None:
+            self.publish_section(job_id, section, payload)
+        return _on_section
+
+    async def subscribe(
+        self,
+        job_id: str,
+        last_event_id: Optional[int] = None,
+    ) -> AsyncIterator[JobEvent]:
+        """
+        Stream events for a job, replaying history after ``last_event_id``.
+
+        The iterator ends once the job reaches a terminal status.
+
+        Args:
+            job_id: Job ID
+            last_event_id: Last event ID the client has seen
+
+        Yields:
+            Job events in order
+        """
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        try:
+            # Replay and subscribe without an await in between, so no event is lost
+            cursor = last_event_id or 0
+            for event in channel.history:
+                if event.event_id > cursor:
+                    yield event
+                    cursor = event.event_id
+
+            if channel.finished_at is not None:
+                return
+
+            while True:
+                event = await queue.get()
+                if event is None:
+                    # Terminal status: drain anything queued before it
+                    while not queue.empty():
+                        pending = queue.get_nowait()
+                        if pending is not None and pending.event_id > cursor:
+                            yield pending
+                    return
+                if event.event_id > cursor:
+                    cursor = event.event_id
+                    yield event
+        finally:
+            channel.subscribers.discard(queue)
+
+    def _append(self, job_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        """Append event to history and fan out to subscribers."""
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+
+        event = JobEvent(event_id=len(channel.history) + 1, event=event_type, data=data)
+        channel.history.append(event)
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+
+    def _prune(self) -> None:
+        """Drop finished jobs past their retention window."""
+        cutoff = time.monotonic() - FINISHED_JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, channel in self._channels.items()
+            if channel.finished_at is not None and channel.finished_at < cutoff and not channel.subscribers
+        ]
+        for job_id in expired:
+            del self._channels[job_id]
+
+
+_broker = JobEventBroker()
+
+
+def get_job_event_broker() -> JobEventBroker:
+    """Get the process-wide job event broker."""
+    return _broker
@@ -4,11 +4,13 @@ Floorplan Feng Shui analysis pipeline.
 This pipeline analyzes residential floorplans for Feng Shui compatibility.
 Currently a placeholder for Phase 2 implementation.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from app.models.analysis import AnalysisJob, AnalysisResult
+from app.services.analysis.events import SectionCallback
 from app.core.logging import get_logger
+from app.core.tracing import traced
 from app.utils.ids import generate_prefixed_id
 
 logger = get_logger(__name__)
@@ -43,16 +45,18 @@ class FloorplanAnalysisPipeline:
 
     def __init__(self):
         """Initialize floorplan analysis pipeline."""
-        # TODO: Initialize AI model client
-        # self.vision_client = aiplatform.gapic.PredictionServiceClient()
+        # Phase 2: call the model through get_model_client() at analysis time,
+        # like WorkspaceAnalysisPipeline (None until an endpoint is configured)
         pass
 
+    @traced("floorplan.analyze")
     async def analyze(
         self,
         job: AnalysisJob,
         image_url: str,
         bazi_profile: Dict[str, Any],
-        language: str = "zh"
+        language: str = "zh",
+        on_section: Optional[SectionCallback] = None
     ) -> AnalysisResult:
         """
         Analyze floorplan for Feng Shui compatibility.
@@ -62,6 +66,7 @@ class FloorplanAnalysisPipeline:
             image_url: URL of floorplan image
             bazi_profile: User's Bazi profile
             language: Language for analysis (zh/en)
+            on_section: Optional callback receiving partial sections as they are ready
 
         Returns:
             Analysis result with recommendations
@@ -73,6 +78,7 @@ class FloorplanAnalysisPipeline:
 
         # TODO: Phase 2 Implementation Steps:
         # 1. Extract floorplan features using Vision AI
+        #    - Build model input with prepare_image_part() (downscaled in the process pool)
         #    - Detect rooms and their positions
         #    - Identify doors, windows, bathrooms
         #    - Calculate room dimensions and proportions
@@ -137,6 +143,9 @@ class FloorplanAnalysisPipeline:
             }
         ]
 
+        if on_section:
+            await on_section("recommendations", recommendations)
+
         result = AnalysisResult(
             result_id=result_id,
             job_id=job.job_id,
@@ -4,11 +4,13 @@ Lookaround8 (八方环扫) Feng Shui analysis pipeline.
 This pipeline analyzes the environment from 8 directions for comprehensive
 Feng Shui assessment. Currently a placeholder for Phase 2 implementation.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from app.models.analysis import AnalysisJob, AnalysisResult
+from app.services.analysis.events import SectionCallback
 from app.core.logging import get_logger
+from app.core.tracing import traced
 from app.utils.ids import generate_prefixed_id
 
 logger = get_logger(__name__)
@@ -49,16 +51,18 @@ class Lookaround8AnalysisPipeline:
 
     def __init__(self):
         """Initialize lookaround8 analysis pipeline."""
-        # TODO: Initialize AI model client
-        # self.vision_client = aiplatform.gapic.PredictionServiceClient()
+        # Phase 2: call the model through get_model_client() at analysis time,
+        # like WorkspaceAnalysisPipeline (None until an endpoint is configured)
         pass
 
+    @traced("lookaround8.analyze")
     async def analyze(
         self,
         job: AnalysisJob,
         image_urls: List[str],
         bazi_profile: Dict[str, Any],
-        language: str = "zh"
+        language: str = "zh",
+        on_section: Optional[SectionCallback] = None
     ) -> AnalysisResult:
         """
         Analyze environment from 8 directions.
@@ -68,6 +72,7 @@ class Lookaround8AnalysisPipeline:
             image_urls: List of 8 image URLs (one per direction, in order N, NE, E, SE, S, SW, W, NW)
             bazi_profile: User's Bazi profile
             language: Language for analysis (zh/en)
+            on_section: Optional callback receiving each direction's findings as they are ready
 
         Returns:
             Analysis result with directional recommendations
@@ -82,6 +87,7 @@ class Lookaround8AnalysisPipeline:
 
         # TODO: Phase 2 Implementation Steps:
         # 1. Analyze each direction image
+        #    - Build model inputs with prepare_image_part() (downscaled in the process pool)
         #    - Detect natural features (mountains, water, trees)
         #    - Identify buildings and structures
         #    - Assess openness vs enclosure
@@ -115,10 +121,17 @@ class Lookaround8AnalysisPipeline:
         direction_names = DIRECTION_NAMES_ZH if language == "zh" else DIRECTION_NAMES_EN
         directional_findings = []
         for i, direction in enumerate(DIRECTIONS):
-            directional_findings.append(
+            finding = (
                 f"{direction_names[i]}方向: 环境特征分析中..." if language == "zh"
                 else f"{direction_names[i]}: Environmental analysis in progress..."
             )
+            directional_findings.append(finding)
+            if on_section:
+                await on_section(f"direction.{direction}", {
+                    "direction": direction,
+                    "element": self._get_direction_element(direction),
+                    "finding": finding
+                })
 
         recommendations = [
             {
@@ -12,10 +12,20 @@ from app.models.analysis import (
     JobStatus
 )
 from app.services.bazi_sevice_revised import BaziService
+from app.prompts.base import PromptParts
 from app.prompts.workspace_prompts import WorkspaceAnalysisPrompts
+from app.services.ai.model_client import get_model_client
+from app.services.ai.image_preprocess import prepare_image_part
+from app.services.ai.mock_responses import MOCK_ANALYSIS_RESPONSE
+from app.services.ai.streaming_json import IncrementalJSONParser, parse_json_response
+from app.services.analysis.events import SectionCallback
+from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.metrics import PROMPT_TOKENS_ESTIMATED
+from app.core.tracing import start_span, traced
 from app.utils.ids import generate_prefixed_id
 
+settings = get_settings()
 logger = get_logger(__name__)
 
 
@@ -29,12 +39,14 @@ class WorkspaceAnalysisPipeline:
         self.bazi_service = BaziService()
         self.prompt_manager = WorkspaceAnalysisPrompts()
 
+    @traced("workspace.analyze")
     async def analyze(
         self,
         job: AnalysisJob,
         image_url: str,
         bazi_profile: Dict[str, Any],
-        language: str = "zh"
+        language: str = "zh",
+        on_section: Optional[SectionCallback] = None
     ) -> AnalysisResult:
         """
         Analyze workspace Feng Shui.
@@ -44,6 +56,7 @@ class WorkspaceAnalysisPipeline:
             image_url: URL of workspace image
             bazi_profile: User's Bazi profile data
             language: Language for analysis
+            on_section: Optional callback receiving partial sections as they are ready
 
         Returns:
             AnalysisResult with workspace analysis
@@ -51,68 +64,43 @@ class WorkspaceAnalysisPipeline:
         try:
             start_time = datetime.utcnow()
 
-            # 1. Prepare Bazi data for prompt
-            bazi_data = self._prepare_bazi_data(bazi_profile)
-
-            # 2. Get analysis prompt
-            prompt = self.prompt_manager.get_workspace_analysis_prompt(
-                bazi_data=bazi_data,
-                language=language,
-                analysis_type="full"
-            )
-
-            # 3. Call AI model for analysis (placeholder for now)
-            # In production, this would call Vertex AI or another LLM
-            analysis_response = await self._call_ai_model(prompt, image_url)
-
-            # 4. Parse AI response
-            analysis_data = self._parse_ai_response(analysis_response)
-
-            # 5. Create detailed analysis
-            details = WorkspaceAnalysisDetails(
-                desk_position=analysis_data.get("desk_position", {}),
-                facing_direction=analysis_data.get("desk_position", {}).get("facing", "unknown"),
-                command_position_score=analysis_data.get("desk_position", {}).get("score", 50),
-                back_support_score=analysis_data.get("desk_position", {}).get("back_support_score", 50),
-
-                energy_flow=analysis_data.get("energy_flow", {}),
-                has_door_alignment=analysis_data.get("energy_flow", {}).get("has_door_alignment", False),
-                has_window_glare=analysis_data.get("energy_flow", {}).get("has_window_glare", False),
-                has_sharp_corners=analysis_data.get("energy_flow", {}).get("has_sharp_corners", False),
-
-                element_balance=analysis_data.get("element_balance", {}).get("current_elements", {}),
-                missing_elements=analysis_data.get("element_balance", {}).get("missing_elements", []),
-                excess_elements=analysis_data.get("element_balance", {}).get("excess_elements", []),
-
-                bazi_compatibility_score=analysis_data.get("element_balance", {}).get("compatibility_score", 50),
-                overall_score=analysis_data.get("overall_score", 50)
-            )
+            # 1-2. Prepare Bazi data and build the analysis prompt
+            with start_span("workspace.prompt", language=language) as span:
+                bazi_data = self._prepare_bazi_data(bazi_profile)
+                prompt = self.prompt_manager.get_workspace_analysis_parts(
+                    bazi_data=bazi_data,
+                    language=language,
+                    analysis_type="full",
+                    token_budget=settings.prompt_token_budget
+                )
+                PROMPT_TOKENS_ESTIMATED.observe(prompt.estimated_tokens, "workspace.analysis", prompt.compaction)
+                if prompt.estimated_tokens > settings.prompt_token_budget:
+                    logger.warning(
+                        f"Workspace prompt over budget after {prompt.compaction} compaction: "
+                        f"~{prompt.estimated_tokens} > {settings.prompt_token_budget} tokens"
+                    )
+                span.set_attribute("prompt_chars", len(prompt.text))
+                span.set_attribute("prompt_tokens_estimated", prompt.estimated_tokens)
+                span.set_attribute("prompt_compaction", prompt.compaction)
+                span.set_attribute("prompt_prefix_id", prompt.prefix_id)
+                span.set_attribute("prompt_version", prompt.version)
+
+            # 3-4. Call AI model and parse the response
+            if on_section:
+                # Stream so completed sections reach the client before the model finishes
+                # (parsing is interleaved with the stream, so it is part of the model span)
+                with start_span("workspace.model_call", streamed=True):
+                    analysis_data = await self._stream_ai_analysis(prompt, image_url, on_section)
+            else:
+                with start_span("workspace.model_call", streamed=False) as span:
+                    analysis_response = await self._call_ai_model(prompt, image_url)
+                    span.set_attribute("response_chars", len(analysis_response))
+                with start_span("workspace.parse"):
+                    analysis_data = self._parse_ai_response(analysis_response)
 
-            # 6. Create recommendations
-            recommendations = self._create_recommendations(analysis_data.get("recommendations", []))
-
-            # 7. Calculate processing time
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-
-            # 8. Create and return result
-            result = AnalysisResult(
-                result_id=generate_prefixed_id("result"),
-                job_id=job.job_id,
-                user_id=job.user_id,
-                scene_type=job.scene_type,
-                bazi_profile_id=job.bazi_profile_id,
-                overall_score=details.overall_score,
-                summary=analysis_data.get("summary", "工位风水分析完成"),
-                details=details.dict(),
-                recommendations=recommendations,
-                lucky_elements_present=bazi_data.get("lucky_elements", []),
-                unlucky_elements_present=bazi_data.get("unlucky_elements", []),
-                suggested_colors=self._get_suggested_colors(bazi_data.get("lucky_elements", [])),
-                suggested_items=self._get_suggested_items(bazi_data.get("lucky_elements", [])),
-                analysis_version="1.0",
-                created_at=datetime.utcnow(),
-                processing_time_seconds=processing_time
-            )
+            # 5-8. Build the result
+            with start_span("workspace.build_result"):
+                result = self._build_result(job, bazi_data, analysis_data, start_time)
 
             logger.info(f"Workspace analysis completed for job {job.job_id}")
             return result
@@ -121,6 +109,60 @@ class WorkspaceAnalysisPipeline:
             logger.error(f"Workspace analysis failed for job {job.job_id}: {str(e)}")
             raise
 
+    def _build_result(
+        self,
+        job: AnalysisJob,
+        bazi_data: Dict[str, Any],
+        analysis_data: Dict[str, Any],
+        start_time: datetime
+    ) -> AnalysisResult:
+        """Create the analysis result from the parsed model output."""
+        # 5. Create detailed analysis
+        details = WorkspaceAnalysisDetails(
+            desk_position=analysis_data.get("desk_position", {}),
+            facing_direction=analysis_data.get("desk_position", {}).get("facing", "unknown"),
+            command_position_score=analysis_data.get("desk_position", {}).get("score", 50),
+            back_support_score=analysis_data.get("desk_position", {}).get("back_support_score", 50),
+
+            energy_flow=analysis_data.get("energy_flow", {}),
+            has_door_alignment=analysis_data.get("energy_flow", {}).get("has_door_alignment", False),
+            has_window_glare=analysis_data.get("energy_flow", {}).get("has_window_glare", False),
+            has_sharp_corners=analysis_data.get("energy_flow", {}).get("has_sharp_corners", False),
+
+            element_balance=analysis_data.get("element_balance", {}).get("current_elements", {}),
+            missing_elements=analysis_data.get("element_balance", {}).get("missing_elements", []),
+            excess_elements=analysis_data.get("element_balance", {}).get("excess_elements", []),
+
+            bazi_compatibility_score=analysis_data.get("element_balance", {}).get("compatibility_score", 50),
+            overall_score=analysis_data.get("overall_score", 50)
+        )
+
+        # 6. Create recommendations
+        recommendations = self._create_recommendations(analysis_data.get("recommendations", []))
+
+        # 7. Calculate processing time
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+
+        # 8. Create result
+        return AnalysisResult(
+            result_id=generate_prefixed_id("result"),
+            job_id=job.job_id,
+            user_id=job.user_id,
+            scene_type=job.scene_type,
+            bazi_profile_id=job.bazi_profile_id,
+            overall_score=details.overall_score,
+            summary=analysis_data.get("summary", "工位风水分析完成"),
+            details=details.dict(),
+            recommendations=recommendations,
+            lucky_elements_present=bazi_data.get("lucky_elements", []),
+            unlucky_elements_present=bazi_data.get("unlucky_elements", []),
+            suggested_colors=self._get_suggested_colors(bazi_data.get("lucky_elements", [])),
+            suggested_items=self._get_suggested_items(bazi_data.get("lucky_elements", [])),
+            analysis_version="1.0",
+            created_at=datetime.utcnow(),
+            processing_time_seconds=processing_time
+        )
+
     def _prepare_bazi_data(self, bazi_profile: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare Bazi data for prompt."""
         chart = bazi_profile.get("chart", {})
@@ -142,67 +184,68 @@ class WorkspaceAnalysisPipeline:
             "lucky_colors": bazi_profile.get("lucky_colors", [])
         }
 
-    async def _call_ai_model(self, prompt: str, image_url: str) -> str:
+    async def _call_ai_model(self, prompt: PromptParts, image_url: str) -> str:
         """
         Call AI model for analysis.
 
-        This is a placeholder - in production, this would call Vertex AI or another LLM.
+        Uses the shared pooled model client; falls back to a mock response
+        when no model endpoint is configured (local development). The static
+        prompt prefix goes first, as the system instruction, so the provider
+        can serve it from its prompt cache.
         """
-        # TODO: Integrate with actual AI service (Vertex AI, OpenAI, etc.)
-
-        # For now, return a mock response
-        mock_response = {
-            "overall_score": 75,
-            "desk_position": {
-                "score": 70,
-                "description": "办公桌位置基本合理，背后有墙但缺少支撑感",
-                "issues": ["背后缺少高背椅或书柜支撑", "正对窗户可能造成注意力分散"]
-            },
-            "element_balance": {
-                "current_elements": {"wood": 30, "fire": 10, "earth": 20, "metal": 25, "water": 15},
-                "compatibility_score": 65,
-                "missing_elements": ["fire"],
-                "excess_elements": ["wood"]
-            },
-            "energy_flow": {
-                "score": 80,
-                "positive_aspects": ["空间开阔", "光线充足"],
-                "negative_aspects": ["缺少植物调节气场", "线路杂乱影响能量流动"]
-            },
-            "recommendations": [
-                {
-                    "category": "placement",
-                    "priority": "high",
-                    "title": "添加背后支撑",
-                    "description": "在座椅后方放置书柜或高大的植物，增强靠山之势",
-                    "expected_benefit": "提升事业稳定性和贵人运"
-                },
-                {
-                    "category": "decoration",
-                    "priority": "medium",
-                    "title": "增加火元素装饰",
-                    "description": "添加红色或紫色的装饰品，如台灯或艺术品",
-                    "expected_benefit": "平衡五行，激发创造力和热情"
-                }
-            ],
-            "summary": "工位整体风水良好，主要需要加强背后支撑和五行平衡。建议增加火元素装饰并整理线路以优化能量流动。"
-        }
+        model_client = get_model_client()
+        if model_client is None:
+            return json.dumps(MOCK_ANALYSIS_RESPONSE, ensure_ascii=False)
 
-        return json.dumps(mock_response, ensure_ascii=False)
+        return await model_client.generate(
+            prompt=prompt.suffix,
+            images=[await prepare_image_part(image_url)],
+            system_instruction=prompt.prefix or None,
+        )
+
+    async def _stream_ai_analysis(
+        self,
+        prompt: PromptParts,
+        image_url: str,
+        on_section: SectionCallback
+    ) -> Dict[str, Any]:
+        """
+        Call AI model in streaming mode, publishing fields as soon as they close.
+
+        Falls back to the mock response (fed through the same parser) when no
+        model endpoint is configured.
+        """
+        parser = IncrementalJSONParser(emit_depth=2)
+        model_client = get_model_client()
+
+        if model_client is None:
+            for section, content in parser.feed(json.dumps(MOCK_ANALYSIS_RESPONSE, ensure_ascii=False)):
+                await on_section(section, content)
+        else:
+            async for chunk in model_client.stream_generate(
+                prompt=prompt.suffix,
+                images=[await prepare_image_part(image_url)],
+                system_instruction=prompt.prefix or None,
+            ):
+                for section, content in parser.feed(chunk):
+                    await on_section(section, content)
+
+        if parser.result is None:
+            logger.error("Failed to parse streamed AI response")
+            return {}
+        return parser.result
 
     def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse AI model response."""
+        """Parse AI model response (tolerates markdown fences and surrounding prose)."""
         try:
             return json.loads(response_text)
         except json.JSONDecodeError:
-            # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
+            # Single linear scan for the first complete JSON object
+            result = parse_json_response(response_text)
+            if result is None:
                 logger.error(f"Failed to parse AI response: {response_text[:200]}")
                 return {}
+            return result
 
     def _create_recommendations(self, recommendations_data: List[Dict]) -> List[FengShuiRecommendation]:
         """Create FengShuiRecommendation objects from data."""
@@ -253,3 +296,4 @@ class WorkspaceAnalysisPipeline:
             items.extend(element_items.get(element, []))
 
         return items
+
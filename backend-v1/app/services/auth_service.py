@@ -129,8 +129,10 @@ class AuthService:
         if not user_data.get("is_active", True):
             raise InvalidCredentialsError("Account is deactivated")
 
-        # Create tokens
-        access_token = create_access_token(subject=user_data["user_id"])
+        # Create tokens (the tier claim lets rate limits apply without a user lookup;
+        # refresh tokens carry no tier, it is re-read on every refresh)
+        claims = {"tier": user_data.get("subscription_tier", "free")}
+        access_token = create_access_token(subject=user_data["user_id"], extra_claims=claims)
         refresh_token = create_refresh_token(subject=user_data["user_id"])
 
         # Update last login
@@ -152,14 +154,22 @@ class AuthService:
         """
         Refresh access token.
 
+        The tier claim is read from the user record, so a subscription
+        change applies from the next access token.
+
         Args:
             user_id: User ID from refresh token
 
         Returns:
             New access token
+
+        Raises:
+            InvalidCredentialsError: If the user no longer exists or is deactivated
         """
-        # Create new access token
-        access_token = create_access_token(subject=user_id)
+        user = await self.users_repo.get_user_by_id(user_id)
+        if user is None or not user.is_active:
+            raise InvalidCredentialsError("Account not found or deactivated")
+        access_token = create_access_token(subject=user_id, extra_claims={"tier": user.subscription_tier})
 
         logger.info(f"Access token refreshed for user: {user_id}")
 
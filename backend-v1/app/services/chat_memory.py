@@ -0,0 +1,537 @@
+"""
+Chat session memory.
+
+Each chat session keeps a ring buffer of its most recent turns plus a
+compressed memory block: once enough turns have accumulated beyond the
+recent window, the older ones are summarized (by the model, or
+extractively without one) in a background task and folded into the block,
+so the request path never waits for a summary. The context for a turn is
+one backend read of bounded size: the cached session prefix (system
+instruction + profile/report block), the compressed memory and at most
+``buffer_turns`` recent turns, whatever the length of the conversation.
+
+``MemoryChatMemoryBackend`` keeps sessions in process (single node and
+tests); ``RedisChatMemoryBackend`` shares them across instances. Both also
+count messages per user and day for the free tier's
+``FREE_CHAT_MESSAGES_PER_DAY`` quota.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.errors import QuotaExceededError
+from app.core.logging import get_logger
+from app.core.metrics import counter
+from app.core.redis import get_redis
+from app.prompts.base import PromptParts
+from app.prompts.workspace_chatbot_prompt import workspace_chatbot_system_instruction
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+CHAT_MEMORY_COMPRESSIONS = counter(
+    "chat_memory_compressions_total",
+    "Background compressions of older chat turns",
+    ("status",),
+)
+
+# Compressed memory is kept under this many characters
+SUMMARY_MAX_CHARS = 800
+
+# Characters of each user message kept by the extractive summarizer
+EXTRACT_CHARS_PER_TURN = 60
+
+SYSTEM_INSTRUCTION = "\n".join(part["text"] for part in workspace_chatbot_system_instruction["parts"])
+
+SUMMARY_PROMPT = """请将以下风水咨询对话压缩为一段不超过{max_chars}字的记忆摘要，保留用户的问题、已给出的关键建议和用户的偏好或约束，不要加入新的建议。
+
+已有摘要：
+{summary}
+
+新增对话：
+{turns}
+
+只输出摘要正文。"""
+
+
+@dataclass(frozen=True)
+class ChatTurn:
+    """One message of a chat session."""
+    role: str  # "user" or "model"
+    text: str
+    seq: int = 0  # Position in the session (1-based, assigned by the backend)
+
+    def to_json(self) -> str:
+        return json.dumps({"role": self.role, "text": self.text}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str, seq: int) -> "ChatTurn":
+        payload = json.loads(data)
+        return cls(role=payload["role"], text=payload["text"], seq=seq)
+
+
+@dataclass
+class SessionMemory:
+    """Stored state of a chat session."""
+    turns: List[ChatTurn] = field(default_factory=list)  # Ring buffer contents, oldest first
+    seq: int = 0  # Turns appended so far
+    summary: str = ""  # Compressed memory of turns up to ``summarized_through``
+    summarized_through: int = 0
+    context: str = ""  # Profile/report block for the system instruction
+
+    @property
+    def unsummarized(self) -> List[ChatTurn]:
+        """Buffered turns not yet folded into the summary."""
+        return [turn for turn in self.turns if turn.seq > self.summarized_through]
+
+
+Summarizer = Callable[[str, Sequence[ChatTurn]], Awaitable[str]]
+
+
+def _render_turns(turns: Sequence[ChatTurn]) -> str:
+    return "\n".join(f"{'用户' if turn.role == 'user' else '顾问'}：{turn.text}" for turn in turns)
+
+
+@lru_cache(maxsize=1024)
+def _session_prefix(context: str) -> Tuple[str, str]:
+    """System instruction for a session's context block, with its prefix ID (cached per block)."""
+    prefix = f"{SYSTEM_INSTRUCTION}\n\n用户档案与报告：\n{context}" if context else SYSTEM_INSTRUCTION
+    return prefix, hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+def build_chat_prompt(memory: SessionMemory, question: str) -> PromptParts:
+    """
+    Assemble the prompt for a new user message.
+
+    Args:
+        memory: Session state (from ``ChatMemoryBackend.load``)
+        question: The user's message
+
+    Returns:
+        PromptParts: the session prefix (send as system instruction) and a
+        suffix with the compressed memory, recent turns and the question
+    """
+    prefix, prefix_id = _session_prefix(memory.context)
+    sections = []
+    if memory.summary:
+        sections.append(f"对话摘要：\n{memory.summary}")
+    recent = memory.unsummarized
+    if recent:
+        sections.append(f"最近对话：\n{_render_turns(recent)}")
+    sections.append(f"用户：{question}")
+    return PromptParts(prefix=prefix, suffix="\n\n".join(sections), prefix_id=prefix_id)
+
+
+async def extractive_summarizer(summary: str, turns: Sequence[ChatTurn]) -> str:
+    """Summarizer without a model: keeps the start of each user message."""
+    questions = [turn.text[:EXTRACT_CHARS_PER_TURN] for turn in turns if turn.role == "user"]
+    merged = "；".join(part for part in (summary, *questions) if part)
+    # Keep the most recent part when over the limit
+    return merged[-SUMMARY_MAX_CHARS:]
+
+
+async def model_summarizer(summary: str, turns: Sequence[ChatTurn]) -> str:
+    """Summarizer using the configured model (extractive when none is configured)."""
+    from app.services.ai.model_client import get_model_client
+
+    client = get_model_client()
+    if client is None:
+        return await extractive_summarizer(summary, turns)
+    prompt = SUMMARY_PROMPT.format(max_chars=SUMMARY_MAX_CHARS, summary=summary or "（无）", turns=_render_turns(turns))
+    text = await client.generate(prompt, response_mime_type="text/plain", timeout_budget=60.0)
+    return text.strip()[:SUMMARY_MAX_CHARS]
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%d")
+
+
+class ChatMemoryBackend(ABC):
+    """Storage for chat sessions and daily message counters."""
+
+    @abstractmethod
+    async def append(self, session_id: str, turns: Sequence[ChatTurn], max_turns: int, ttl_seconds: int) -> int:
+        """
+        Append turns to a session's ring buffer.
+
+        Args:
+            session_id: Chat session ID
+            turns: New turns, oldest first
+            max_turns: Ring buffer size
+            ttl_seconds: Session expiry (refreshed on every append)
+
+        Returns:
+            Total turns appended to the session so far
+        """
+
+    @abstractmethod
+    async def load(self, session_id: str) -> SessionMemory:
+        """Read a session (empty if unknown or expired)."""
+
+    @abstractmethod
+    async def set_summary(self, session_id: str, summary: str, summarized_through: int) -> bool:
+        """
+        Store a compressed memory block.
+
+        Returns:
+            False if the stored summary already covers ``summarized_through``
+            (another compression got there first)
+        """
+
+    @abstractmethod
+    async def set_context(self, session_id: str, context: str, ttl_seconds: int) -> None:
+        """Store the session's profile/report block."""
+
+    @abstractmethod
+    async def incr_daily_count(self, user_id: str, day: str) -> int:
+        """Count a message for a user on a UTC day (``YYYYMMDD``); returns the day's count."""
+
+
+class _Session:
+    __slots__ = ("turns", "seq", "summary", "summarized_through", "context", "expires_at")
+
+    def __init__(self, max_turns: Optional[int]):
+        self.turns: Deque[str] = deque(maxlen=max_turns)
+        self.seq = 0
+        self.summary = ""
+        self.summarized_through = 0
+        self.context = ""
+        self.expires_at = 0.0
+
+
+class MemoryChatMemoryBackend(ChatMemoryBackend):
+    """
+    In-process backend (single node and tests).
+
+    Operations never await, so each is atomic on the event loop. Sessions
+    are kept in LRU order and the least recently used is dropped beyond
+    ``max_sessions``.
+    """
+
+    def __init__(self, max_sessions: int = 10_000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._daily_counts: Dict[Tuple[str, str], int] = {}
+
+    def _get(self, session_id: str, create: bool = False) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is not None and session.expires_at <= time.monotonic():
+            del self._sessions[session_id]
+            session = None
+        if session is None and create:
+            # Buffer size is set by the first append
+            session = self._sessions[session_id] = _Session(max_turns=None)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    async def append(self, session_id: str, turns: Sequence[ChatTurn], max_turns: int, ttl_seconds: int) -> int:
+        session = self._get(session_id, create=True)
+        if session.turns.maxlen != max_turns:
+            session.turns = deque(session.turns, maxlen=max_turns)
+        session.turns.extend(turn.to_json() for turn in turns)
+        session.seq += len(turns)
+        session.expires_at = time.monotonic() + ttl_seconds
+        return session.seq
+
+    async def load(self, session_id: str) -> SessionMemory:
+        session = self._get(session_id)
+        if session is None:
+            return SessionMemory()
+        first = session.seq - len(session.turns) + 1
+        return SessionMemory(
+            turns=[ChatTurn.from_json(data, first + i) for i, data in enumerate(session.turns)],
+            seq=session.seq,
+            summary=session.summary,
+            summarized_through=session.summarized_through,
+            context=session.context,
+        )
+
+    async def set_summary(self, session_id: str, summary: str, summarized_through: int) -> bool:
+        session = self._get(session_id)
+        if session is None or summarized_through <= session.summarized_through:
+            return False
+        session.summary = summary
+        session.summarized_through = summarized_through
+        return True
+
+    async def set_context(self, session_id: str, context: str, ttl_seconds: int) -> None:
+        session = self._get(session_id, create=True)
+        session.context = context
+        session.expires_at = max(session.expires_at, time.monotonic() + ttl_seconds)
+
+    async def incr_daily_count(self, user_id: str, day: str) -> int:
+        key = (user_id, day)
+        if key not in self._daily_counts:
+            # Counters of previous days are no longer needed
+            for stale in [k for k in self._daily_counts if k[1] < day]:
+                del self._daily_counts[stale]
+        count = self._daily_counts[key] = self._daily_counts.get(key, 0) + 1
+        return count
+
+
+# KEYS[1] = session meta hash; ARGV = summary, summarized_through.
+# Only moves the summary forward, so a late compression can't overwrite a newer one.
+SET_SUMMARY_LUA = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'summarized_through') or '0')
+if tonumber(ARGV[2]) <= current or redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'summary', ARGV[1], 'summarized_through', ARGV[2])
+return 1
+"""
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class RedisChatMemoryBackend(ChatMemoryBackend):
+    """
+    Redis backend (shared across instances).
+
+    A session is a list of turns (trimmed to the ring buffer size) and a
+    hash with the turn counter, summary and context block. Appends and
+    loads are one MULTI round trip each.
+    """
+
+    def __init__(self, redis, prefix: str = "chat:"):
+        """
+        Initialize backend.
+
+        Args:
+            redis: ``redis.asyncio.Redis`` client
+            prefix: Key prefix
+        """
+        self._redis = redis
+        self._prefix = prefix
+        self._set_summary = redis.register_script(SET_SUMMARY_LUA)
+
+    def _keys(self, session_id: str) -> Tuple[str, str]:
+        return f"{self._prefix}{session_id}:turns", f"{self._prefix}{session_id}:meta"
+
+    async def append(self, session_id: str, turns: Sequence[ChatTurn], max_turns: int, ttl_seconds: int) -> int:
+        turns_key, meta_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(turns_key, *(turn.to_json() for turn in turns))
+            pipe.ltrim(turns_key, -max_turns, -1)
+            pipe.hincrby(meta_key, "seq", len(turns))
+            pipe.expire(turns_key, ttl_seconds)
+            pipe.expire(meta_key, ttl_seconds)
+            results = await pipe.execute()
+        return int(results[2])
+
+    async def load(self, session_id: str) -> SessionMemory:
+        turns_key, meta_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(turns_key, 0, -1)
+            pipe.hgetall(meta_key)
+            raw_turns, raw_meta = await pipe.execute()
+
+        meta = {_decode(key): _decode(value) for key, value in raw_meta.items()}
+        seq = int(meta.get("seq", 0))
+        first = seq - len(raw_turns) + 1
+        return SessionMemory(
+            turns=[ChatTurn.from_json(_decode(data), first + i) for i, data in enumerate(raw_turns)],
+            seq=seq,
+            summary=meta.get("summary", ""),
+            summarized_through=int(meta.get("summarized_through", 0)),
+            context=meta.get("context", ""),
+        )
+
+    async def set_summary(self, session_id: str, summary: str, summarized_through: int) -> bool:
+        _, meta_key = self._keys(session_id)
+        return bool(await self._set_summary(keys=[meta_key], args=[summary, summarized_through]))
+
+    async def set_context(self, session_id: str, context: str, ttl_seconds: int) -> None:
+        turns_key, meta_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(meta_key, "context", context)
+            pipe.expire(meta_key, ttl_seconds)
+            pipe.expire(turns_key, ttl_seconds)
+            await pipe.execute()
+
+    async def incr_daily_count(self, user_id: str, day: str) -> int:
+        key = f"{self._prefix}quota:{user_id}:{day}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, 2 * 86400)
+            count, _ = await pipe.execute()
+        return int(count)
+
+
+class ChatMemory:
+    """Chat session memory with background compression of older turns."""
+
+    def __init__(
+        self,
+        backend: ChatMemoryBackend,
+        summarizer: Summarizer = model_summarizer,
+        recent_turns: int = 8,
+        summarize_batch: int = 8,
+        buffer_turns: int = 24,
+        ttl_seconds: int = 7 * 86400,
+    ):
+        """
+        Initialize chat memory.
+
+        Args:
+            backend: Session storage
+            summarizer: Folds turns into the previous summary
+            recent_turns: Turns always kept verbatim in the context
+            summarize_batch: Unsummarized turns beyond ``recent_turns`` that trigger a compression
+            buffer_turns: Ring buffer size (turns not yet summarized when they fall out are lost)
+            ttl_seconds: Session expiry after the last message
+        """
+        self.backend = backend
+        self.summarizer = summarizer
+        self.recent_turns = recent_turns
+        self.summarize_batch = summarize_batch
+        self.buffer_turns = max(buffer_turns, recent_turns + summarize_batch)
+        self.ttl_seconds = ttl_seconds
+        self._compressions: Dict[str, asyncio.Task] = {}
+
+    async def prompt_for(self, session_id: str, question: str) -> PromptParts:
+        """
+        Build the prompt for a user message from the session's memory.
+
+        Args:
+            session_id: Chat session ID
+            question: The user's message
+
+        Returns:
+            PromptParts (see ``build_chat_prompt``)
+        """
+        return build_chat_prompt(await self.backend.load(session_id), question)
+
+    async def record_exchange(self, session_id: str, question: str, answer: str) -> None:
+        """
+        Append a question and its answer, compressing older turns in the background when due.
+
+        Args:
+            session_id: Chat session ID
+            question: The user's message
+            answer: The model's reply
+        """
+        seq = await self.backend.append(
+            session_id,
+            (ChatTurn("user", question), ChatTurn("model", answer)),
+            self.buffer_turns,
+            self.ttl_seconds,
+        )
+        if self._crossed_batch(seq - 2, seq) and session_id not in self._compressions:
+            task = asyncio.create_task(self._compress(session_id))
+            self._compressions[session_id] = task
+            task.add_done_callback(lambda _: self._compressions.pop(session_id, None))
+
+    async def set_session_context(self, session_id: str, context: str) -> None:
+        """
+        Set the profile/report block included in the session's system instruction.
+
+        Args:
+            session_id: Chat session ID
+            context: Profile and report digest (stable for the session, so the prefix stays cacheable)
+        """
+        await self.backend.set_context(session_id, context, self.ttl_seconds)
+
+    async def consume_daily_message(self, user_id: str, tier: str) -> Optional[int]:
+        """
+        Count a chat message against the user's daily quota.
+
+        Args:
+            user_id: User ID
+            tier: Subscription tier (Pro is unlimited)
+
+        Returns:
+            Messages left today, or None if unlimited
+
+        Raises:
+            QuotaExceededError: If the free daily quota is used up
+        """
+        if tier == "pro":
+            return None
+        limit = settings.free_chat_messages_per_day
+        count = await self.backend.incr_daily_count(user_id, _today())
+        if count > limit:
+            raise QuotaExceededError("chat messages", limit, period="daily")
+        return limit - count
+
+    def _crossed_batch(self, before: int, after: int) -> bool:
+        """Whether another ``summarize_batch`` turns beyond the recent window were appended."""
+        past_window = after - self.recent_turns
+        return past_window >= self.summarize_batch and (
+            past_window // self.summarize_batch != (before - self.recent_turns) // self.summarize_batch
+        )
+
+    async def _compress(self, session_id: str) -> None:
+        """Fold unsummarized turns older than the recent window into the summary."""
+        try:
+            memory = await self.backend.load(session_id)
+            pending = memory.unsummarized
+            if len(pending) < self.recent_turns + self.summarize_batch:
+                return
+            older = pending[:-self.recent_turns]
+            if older[0].seq > memory.summarized_through + 1:
+                logger.warning(
+                    f"Chat session {session_id} lost turns {memory.summarized_through + 1}-{older[0].seq - 1} "
+                    f"before compression"
+                )
+
+            summary = await self.summarizer(memory.summary, older)
+            stored = await self.backend.set_summary(session_id, summary, older[-1].seq)
+            CHAT_MEMORY_COMPRESSIONS.inc("ok" if stored else "superseded")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Turns stay in the buffer and are retried with the next batch
+            CHAT_MEMORY_COMPRESSIONS.inc("failed")
+            logger.warning(f"Chat memory compression failed for session {session_id}: {e}")
+
+    async def aclose(self) -> None:
+        """Cancel running compressions (their turns are compressed again later)."""
+        tasks = list(self._compressions.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_memory: Optional[ChatMemory] = None
+
+
+def get_chat_memory() -> ChatMemory:
+    """Get the process-wide chat memory (Redis-backed if enabled and configured)."""
+    global _memory
+    if _memory is None:
+        redis = get_redis() if settings.chat_memory_backend == "redis" else None
+        if redis is not None:
+            backend: ChatMemoryBackend = RedisChatMemoryBackend(redis)
+        else:
+            if settings.chat_memory_backend == "redis":
+                logger.warning("CHAT_MEMORY_BACKEND=redis but REDIS_URL is not set; using in-memory chat sessions")
+            backend = MemoryChatMemoryBackend()
+        _memory = ChatMemory(
+            backend,
+            recent_turns=settings.chat_recent_turns,
+            summarize_batch=settings.chat_summarize_batch,
+            buffer_turns=settings.chat_buffer_turns,
+            ttl_seconds=settings.chat_session_ttl_seconds,
+        )
+    return _memory
+
+
+async def close_chat_memory() -> None:
+    """Stop background compressions (called on application shutdown)."""
+    global _memory
+    if _memory is not None:
+        await _memory.aclose()
+        _memory = None
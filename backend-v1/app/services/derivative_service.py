@@ -0,0 +1,158 @@
+"""
+Display-size derivatives (thumbnails) of uploaded media.
+
+Derivatives are rendered lazily on first request in a worker process pool,
+stored next to the original as ``users/{uid}/media/{media_id}_{size}.webp``
+and served through signed URLs like the original. Concurrent requests for
+the same missing derivative share one rendering.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+from app.core.errors import NotFoundError, ValidationError
+from app.models.media import MediaStatus
+from app.repositories.media_repo import MediaRepository
+from app.services.object_store import get_object_store
+from app.services.signed_url_cache import get_signed_url_cache
+from app.services.url_signer import get_url_signer
+from app.utils.images import render_derivative
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Supported derivative sizes (longest side, pixels)
+DERIVATIVE_SIZES = (128, 512, 1024)
+
+DERIVATIVE_QUALITY = 80
+DERIVATIVE_URL_EXPIRES_SECONDS = 3600
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Renderings in progress, keyed by derivative path (single-flight)
+_inflight: Dict[str, "asyncio.Future[None]"] = {}
+
+
+def derivative_path(user_id: str, media_id: str, size: int) -> str:
+    """Object path of a derivative."""
+    return f"users/{user_id}/media/{media_id}_{size}.webp"
+
+
+class DerivativeService:
+    """Service for lazily generated media derivatives."""
+
+    def __init__(self):
+        """Initialize derivative service."""
+        self.store = get_object_store()
+
+    async def get_derivative_url(self, media_id: str, user_id: str, size: int) -> dict:
+        """
+        Get a signed URL for a derivative, rendering it on first request.
+
+        Args:
+            media_id: Media ID
+            user_id: User ID (for ownership check)
+            size: Longest side in pixels (one of DERIVATIVE_SIZES)
+
+        Returns:
+            Signed download URL of the derivative
+
+        Raises:
+            ValidationError: If the size is not supported
+            NotFoundError: If the original media is not found
+        """
+        if size not in DERIVATIVE_SIZES:
+            raise ValidationError(
+                message="Unsupported derivative size",
+                details={"supported_sizes": list(DERIVATIVE_SIZES)}
+            )
+
+        # Derivatives share the signed URL cache under their own key
+        cache_key = f"{media_id}@{size}"
+        url_cache = get_signed_url_cache()
+        signed = (await url_cache.get_many(user_id, [cache_key])).get(cache_key)
+
+        if signed is None:
+            path = derivative_path(user_id, media_id, size)
+            if await self.store.find(path) is None:
+                await self._render_once(path, media_id, user_id, size)
+            signed = await get_url_signer().sign(path, "GET", DERIVATIVE_URL_EXPIRES_SECONDS)
+            await url_cache.set_many(user_id, {cache_key: signed})
+
+        return {
+            "media_id": media_id,
+            "size": size,
+            "download_url": signed.url,
+            "expires_in": signed.expires_in()
+        }
+
+    async def delete_derivatives(self, media_id: str, user_id: str) -> None:
+        """Delete all derivatives of a media item."""
+        url_cache = get_signed_url_cache()
+        for size in DERIVATIVE_SIZES:
+            await self.store.delete(derivative_path(user_id, media_id, size))
+            await url_cache.invalidate(f"{media_id}@{size}", user_id)
+
+    async def _render_once(self, path: str, media_id: str, user_id: str, size: int) -> None:
+        """Render a derivative, joining an in-flight rendering of the same path."""
+        pending = _inflight.get(path)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        _inflight[path] = future
+        try:
+            await self._render(path, media_id, user_id, size)
+            future.set_result(None)
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters receive the error; mark it retrieved so it isn't logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del _inflight[path]
+
+    async def _render(self, path: str, media_id: str, user_id: str, size: int) -> None:
+        """Read the original, render in the worker pool and store the result."""
+        media = await MediaRepository().get_media(user_id, media_id)
+        original = None
+        if media is not None and media.status == MediaStatus.READY:
+            original = await self.store.read(media.gcs_path)
+        if original is None:
+            raise NotFoundError("Media", media_id)
+
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(
+                _get_executor(),
+                partial(render_derivative, original, size, DERIVATIVE_QUALITY)
+            )
+        except ValueError:
+            raise ValidationError("Media is not a decodable image", details={"media_id": media_id})
+
+        await self.store.write(path, data, "image/webp")
+        logger.info(f"Derivative rendered: {path} ({len(original)} -> {len(data)} bytes)")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the rendering pool on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.derivative_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def close_derivative_pool() -> None:
+    """Shut down the rendering pool (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,153 @@
+"""
+Near-duplicate index over committed media.
+
+Each user's pHashes live in a BK-tree so a newly committed image can be
+matched against everything they uploaded before in sub-linear time. Other
+instances commit uploads too, so a user's entries are reloaded from the
+stored hashes once they are older than ``USER_INDEX_TTL_SECONDS``.
+"""
+import time
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.utils.image_hash import BKTree, ImageHashes, hamming_distance
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Max Hamming distances (of 64 bits) for two images to count as the same shot
+NEAR_DUPLICATE_PHASH_DISTANCE = 6
+NEAR_DUPLICATE_DHASH_DISTANCE = 12
+
+# A user's indexed media are reloaded from storage after this long
+USER_INDEX_TTL_SECONDS = 60.0
+
+
+def is_near_duplicate(a: ImageHashes, b: ImageHashes) -> bool:
+    """Whether two images are near-identical (pHash match confirmed by dHash)."""
+    return (
+        hamming_distance(a.phash, b.phash) <= NEAR_DUPLICATE_PHASH_DISTANCE
+        and hamming_distance(a.dhash, b.dhash) <= NEAR_DUPLICATE_DHASH_DISTANCE
+    )
+
+
+class MediaHashIndex:
+    """
+    Per-user perceptual hash index.
+
+    BK-trees do not support deletion; removed media are dropped from the
+    hash map and the user's media set, and their tree entries are filtered
+    out of search results lazily until the next reload rebuilds the tree.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_INDEX_TTL_SECONDS):
+        """
+        Initialize index.
+
+        Args:
+            ttl_seconds: Age after which a user's media must be reloaded
+        """
+        self.ttl_seconds = ttl_seconds
+        self._trees: Dict[str, BKTree[str]] = {}
+        self._hashes: Dict[str, ImageHashes] = {}
+        self._user_media: Dict[str, Set[str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def add(self, user_id: str, media_id: str, hashes: ImageHashes) -> None:
+        """
+        Index a committed media item.
+
+        Args:
+            user_id: Owner user ID
+            media_id: Media ID
+            hashes: Perceptual hashes
+        """
+        if media_id in self._hashes:
+            return
+        self._hashes[media_id] = hashes
+        self._trees.setdefault(user_id, BKTree()).add(hashes.phash, media_id)
+        self._user_media.setdefault(user_id, set()).add(media_id)
+
+    def needs_load(self, user_id: str) -> bool:
+        """Whether a user's media were never loaded or were loaded more than ``ttl_seconds`` ago."""
+        loaded_at = self._loaded_at.get(user_id)
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl_seconds
+
+    def load_user(self, user_id: str, hashes: Dict[str, ImageHashes]) -> None:
+        """
+        Replace a user's indexed media with their stored media.
+
+        Picks up media committed (or deleted) on other instances.
+
+        Args:
+            user_id: Owner user ID
+            hashes: Media ID -> perceptual hashes
+        """
+        for media_id in self._user_media.pop(user_id, ()):
+            self._hashes.pop(media_id, None)
+        self._trees[user_id] = BKTree()
+        for media_id, media_hashes in hashes.items():
+            self.add(user_id, media_id, media_hashes)
+        self._loaded_at[user_id] = time.monotonic()
+        logger.debug(f"Loaded {len(hashes)} media hash(es) for user {user_id}")
+
+    def get(self, media_id: str) -> Optional[ImageHashes]:
+        """Get indexed hashes for a media item."""
+        return self._hashes.get(media_id)
+
+    def remove(self, user_id: str, media_id: str) -> None:
+        """Forget a media item (e.g. after deletion); its tree entry is skipped from then on."""
+        self._hashes.pop(media_id, None)
+        self._user_media.get(user_id, set()).discard(media_id)
+
+    def find_duplicate(
+        self,
+        user_id: str,
+        hashes: ImageHashes,
+        exclude: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Find the closest near-duplicate among a user's media.
+
+        Args:
+            user_id: Owner user ID
+            hashes: Hashes of the candidate image
+            exclude: Media ID to ignore (the candidate itself)
+
+        Returns:
+            Media ID of the closest near-duplicate, or None
+        """
+        tree = self._trees.get(user_id)
+        if tree is None:
+            return None
+
+        for _, media_id in tree.search(hashes.phash, NEAR_DUPLICATE_PHASH_DISTANCE):
+            existing = self._hashes.get(media_id)
+            if media_id != exclude and existing is not None and is_near_duplicate(hashes, existing):
+                return media_id
+        return None
+
+
+def find_duplicate_pairs(hashes: Dict[str, ImageHashes]) -> List[Tuple[str, str]]:
+    """
+    Find near-identical pairs within a group of media (e.g. a lookaround set).
+
+    Args:
+        hashes: Media ID -> perceptual hashes (media without hashes are left out)
+
+    Returns:
+        Pairs of near-duplicate media IDs
+    """
+    return [
+        (a_id, b_id)
+        for (a_id, a), (b_id, b) in combinations(hashes.items(), 2)
+        if is_near_duplicate(a, b)
+    ]
+
+
+_index = MediaHashIndex()
+
+
+def get_media_hash_index() -> MediaHashIndex:
+    """Get the process-wide media hash index."""
+    return _index
@@ -1,12 +1,21 @@
 """
 Media upload and management service.
 """
-from typing import Optional, List
+import asyncio
+from typing import Dict, Optional, List
 from datetime import datetime, timedelta
 
 from app.core.config import get_settings
-from app.core.errors import ValidationError, NotFoundError
+from app.core.errors import APIError, ValidationError, NotFoundError
+from app.services.derivative_service import DerivativeService
+from app.models.media import MediaMetadata, MediaStatus
+from app.repositories.media_repo import MediaRepository
+from app.services.media_hash_index import find_duplicate_pairs, get_media_hash_index
+from app.services.object_store import get_object_store
+from app.services.signed_url_cache import get_signed_url_cache
+from app.services.url_signer import SignRequest, get_url_signer
 from app.utils.ids import generate_prefixed_id
+from app.utils.image_hash import ImageHashes, compute_image_hashes
 from app.core.logging import get_logger
 
 settings = get_settings()
@@ -15,17 +24,19 @@ logger = get_logger(__name__)
 # Allowed file types
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/jpg", "image/webp"}
 
+# Signed URL lifetimes (seconds)
+UPLOAD_URL_EXPIRES_SECONDS = 900
+DOWNLOAD_URL_EXPIRES_SECONDS = 3600
+
 
 class MediaService:
     """Service for media upload and management."""
 
     def __init__(self):
         """Initialize media service."""
-        # TODO: Initialize GCS client
-        # from google.cloud import storage
-        # self.storage_client = storage.Client()
-        # self.bucket = self.storage_client.bucket(settings.gcs_bucket)
-        pass
+        # Objects are accessed through get_object_store() and URLs through get_url_signer()
+        self.media_repo = MediaRepository()
+        self.hash_index = get_media_hash_index()
 
     async def init_upload(
         self,
@@ -49,14 +60,78 @@ class MediaService:
         Raises:
             ValidationError: If file type or size invalid
         """
-        # Validate file type
+        return (await self.batch_init_uploads(user_id, [
+            {"file_type": file_type, "file_size": file_size, "file_name": file_name}
+        ]))[0]
+
+    async def batch_init_uploads(self, user_id: str, files: List[dict]) -> List[dict]:
+        """
+        Initialize several uploads and sign all upload URLs in one pass.
+
+        Args:
+            user_id: User ID
+            files: File specs with file_type, file_size and optional file_name
+
+        Returns:
+            Media IDs and signed upload URLs, in request order
+
+        Raises:
+            ValidationError: If any file type or size is invalid (nothing is created)
+        """
+        for spec in files:
+            self._validate_upload(spec["file_type"], spec["file_size"])
+
+        uploads = []
+        for spec in files:
+            media_id = generate_prefixed_id("media")
+            extension = spec["file_type"].split("/")[1]
+            uploads.append((media_id, f"users/{user_id}/media/{media_id}.{extension}", spec))
+
+        signed_urls = await get_url_signer().sign_many([
+            SignRequest(path=path, method="PUT", expires_in=UPLOAD_URL_EXPIRES_SECONDS, content_type=spec["file_type"])
+            for _, path, spec in uploads
+        ])
+
+        now = datetime.utcnow()
+        await self.media_repo.create_media_batch([{
+            "media_id": media_id,
+            "user_id": user_id,
+            "file_name": spec.get("file_name"),
+            "file_type": spec["file_type"],
+            "file_size": spec["file_size"],
+            "gcs_path": gcs_path,
+            "status": MediaStatus.PENDING.value,
+            "created_at": now
+        } for media_id, gcs_path, spec in uploads])
+
+        logger.info(f"Media upload initiated: {len(uploads)} file(s) for user {user_id}")
+
+        return [
+            {
+                "media_id": media_id,
+                "upload_url": signed.url,
+                "method": "PUT",
+                "headers": {
+                    "Content-Type": spec["file_type"]
+                },
+                "expires_in": signed.expires_in()
+            }
+            for (media_id, _, spec), signed in zip(uploads, signed_urls)
+        ]
+
+    def _validate_upload(self, file_type: str, file_size: int) -> None:
+        """
+        Validate an upload's type and size.
+
+        Raises:
+            ValidationError: If file type or size invalid
+        """
         if file_type not in ALLOWED_IMAGE_TYPES:
             raise ValidationError(
                 message="Invalid file type",
                 details={"allowed_types": list(ALLOWED_IMAGE_TYPES)}
             )
 
-        # Validate file size
         max_size = settings.max_image_size_mb * 1024 * 1024
         if file_size > max_size:
             raise ValidationError(
@@ -64,55 +139,14 @@ class MediaService:
                 details={"max_size_mb": settings.max_image_size_mb}
             )
 
-        # Generate media ID and path
-        media_id = generate_prefixed_id("media")
-        extension = file_type.split("/")[1]
-        gcs_path = f"users/{user_id}/media/{media_id}.{extension}"
-
-        # TODO: Generate signed URL for GCS upload
-        # blob = self.bucket.blob(gcs_path)
-        # signed_url = blob.generate_signed_url(
-        #     version="v4",
-        #     expiration=timedelta(minutes=15),
-        #     method="PUT",
-        #     content_type=file_type
-        # )
-
-        # Mock signed URL
-        signed_url = f"https://storage.googleapis.com/{settings.gcs_bucket}/{gcs_path}?upload_token=mock"
-
-        # TODO: Save media metadata to database
-        # media_metadata = {
-        #     "media_id": media_id,
-        #     "user_id": user_id,
-        #     "file_name": file_name,
-        #     "file_type": file_type,
-        #     "file_size": file_size,
-        #     "gcs_path": gcs_path,
-        #     "status": "pending",
-        #     "created_at": datetime.utcnow()
-        # }
-        # await self.media_repo.create_media(media_metadata)
-
-        logger.info(f"Media upload initiated: {media_id} for user {user_id}")
-
-        return {
-            "media_id": media_id,
-            "upload_url": signed_url,
-            "method": "PUT",
-            "headers": {
-                "Content-Type": file_type
-            },
-            "expires_in": 900
-        }
-
-    async def commit_upload(self, media_id: str, user_id: str) -> dict:
+    async def commit_upload(self, media_id: str, user_id: str, data: Optional[bytes] = None) -> dict:
         """
         Confirm upload completion.
 
         Args:
             media_id: Media ID
             user_id: User ID
+            data: Stored file content, if the caller already read it
 
         Returns:
             Media status
@@ -121,40 +155,159 @@ class MediaService:
             NotFoundError: If media not found
             ValidationError: If media not in pending state
         """
-        # TODO: Verify upload in GCS
-        # TODO: Update status to 'ready'
+        media = await self.media_repo.get_media(user_id, media_id)
+        if media is None:
+            raise NotFoundError("Media", media_id)
+        if media.status != MediaStatus.PENDING:
+            raise ValidationError(
+                message="Media is not pending upload",
+                details={"media_id": media_id, "status": media.status.value}
+            )
 
-        logger.info(f"Media upload committed: {media_id}")
+        if data is None:
+            data = await get_object_store().read(media.gcs_path)
+        if data is None:
+            raise ValidationError("Upload not found in storage", details={"media_id": media_id})
+
+        # Perceptual hashes let re-shot or re-used photos be recognized
+        duplicate_of = None
+        hashes = await self._compute_hashes(media_id, data)
+        if hashes:
+            await self._ensure_hash_index(user_id)
+            duplicate_of = self.hash_index.find_duplicate(user_id, hashes, exclude=media_id)
+
+        await self.media_repo.update_media(user_id, media_id, {
+            "status": MediaStatus.READY.value,
+            "hashes": hashes.to_dict() if hashes else None,
+            "duplicate_of": duplicate_of
+        })
+        # Indexed only once stored as ready, so no commit matches a still-pending media
+        if hashes:
+            self.hash_index.add(user_id, media_id, hashes)
+
+        logger.info(f"Media upload committed: {media_id}" + (f" (near-duplicate of {duplicate_of})" if duplicate_of else ""))
 
         return {
             "media_id": media_id,
-            "status": "ready"
+            "status": "ready",
+            "duplicate_of": duplicate_of
+        }
+
+    async def batch_commit_uploads(
+        self,
+        user_id: str,
+        media_ids: List[str],
+        set_type: Optional[str] = None
+    ) -> dict:
+        """
+        Confirm several uploads, optionally grouping them into a media set.
+
+        Each upload is committed on its own, so one failure does not undo the
+        others: every media gets its own result ("ready", or "failed" with the
+        error), and the client retries only the failed ones. The media set is
+        created only once every media is committed.
+
+        Args:
+            user_id: User ID
+            media_ids: Media IDs
+            set_type: If given, create a media set of this type from the media
+
+        Returns:
+            Per-media commit results and the media set (if created)
+
+        Raises:
+            NotFoundError: If a set member is not found
+            ValidationError: If the media set is invalid
+        """
+        outcomes = await asyncio.gather(
+            *(self.commit_upload(media_id, user_id) for media_id in media_ids),
+            return_exceptions=True
+        )
+
+        results = []
+        for media_id, outcome in zip(media_ids, outcomes):
+            if not isinstance(outcome, BaseException):
+                results.append(outcome)
+                continue
+            if not isinstance(outcome, Exception):
+                # Cancellation (or exit) is not a per-item failure
+                raise outcome
+            if isinstance(outcome, APIError):
+                error = {"code": outcome.code, "message": outcome.message}
+            else:
+                logger.error(f"Media upload commit failed: {media_id}", exc_info=outcome)
+                error = {"code": "INTERNAL_ERROR", "message": "An unexpected error occurred"}
+            results.append({"media_id": media_id, "status": "failed", "error": error})
+
+        media_set = None
+        if set_type and all(result["status"] == "ready" for result in results):
+            media_set = await self.create_media_set(user_id, media_ids, set_type)
+
+        return {
+            "media": results,
+            "media_set": media_set
         }
 
-    async def get_download_url(self, media_id: str, user_id: str) -> dict:
+    async def get_download_url(self, media_id: str, user_id: str, size: Optional[int] = None) -> dict:
         """
         Get signed download URL for media.
 
         Args:
             media_id: Media ID
             user_id: User ID (for ownership check)
+            size: Optional derivative size (longest side in px) instead of the original
 
         Returns:
             Signed download URL
 
         Raises:
             NotFoundError: If media not found
+            ValidationError: If the derivative size is not supported
         """
-        # TODO: Get media from database and verify ownership
-        # TODO: Generate signed download URL
+        if size is not None:
+            return await DerivativeService().get_derivative_url(media_id, user_id, size)
+        return (await self.get_download_urls([media_id], user_id))[0]
 
-        download_url = f"https://storage.googleapis.com/{settings.gcs_bucket}/mock-path/{media_id}?download_token=mock"
+    async def get_download_urls(self, media_ids: List[str], user_id: str) -> List[dict]:
+        """
+        Get signed download URLs for several media, signed in one pass.
 
-        return {
-            "media_id": media_id,
-            "download_url": download_url,
-            "expires_in": 3600
-        }
+        Args:
+            media_ids: Media IDs
+            user_id: User ID (for ownership check)
+
+        Returns:
+            Signed download URLs, in request order
+
+        Raises:
+            NotFoundError: If any media is not found
+            ValidationError: If any media is not ready
+        """
+        # Reuse URLs that still have enough validity left
+        url_cache = get_signed_url_cache()
+        signed_urls = await url_cache.get_many(user_id, media_ids)
+        missing = [media_id for media_id in dict.fromkeys(media_ids) if media_id not in signed_urls]
+
+        if missing:
+            # One batched read; media are stored under their owner, so this also checks ownership
+            media = self._require_ready(missing, await self.media_repo.get_all(user_id, missing))
+
+            fresh = await get_url_signer().sign_many([
+                SignRequest(path=media[media_id].gcs_path, method="GET", expires_in=DOWNLOAD_URL_EXPIRES_SECONDS)
+                for media_id in missing
+            ])
+            fresh_urls = dict(zip(missing, fresh))
+            await url_cache.set_many(user_id, fresh_urls)
+            signed_urls.update(fresh_urls)
+
+        return [
+            {
+                "media_id": media_id,
+                "download_url": signed_urls[media_id].url,
+                "expires_in": signed_urls[media_id].expires_in()
+            }
+            for media_id in media_ids
+        ]
 
     async def delete_media(self, media_id: str, user_id: str) -> bool:
         """
@@ -170,9 +323,15 @@ class MediaService:
         Raises:
             NotFoundError: If media not found
         """
-        # TODO: Get media and verify ownership
-        # TODO: Delete from GCS
-        # TODO: Delete from database
+        media = await self.media_repo.get_media(user_id, media_id)
+        if media is None:
+            raise NotFoundError("Media", media_id)
+
+        await get_object_store().delete(media.gcs_path)
+        await self.media_repo.delete_media(user_id, media_id)
+        self.hash_index.remove(user_id, media_id)
+        await get_signed_url_cache().invalidate(media_id, user_id)
+        await DerivativeService().delete_derivatives(media_id, user_id)
 
         logger.info(f"Media deleted: {media_id}")
         return True
@@ -195,7 +354,8 @@ class MediaService:
             Media set details
 
         Raises:
-            ValidationError: If media count doesn't match set type
+            NotFoundError: If any media is not found
+            ValidationError: If media count doesn't match set type, media are not ready or directions repeat
         """
         # Validate count based on set type
         if set_type == "lookaround8" and len(media_ids) != 8:
@@ -204,20 +364,38 @@ class MediaService:
                 details={"provided": len(media_ids), "required": 8}
             )
 
-        # TODO: Verify all media IDs belong to user
+        # Existence, ownership and status of every member in one round trip
+        membership = await self.media_repo.check_set_membership(user_id, media_ids)
+        if membership["missing"]:
+            raise NotFoundError("Media", ", ".join(membership["missing"]))
+        if membership["not_ready"]:
+            raise ValidationError(
+                message="All media must be uploaded before creating a set",
+                details={"not_ready": membership["not_ready"]}
+            )
+
+        if set_type == "lookaround8":
+            # Reject repeated directions before they cost eight model calls
+            duplicates = find_duplicate_pairs({
+                media_id: ImageHashes.from_dict(media.hashes)
+                for media_id, media in membership["media"].items()
+                if media.hashes
+            })
+            if len(set(media_ids)) != len(media_ids) or duplicates:
+                raise ValidationError(
+                    message="Lookaround8 images must each show a different direction",
+                    details={"duplicates": [list(pair) for pair in duplicates]}
+                )
 
         # Create media set
         set_id = generate_prefixed_id("mediaset")
-
-        # TODO: Save to database
-        # set_data = {
-        #     "set_id": set_id,
-        #     "user_id": user_id,
-        #     "media_ids": media_ids,
-        #     "set_type": set_type,
-        #     "created_at": datetime.utcnow()
-        # }
-        # await self.media_repo.create_media_set(set_data)
+        await self.media_repo.create_media_set({
+            "set_id": set_id,
+            "user_id": user_id,
+            "media_ids": media_ids,
+            "set_type": set_type,
+            "created_at": datetime.utcnow()
+        })
 
         logger.info(f"Media set created: {set_id} with {len(media_ids)} images")
 
@@ -241,7 +419,51 @@ class MediaService:
         Raises:
             NotFoundError: If media set not found
         """
-        # TODO: Get media set from database
-        # TODO: Generate download URLs for all media
+        media_set = await self.media_repo.get_media_set(user_id, set_id)
+        if media_set is None:
+            raise NotFoundError("Media set", set_id)
+
+        urls = await self.get_download_urls(media_set.media_ids, user_id)
+        return {
+            **media_set.model_dump(),
+            "download_urls": [u["download_url"] for u in urls],
+            "urls": urls
+        }
+
+    def _require_ready(self, media_ids: List[str], media: Dict[str, MediaMetadata]) -> Dict[str, MediaMetadata]:
+        """
+        Check that every requested media was found and is ready.
+
+        Raises:
+            NotFoundError: If any media is not found
+            ValidationError: If any media is not ready
+        """
+        for media_id in media_ids:
+            if media_id not in media:
+                raise NotFoundError("Media", media_id)
+        not_ready = [media_id for media_id in media_ids if media[media_id].status != MediaStatus.READY]
+        if not_ready:
+            raise ValidationError("Media is not ready", details={"not_ready": not_ready})
+        return media
+
+    async def _ensure_hash_index(self, user_id: str) -> None:
+        """Load a user's stored hashes into the index on first use, and again once stale."""
+        if not self.hash_index.needs_load(user_id):
+            return
+        stored = await self.media_repo.list_media_hashes(user_id)
+        self.hash_index.load_user(user_id, {
+            media_id: ImageHashes.from_dict(hashes) for media_id, hashes in stored.items()
+        })
+
+    async def _compute_hashes(self, media_id: str, data: bytes) -> Optional[ImageHashes]:
+        """
+        Compute perceptual hashes of an uploaded image.
+
+        Returns None (hashing skipped) if the image cannot be decoded.
+        """
+        try:
+            return await asyncio.to_thread(compute_image_hashes, data)
+        except Exception as e:
+            logger.warning(f"Skipping perceptual hash for {media_id}: {e}")
+            return None
 
-        raise NotFoundError("Media set", set_id)
\ No newline at end of file
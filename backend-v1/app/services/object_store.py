@@ -0,0 +1,266 @@
+"""
+Object storage backends for media.
+
+``GCSObjectStore`` streams uploads to Cloud Storage through resumable upload
+sessions; ``LocalObjectStore`` keeps objects on the filesystem and stands in
+for GCS in tests and local development.
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.errors import ExternalServiceError
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# GCS requires every non-final resumable chunk to be a multiple of 256 KiB
+GCS_CHUNK_ALIGNMENT = 256 * 1024
+
+
+class ObjectStore(ABC):
+    """Minimal object storage interface used by the media services."""
+
+    # Non-final chunks passed to ``write_chunk`` must be a multiple of this
+    chunk_alignment: int = 1
+
+    @abstractmethod
+    async def start_upload(self, path: str, content_type: str, size: int) -> str:
+        """
+        Open a resumable upload.
+
+        Args:
+            path: Object path
+            content_type: MIME type
+            size: Total object size in bytes
+
+        Returns:
+            Opaque upload session handle
+        """
+
+    @abstractmethod
+    async def write_chunk(self, session: str, data: bytes, offset: int, size: int) -> int:
+        """
+        Write a chunk at ``offset``; the chunk reaching ``size`` finalizes the object.
+
+        Args:
+            session: Handle from ``start_upload``
+            data: Chunk bytes
+            offset: Byte offset of the chunk
+            size: Total object size
+
+        Returns:
+            Number of bytes durably stored (new offset)
+        """
+
+    @abstractmethod
+    async def abort_upload(self, session: str) -> None:
+        """Discard an unfinished upload."""
+
+    async def write(self, path: str, data: bytes, content_type: str) -> None:
+        """Write a whole (small) object in one request."""
+        session = await self.start_upload(path, content_type, len(data))
+        await self.write_chunk(session, data, 0, len(data))
+
+    @abstractmethod
+    async def find(self, prefix: str) -> Optional[str]:
+        """Return the path of the first object under ``prefix``, if any."""
+
+    @abstractmethod
+    async def read(self, path: str) -> Optional[bytes]:
+        """Read a whole object, or None if it doesn't exist."""
+
+    @abstractmethod
+    async def delete(self, path: str) -> None:
+        """Delete an object (no error if missing)."""
+
+    async def aclose(self) -> None:
+        """Release connections."""
+
+
+class GCSObjectStore(ObjectStore):
+    """
+    Cloud Storage backend.
+
+    Resumable sessions are created with the storage client; chunks are then
+    PUT to the session URI (which carries its own authorization) over a
+    pooled HTTP client, so request bodies never touch disk.
+    """
+
+    chunk_alignment = GCS_CHUNK_ALIGNMENT
+
+    def __init__(self, bucket_name: str, project: Optional[str] = None):
+        """
+        Initialize GCS store.
+
+        Args:
+            bucket_name: Bucket name
+            project: GCP project ID
+        """
+        self.bucket_name = bucket_name
+        self.project = project
+        self._bucket = None
+        self._http = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+
+    def _get_bucket(self):
+        """Create the storage client on first use (client creation is slow)."""
+        if self._bucket is None:
+            from google.cloud import storage
+            self._bucket = storage.Client(project=self.project).bucket(self.bucket_name)
+        return self._bucket
+
+    async def start_upload(self, path: str, content_type: str, size: int) -> str:
+        blob = self._get_bucket().blob(path)
+        return await asyncio.to_thread(blob.create_resumable_upload_session, content_type=content_type, size=size)
+
+    async def write_chunk(self, session: str, data: bytes, offset: int, size: int) -> int:
+        end = offset + len(data) - 1
+        headers = {"Content-Range": f"bytes {offset}-{end}/{size}" if data else f"bytes */{size}"}
+        try:
+            response = await self._http.put(session, content=data, headers=headers)
+        except httpx.HTTPError as e:
+            raise ExternalServiceError("gcs", f"Chunk upload failed: {e}")
+
+        if response.status_code in (200, 201):
+            return size
+        if response.status_code == 308:
+            # Incomplete: Range reports what GCS persisted ("bytes=0-N"), absent means nothing
+            persisted = response.headers.get("Range")
+            return int(persisted.rsplit("-", 1)[1]) + 1 if persisted else 0
+        raise ExternalServiceError("gcs", f"Chunk upload failed: HTTP {response.status_code}")
+
+    async def abort_upload(self, session: str) -> None:
+        try:
+            await self._http.delete(session)
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to cancel resumable upload: {e}")
+
+    async def find(self, prefix: str) -> Optional[str]:
+        def _find() -> Optional[str]:
+            for blob in self._get_bucket().list_blobs(prefix=prefix, max_results=1):
+                return blob.name
+            return None
+        return await asyncio.to_thread(_find)
+
+    async def read(self, path: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return await asyncio.to_thread(self._get_bucket().blob(path).download_as_bytes)
+        except NotFound:
+            return None
+
+    async def delete(self, path: str) -> None:
+        from google.api_core.exceptions import NotFound
+        try:
+            await asyncio.to_thread(self._get_bucket().blob(path).delete)
+        except NotFound:
+            pass
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Filesystem backend (tests and local development).
+
+    Unfinished uploads are written to ``<path>.part`` and renamed into place
+    when the final chunk arrives.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize local store.
+
+        Args:
+            root: Root directory for objects
+        """
+        self.root = Path(root).resolve()
+
+    def _resolve(self, path: str) -> Path:
+        """Map an object path into the root, rejecting traversal."""
+        target = (self.root / path).resolve()
+        if self.root not in target.parents:
+            raise ValueError(f"Invalid object path: {path}")
+        return target
+
+    async def start_upload(self, path: str, content_type: str, size: int) -> str:
+        part = self._resolve(path + ".part")
+
+        def _create() -> None:
+            part.parent.mkdir(parents=True, exist_ok=True)
+            part.write_bytes(b"")
+
+        await asyncio.to_thread(_create)
+        return path
+
+    async def write_chunk(self, session: str, data: bytes, offset: int, size: int) -> int:
+        part = self._resolve(session + ".part")
+
+        def _write() -> int:
+            with open(part, "r+b") as f:
+                f.seek(offset)
+                f.write(data)
+                f.truncate()
+            new_offset = offset + len(data)
+            if new_offset >= size:
+                os.replace(part, self._resolve(session))
+            return new_offset
+
+        return await asyncio.to_thread(_write)
+
+    async def abort_upload(self, session: str) -> None:
+        await asyncio.to_thread(self._resolve(session + ".part").unlink, missing_ok=True)
+
+    async def find(self, prefix: str) -> Optional[str]:
+        directory, _, name_prefix = prefix.rpartition("/")
+
+        def _find() -> Optional[str]:
+            base = self._resolve(directory) if directory else self.root
+            if not base.is_dir():
+                return None
+            for entry in sorted(base.iterdir()):
+                if entry.name.startswith(name_prefix) and not entry.name.endswith(".part"):
+                    return f"{directory}/{entry.name}" if directory else entry.name
+            return None
+
+        return await asyncio.to_thread(_find)
+
+    async def read(self, path: str) -> Optional[bytes]:
+        target = self._resolve(path)
+
+        def _read() -> Optional[bytes]:
+            return target.read_bytes() if target.is_file() else None
+
+        return await asyncio.to_thread(_read)
+
+    async def delete(self, path: str) -> None:
+        await asyncio.to_thread(self._resolve(path).unlink, missing_ok=True)
+
+
+_store: Optional[ObjectStore] = None
+
+
+def get_object_store() -> ObjectStore:
+    """Get the configured object store."""
+    global _store
+    if _store is None:
+        if settings.storage_backend == "local":
+            _store = LocalObjectStore(settings.local_storage_dir)
+        else:
+            _store = GCSObjectStore(settings.gcs_bucket, project=settings.google_cloud_project)
+    return _store
+
+
+async def close_object_store() -> None:
+    """Close the object store (called on application shutdown)."""
+    global _store
+    if _store is not None:
+        await _store.aclose()
+        _store = None
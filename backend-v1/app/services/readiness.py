@@ -0,0 +1,158 @@
+"""
+Readiness probes for external dependencies.
+
+Firestore, object storage and Redis are probed concurrently, each with its
+own timeout, and the combined result is cached so frequent kubelet probes
+don't hammer the dependencies. Once the cached result is stale, it keeps
+being served while a single background refresh runs; only a result much
+older than the cache period makes a probe wait for fresh checks.
+
+A probe that times out keeps running in the background (blocking client
+calls can't be cancelled) and is awaited again by the next refresh rather
+than started twice, so a hung dependency never stacks up probe calls.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.redis import get_redis
+from app.repositories.db import get_db
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Cached results older than this many cache periods are not served while refreshing
+MAX_STALE_PERIODS = 3
+
+
+@dataclass
+class ReadinessStatus:
+    """Combined result of one round of probes."""
+    checks: Dict[str, bool]
+    errors: Dict[str, str] = field(default_factory=dict)
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def ready(self) -> bool:
+        return all(self.checks.values())
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.checked_at
+
+
+async def _probe_database() -> None:
+    """Read a (missing) document through the shared Firestore client."""
+    db = await asyncio.to_thread(get_db)
+    await asyncio.to_thread(db.collection("_readiness").document("probe").get)
+
+
+async def _probe_storage() -> None:
+    """List at most one object from the configured object store."""
+    from app.services.object_store import get_object_store
+
+    await get_object_store().find("_readiness/")
+
+
+async def _probe_cache() -> None:
+    """Ping Redis (skipped when REDIS_URL is not set)."""
+    client = get_redis()
+    if client is not None:
+        await client.ping()
+
+
+PROBES: Dict[str, Callable[[], Awaitable[None]]] = {
+    "database": _probe_database,
+    "storage": _probe_storage,
+    "cache": _probe_cache,
+}
+
+
+class ReadinessChecker:
+    """Runs dependency probes concurrently and caches the combined result."""
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], Awaitable[None]]],
+        cache_seconds: float = 5.0,
+        timeout_seconds: float = 1.0,
+    ):
+        self.probes = probes
+        self.cache_seconds = cache_seconds
+        self.timeout_seconds = timeout_seconds
+        self._status: Optional[ReadinessStatus] = None
+        self._refresh: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_status(self) -> ReadinessStatus:
+        """
+        Get the readiness status, probing dependencies when the cache is stale.
+
+        Returns:
+            Cached status if fresh (or stale within MAX_STALE_PERIODS while
+            a refresh runs), else the result of a new round of probes
+        """
+        status = self._status
+        if status is not None and status.age_seconds < self.cache_seconds:
+            return status
+
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._probe_all())
+        if status is not None and status.age_seconds < self.cache_seconds * MAX_STALE_PERIODS:
+            return status
+        return await asyncio.shield(self._refresh)
+
+    async def _probe_all(self) -> ReadinessStatus:
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._probe(name) for name in names))
+        status = ReadinessStatus(checks={})
+        for name, (error, latency_ms) in zip(names, results):
+            status.checks[name] = error is None
+            status.latency_ms[name] = round(latency_ms, 1)
+            if error is not None:
+                status.errors[name] = error
+
+        if not status.ready and (self._status is None or self._status.ready):
+            logger.warning(f"Instance not ready: {status.errors}")
+        elif status.ready and self._status is not None and not self._status.ready:
+            logger.info("Instance ready again")
+        self._status = status
+        return status
+
+    async def _probe(self, name: str):
+        """Run one probe with a timeout; returns (error or None, latency in ms)."""
+        start = time.perf_counter()
+        pending = self._inflight.get(name)
+        if pending is None or pending.done():
+            pending = self._inflight[name] = asyncio.ensure_future(self.probes[name]())
+            # Mark the outcome retrieved even if the probe finishes after its timeout
+            pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            await asyncio.wait_for(asyncio.shield(pending), self.timeout_seconds)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_seconds:g}s"
+        except Exception as e:
+            # Only the exception type is exposed on the unauthenticated endpoint
+            logger.warning(f"Readiness probe {name} failed: {e}")
+            error = type(e).__name__
+        return error, (time.perf_counter() - start) * 1000
+
+
+_checker: Optional[ReadinessChecker] = None
+
+
+def get_readiness_checker() -> ReadinessChecker:
+    """Get the process-wide readiness checker."""
+    global _checker
+    if _checker is None:
+        _checker = ReadinessChecker(
+            PROBES,
+            cache_seconds=settings.readiness_cache_seconds,
+            timeout_seconds=settings.readiness_probe_timeout_seconds,
+        )
+    return _checker
@@ -0,0 +1,193 @@
+"""
+Cache of signed download URLs per (media_id, user_id).
+
+Download URLs are valid for an hour, but screens like report views request
+the same media over and over. A cached URL is returned while more than
+``min_remaining_seconds`` of validity remain, skipping both the object path
+lookup and the V4 signature. A per-process LRU sits in front of an optional
+Redis tier shared by all instances.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+from app.core.logging import get_logger
+from app.services.url_signer import SignedURL
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+REDIS_KEY_PREFIX = "signed_url"
+
+
+class SignedURLCache:
+    """Two-tier (process LRU + optional Redis) signed URL cache with hit-rate stats."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        min_remaining_seconds: int = 600,
+        use_redis: bool = False,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Max URLs held in process
+            min_remaining_seconds: Only serve URLs with more validity than this left
+            use_redis: Also read/write the shared Redis tier
+        """
+        self.max_entries = max_entries
+        self.min_remaining_seconds = min_remaining_seconds
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[Tuple[str, str], SignedURL]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get_many(self, user_id: str, media_ids: List[str]) -> Dict[str, SignedURL]:
+        """
+        Look up usable URLs.
+
+        Args:
+            user_id: User ID
+            media_ids: Media IDs (repeats are looked up and counted once)
+
+        Returns:
+            Media ID -> SignedURL for the hits
+        """
+        media_ids = list(dict.fromkeys(media_ids))
+        now = time.time()
+        found: Dict[str, SignedURL] = {}
+        remote: List[str] = []
+
+        for media_id in media_ids:
+            key = (media_id, user_id)
+            signed = self._entries.get(key)
+            if signed is not None and signed.expires_at - now > self.min_remaining_seconds:
+                self._entries.move_to_end(key)
+                found[media_id] = signed
+                self.local_hits += 1
+            else:
+                if signed is not None:
+                    del self._entries[key]
+                remote.append(media_id)
+
+        if remote:
+            for media_id, signed in (await self._redis_get(user_id, remote, now)).items():
+                found[media_id] = signed
+                self._put_local((media_id, user_id), signed)
+                self.redis_hits += 1
+
+        self.misses += len(media_ids) - len(found)
+        return found
+
+    async def set_many(self, user_id: str, urls: Dict[str, SignedURL]) -> None:
+        """
+        Store freshly signed URLs.
+
+        Args:
+            user_id: User ID
+            urls: Media ID -> SignedURL
+        """
+        for media_id, signed in urls.items():
+            self._put_local((media_id, user_id), signed)
+        await self._redis_set(user_id, urls)
+
+    async def invalidate(self, media_id: str, user_id: str) -> None:
+        """Drop a media item's URL (e.g. after deletion)."""
+        self._entries.pop((media_id, user_id), None)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.delete(_redis_key(media_id, user_id))
+            except Exception as e:
+                logger.warning(f"Signed URL cache invalidation failed in Redis: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and hit rate."""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+    def _put_local(self, key: Tuple[str, str], signed: SignedURL) -> None:
+        """Insert into the LRU, evicting the least recently used entry when full."""
+        self._entries[key] = signed
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _redis(self):
+        """Redis client if the shared tier is enabled and configured."""
+        return get_redis() if self.use_redis else None
+
+    async def _redis_get(self, user_id: str, media_ids: List[str], now: float) -> Dict[str, SignedURL]:
+        """Fetch URLs from Redis in one round trip (errors count as misses)."""
+        redis = self._redis()
+        if redis is None:
+            return {}
+        try:
+            values = await redis.mget([_redis_key(media_id, user_id) for media_id in media_ids])
+        except Exception as e:
+            logger.warning(f"Signed URL cache read failed in Redis: {e}")
+            return {}
+
+        found = {}
+        for media_id, value in zip(media_ids, values):
+            if value is None:
+                continue
+            # A corrupt or old-format entry is skipped (a miss), not an error
+            try:
+                data = json.loads(value)
+                signed = SignedURL(url=data["url"], expires_at=data["expires_at"])
+                usable = signed.expires_at - now > self.min_remaining_seconds
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable signed URL cache entry for {media_id}: {e!r}")
+                continue
+            if usable:
+                found[media_id] = signed
+        return found
+
+    async def _redis_set(self, user_id: str, urls: Dict[str, SignedURL]) -> None:
+        """Write URLs to Redis, expiring them once they stop being servable."""
+        redis = self._redis()
+        if redis is None or not urls:
+            return
+        now = time.time()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for media_id, signed in urls.items():
+                    ttl = int(signed.expires_at - now - self.min_remaining_seconds)
+                    if ttl > 0:
+                        payload = json.dumps({"url": signed.url, "expires_at": signed.expires_at})
+                        pipe.set(_redis_key(media_id, user_id), payload, ex=ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Signed URL cache write failed in Redis: {e}")
+
+
+def _redis_key(media_id: str, user_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:{user_id}:{media_id}"
+
+
+_cache: Optional[SignedURLCache] = None
+
+
+def get_signed_url_cache() -> SignedURLCache:
+    """Get the shared signed URL cache."""
+    global _cache
+    if _cache is None:
+        _cache = SignedURLCache(
+            max_entries=settings.signed_url_cache_size,
+            min_remaining_seconds=settings.signed_url_min_remaining_minutes * 60,
+            use_redis=settings.signed_url_cache_redis,
+        )
+    return _cache
@@ -0,0 +1,466 @@
+"""
+Resumable chunked media uploads.
+
+A tus-like protocol on top of ``ObjectStore``: the client creates an upload,
+then PATCHes chunks at the server's offset, asking for the current offset
+(HEAD) after a dropped connection. Each chunk is held in memory only until
+it is verified and forwarded, so memory per upload is bounded by the chunk
+size rather than the file size.
+
+Session state (offset, store session, expected size and checksum, expiry)
+lives in Redis, so a resumed upload may land on any instance; chunks of one
+upload are serialized by a short-lived Redis lock. Without Redis, sessions
+are kept in process and resumes must reach the same instance.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.errors import ConflictError, NotFoundError, ValidationError
+from app.core.redis import get_redis
+from app.models.media import MediaStatus
+from app.repositories.media_repo import MediaRepository
+from app.services.media_service import ALLOWED_IMAGE_TYPES, MediaService
+from app.services.object_store import ObjectStore, get_object_store
+from app.utils.ids import generate_prefixed_id
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Largest chunk accepted per PATCH (bounds memory per in-flight upload)
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Chunk size suggested to clients (a multiple of the GCS 256 KiB alignment)
+RECOMMENDED_CHUNK_BYTES = 1024 * 1024
+
+# Unfinished uploads are discarded after this long
+UPLOAD_TTL = timedelta(hours=24)
+
+# A chunk lock left by a crashed instance is released after this long
+CHUNK_LOCK_SECONDS = 120
+
+
+@dataclass
+class UploadSession:
+    """State of one resumable upload."""
+    upload_id: str
+    user_id: str
+    media_id: str
+    path: str
+    content_type: str
+    length: int
+    store_session: str
+    expected_sha256: Optional[str]
+    created_at: datetime
+    expires_at: datetime
+    offset: int = 0
+    completed: bool = False
+    duplicate_of: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the upload."""
+        return {
+            "upload_id": self.upload_id,
+            "media_id": self.media_id,
+            "offset": self.offset,
+            "length": self.length,
+            "completed": self.completed,
+            "duplicate_of": self.duplicate_of,
+            "expires_at": self.expires_at,
+        }
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["expires_at"] = self.expires_at.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw) -> "UploadSession":
+        data = json.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["expires_at"] = datetime.fromisoformat(data["expires_at"])
+        return cls(**data)
+
+
+class UploadSessionStore(ABC):
+    """Storage for upload sessions and their chunk locks."""
+
+    @abstractmethod
+    async def get(self, upload_id: str) -> Optional[UploadSession]:
+        """Read a session (None if unknown or expired)."""
+
+    @abstractmethod
+    async def save(self, session: UploadSession) -> None:
+        """Store a session until it expires."""
+
+    @abstractmethod
+    async def delete(self, upload_id: str) -> None:
+        """Drop a session."""
+
+    @abstractmethod
+    async def acquire(self, upload_id: str) -> Optional[str]:
+        """
+        Take the chunk lock of an upload.
+
+        Returns:
+            Lock token to release with, or None if another chunk holds the lock
+        """
+
+    @abstractmethod
+    async def release(self, upload_id: str, token: str) -> None:
+        """Release a chunk lock taken with ``acquire``."""
+
+
+class MemoryUploadSessionStore(UploadSessionStore):
+    """
+    In-process sessions (single instance).
+
+    Sessions are stored serialized, like in Redis, so changes to a session
+    only count once it is saved.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[datetime, str]] = {}  # upload ID -> (expires_at, JSON)
+        self._locks: Dict[str, str] = {}
+
+    async def get(self, upload_id: str) -> Optional[UploadSession]:
+        entry = self._sessions.get(upload_id)
+        if entry is None or entry[0] < datetime.utcnow():
+            return None
+        return UploadSession.from_json(entry[1])
+
+    async def save(self, session: UploadSession) -> None:
+        now = datetime.utcnow()
+        for upload_id in [k for k, (expires_at, _) in self._sessions.items() if expires_at < now]:
+            del self._sessions[upload_id]
+        self._sessions[session.upload_id] = (session.expires_at, session.to_json())
+
+    async def delete(self, upload_id: str) -> None:
+        self._sessions.pop(upload_id, None)
+
+    async def acquire(self, upload_id: str) -> Optional[str]:
+        if upload_id in self._locks:
+            return None
+        token = self._locks[upload_id] = os.urandom(8).hex()
+        return token
+
+    async def release(self, upload_id: str, token: str) -> None:
+        if self._locks.get(upload_id) == token:
+            del self._locks[upload_id]
+
+
+# KEYS[1] = lock key; ARGV[1] = token. Deletes the lock only if it is still ours.
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisUploadSessionStore(UploadSessionStore):
+    """Sessions shared across instances (one JSON value per upload, expiring with it)."""
+
+    def __init__(self, redis, prefix: str = "upload:"):
+        """
+        Initialize store.
+
+        Args:
+            redis: ``redis.asyncio.Redis`` client
+            prefix: Key prefix
+        """
+        self._redis = redis
+        self._prefix = prefix
+        self._release = redis.register_script(RELEASE_LOCK_LUA)
+
+    async def get(self, upload_id: str) -> Optional[UploadSession]:
+        raw = await self._redis.get(self._prefix + upload_id)
+        return UploadSession.from_json(raw) if raw is not None else None
+
+    async def save(self, session: UploadSession) -> None:
+        ttl = max(1, int((session.expires_at - datetime.utcnow()).total_seconds()))
+        await self._redis.set(self._prefix + session.upload_id, session.to_json(), ex=ttl)
+
+    async def delete(self, upload_id: str) -> None:
+        await self._redis.delete(self._prefix + upload_id)
+
+    async def acquire(self, upload_id: str) -> Optional[str]:
+        token = os.urandom(8).hex()
+        locked = await self._redis.set(f"{self._prefix}{upload_id}:lock", token, nx=True, ex=CHUNK_LOCK_SECONDS)
+        return token if locked else None
+
+    async def release(self, upload_id: str, token: str) -> None:
+        await self._release(keys=[f"{self._prefix}{upload_id}:lock"], args=[token])
+
+
+_session_store: Optional[UploadSessionStore] = None
+
+
+def get_upload_session_store() -> UploadSessionStore:
+    """Get the upload session store (Redis if enabled and configured)."""
+    global _session_store
+    if _session_store is None:
+        redis = get_redis() if settings.upload_session_backend == "redis" else None
+        if redis is not None:
+            _session_store = RedisUploadSessionStore(redis)
+        else:
+            if settings.upload_session_backend == "redis":
+                logger.warning(
+                    "UPLOAD_SESSION_BACKEND=redis but REDIS_URL is not set; "
+                    "upload sessions are per instance"
+                )
+            _session_store = MemoryUploadSessionStore()
+    return _session_store
+
+
+class UploadService:
+    """Service for resumable chunked uploads."""
+
+    def __init__(self, store: Optional[ObjectStore] = None):
+        """
+        Initialize upload service.
+
+        Args:
+            store: Object store (defaults to the configured backend)
+        """
+        self.store = store or get_object_store()
+        self.sessions = get_upload_session_store()
+        self.media_repo = MediaRepository()
+
+    async def create_upload(
+        self,
+        user_id: str,
+        file_type: str,
+        file_size: int,
+        file_name: Optional[str] = None,
+        checksum_sha256: Optional[str] = None
+    ) -> UploadSession:
+        """
+        Start a resumable upload.
+
+        Args:
+            user_id: User ID
+            file_type: MIME type
+            file_size: Total size in bytes
+            file_name: Original filename
+            checksum_sha256: Optional hex SHA-256 of the whole file, verified on completion
+
+        Returns:
+            UploadSession
+
+        Raises:
+            ValidationError: If file type or size invalid
+        """
+        if file_type not in ALLOWED_IMAGE_TYPES:
+            raise ValidationError(
+                message="Invalid file type",
+                details={"allowed_types": list(ALLOWED_IMAGE_TYPES)}
+            )
+
+        max_size = settings.max_image_size_mb * 1024 * 1024
+        if file_size <= 0 or file_size > max_size:
+            raise ValidationError(
+                message=f"File size must be between 1 byte and {settings.max_image_size_mb}MB",
+                details={"max_size_mb": settings.max_image_size_mb}
+            )
+
+        media_id = generate_prefixed_id("media")
+        extension = file_type.split("/")[1]
+        path = f"users/{user_id}/media/{media_id}.{extension}"
+        now = datetime.utcnow()
+
+        session = UploadSession(
+            upload_id=generate_prefixed_id("upload"),
+            user_id=user_id,
+            media_id=media_id,
+            path=path,
+            content_type=file_type,
+            length=file_size,
+            store_session=await self.store.start_upload(path, file_type, file_size),
+            expected_sha256=checksum_sha256.lower() if checksum_sha256 else None,
+            created_at=now,
+            expires_at=now + UPLOAD_TTL,
+        )
+        await self.media_repo.create_media({
+            "media_id": media_id,
+            "user_id": user_id,
+            "file_name": file_name,
+            "file_type": file_type,
+            "file_size": file_size,
+            "gcs_path": path,
+            "status": MediaStatus.PENDING.value,
+            "created_at": now
+        })
+        await self.sessions.save(session)
+
+        logger.info(f"Resumable upload created: {session.upload_id} ({file_size} bytes) for user {user_id}")
+        return session
+
+    async def get_upload(self, upload_id: str, user_id: str) -> UploadSession:
+        """
+        Get an upload owned by the user.
+
+        Raises:
+            NotFoundError: If the upload doesn't exist, expired or belongs to someone else
+        """
+        session = await self.sessions.get(upload_id)
+        if session is None or session.user_id != user_id or session.expires_at < datetime.utcnow():
+            raise NotFoundError("Upload", upload_id)
+        return session
+
+    async def append_chunk(
+        self,
+        upload_id: str,
+        user_id: str,
+        offset: int,
+        body: AsyncIterator[bytes],
+        checksum: Optional[str] = None
+    ) -> UploadSession:
+        """
+        Append a chunk at ``offset``.
+
+        Only bytes the store accepted count towards the offset; with GCS a
+        non-final chunk is truncated to the 256 KiB alignment and the client
+        resends the remainder from the returned offset.
+
+        Args:
+            upload_id: Upload ID
+            user_id: User ID
+            offset: Client's view of the upload offset
+            body: Request body stream
+            checksum: Optional ``Upload-Checksum`` header ("sha256 <base64 digest>")
+
+        Returns:
+            Updated UploadSession
+
+        Raises:
+            NotFoundError: If the upload is unknown
+            ConflictError: If the offset doesn't match the server's
+            ValidationError: If the chunk is too large or fails verification
+        """
+        token = await self.sessions.acquire(upload_id)
+        if token is None:
+            raise ConflictError("Another chunk for this upload is in progress")
+
+        try:
+            # Read under the lock: the previous chunk may have been stored by another instance
+            session = await self.get_upload(upload_id, user_id)
+            await self._append(session, offset, body, checksum)
+        finally:
+            await self.sessions.release(upload_id, token)
+        return session
+
+    async def _append(
+        self,
+        session: UploadSession,
+        offset: int,
+        body: AsyncIterator[bytes],
+        checksum: Optional[str]
+    ) -> None:
+        """Receive, verify and store one chunk (caller holds the session lock)."""
+        if session.completed or offset != session.offset:
+            raise ConflictError(f"Upload offset mismatch: server is at {session.offset}")
+
+        limit = min(MAX_CHUNK_BYTES, session.length - session.offset)
+        chunk = bytearray()
+        async for piece in body:
+            chunk.extend(piece)
+            if len(chunk) > limit:
+                raise ValidationError(
+                    message="Chunk exceeds maximum size or remaining upload length",
+                    details={"max_chunk_bytes": limit}
+                )
+
+        if checksum:
+            _verify_chunk_checksum(bytes(chunk), checksum)
+
+        final = session.offset + len(chunk) == session.length
+        if not final:
+            # Non-final writes must respect the store's chunk alignment
+            chunk = chunk[: len(chunk) - len(chunk) % self.store.chunk_alignment]
+        if chunk:
+            data = bytes(chunk)
+            session.offset = await self.store.write_chunk(session.store_session, data, session.offset, session.length)
+            await self.sessions.save(session)
+
+        # An empty PATCH at the full length retries a completion that failed
+        if session.offset == session.length:
+            await self._complete(session)
+
+    async def abort_upload(self, upload_id: str, user_id: str) -> None:
+        """Cancel an upload and discard stored bytes."""
+        session = await self.get_upload(upload_id, user_id)
+        await self.sessions.delete(upload_id)
+        if not session.completed:
+            await self.store.abort_upload(session.store_session)
+            await self.media_repo.delete_media(user_id, session.media_id)
+        logger.info(f"Resumable upload aborted: {upload_id}")
+
+    async def store_file(self, user_id: str, file_type: str, file_size: int, file: Any) -> str:
+        """
+        Store an already-received file (e.g. a form upload) in chunks.
+
+        Args:
+            user_id: User ID
+            file_type: MIME type
+            file_size: Size in bytes
+            file: Object with async ``read(size)`` and ``seek(offset)`` (e.g. UploadFile)
+
+        Returns:
+            Media ID
+        """
+        session = await self.create_upload(user_id, file_type, file_size)
+
+        async def _pieces() -> AsyncIterator[bytes]:
+            yield await file.read(RECOMMENDED_CHUNK_BYTES)
+
+        while not session.completed:
+            before = session.offset
+            # The store may persist less than it was given; always resume from its offset
+            await file.seek(before)
+            session = await self.append_chunk(session.upload_id, user_id, session.offset, _pieces())
+            if session.offset == before:
+                raise ValidationError("File is shorter than its declared size")
+
+        return session.media_id
+
+    async def _complete(self, session: UploadSession) -> None:
+        """Verify the whole-file checksum and mark the media ready."""
+        data = None
+        if session.expected_sha256:
+            # Chunks may have been stored by different instances, so hash the stored object
+            data = await self.store.read(session.path)
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(data or b"").hexdigest())
+            if digest != session.expected_sha256:
+                await self.sessions.delete(session.upload_id)
+                await self.store.delete(session.path)
+                await self.media_repo.update_media(session.user_id, session.media_id, {"status": MediaStatus.FAILED.value})
+                raise ValidationError(
+                    message="Upload checksum mismatch",
+                    details={"expected_sha256": session.expected_sha256, "actual_sha256": digest}
+                )
+
+        # Only marked complete once committed, so a failed commit can be retried
+        result = await MediaService().commit_upload(session.media_id, session.user_id, data=data)
+        session.completed = True
+        session.duplicate_of = result.get("duplicate_of")
+        await self.sessions.save(session)
+        logger.info(f"Resumable upload completed: {session.upload_id} -> {session.media_id}")
+
+
+def _verify_chunk_checksum(chunk: bytes, header: str) -> None:
+    """Check an ``Upload-Checksum: sha256 <base64>`` header against a chunk."""
+    algorithm, _, encoded = header.partition(" ")
+    if algorithm.lower() != "sha256" or not encoded:
+        raise ValidationError("Unsupported checksum algorithm", details={"supported": ["sha256"]})
+    if base64.b64encode(hashlib.sha256(chunk).digest()).decode("ascii") != encoded.strip():
+        raise ValidationError("Chunk checksum mismatch")
@@ -0,0 +1,199 @@
+"""
+V4 signed URL issuance for media objects.
+
+Credentials are resolved once and refreshed only when expired, and signed
+URLs are cached per (path, method, expiry bucket): every request inside the
+same bucket window gets the same URL, valid for at least the requested TTL.
+On Cloud Run the default credentials have no private key, so each signature
+is an IAM signBlob call; the cache keeps those off the request path.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Width of an expiry bucket; URLs are reused within a bucket (seconds)
+EXPIRY_BUCKET_SECONDS = 300
+
+# Max cached signed URLs per process
+MAX_CACHED_URLS = 10_000
+
+
+@dataclass(frozen=True)
+class SignRequest:
+    """A URL to sign."""
+    path: str
+    method: str = "GET"
+    expires_in: int = 3600
+    content_type: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SignedURL:
+    """A signed URL and its absolute expiry (unix seconds)."""
+    url: str
+    expires_at: int
+
+    def expires_in(self, now: Optional[float] = None) -> int:
+        """Seconds of validity left."""
+        return max(0, int(self.expires_at - (now if now is not None else time.time())))
+
+
+class URLSigner:
+    """Signs GCS object URLs with cached credentials and a bucketed URL cache."""
+
+    def __init__(
+        self,
+        bucket_name: str,
+        mock: bool = False,
+        bucket_seconds: int = EXPIRY_BUCKET_SECONDS,
+        max_entries: int = MAX_CACHED_URLS,
+    ):
+        """
+        Initialize signer.
+
+        Args:
+            bucket_name: GCS bucket
+            mock: Return unsigned placeholder URLs (local storage backend)
+            bucket_seconds: Expiry bucket width
+            max_entries: Max cached URLs
+        """
+        self.bucket_name = bucket_name
+        self.mock = mock
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._cache: Dict[Tuple[str, str, Optional[str], int, int], SignedURL] = {}
+        self._credentials = None
+        self._bucket = None
+
+    async def sign(
+        self,
+        path: str,
+        method: str = "GET",
+        expires_in: int = 3600,
+        content_type: Optional[str] = None,
+    ) -> SignedURL:
+        """
+        Get a signed URL valid for at least ``expires_in`` seconds.
+
+        Args:
+            path: Object path
+            method: HTTP method the URL allows
+            expires_in: Minimum validity in seconds
+            content_type: Content-Type the client must send (uploads)
+
+        Returns:
+            SignedURL
+        """
+        return (await self.sign_many([SignRequest(path, method, expires_in, content_type)]))[0]
+
+    async def sign_many(self, requests: Sequence[SignRequest]) -> List[SignedURL]:
+        """
+        Sign several URLs; cache misses are signed together in one worker thread.
+
+        Args:
+            requests: URLs to sign
+
+        Returns:
+            Signed URLs in request order
+        """
+        bucket = int(time.time() // self.bucket_seconds)
+        results: List[Optional[SignedURL]] = []
+        misses: List[Tuple[int, tuple, SignRequest, int]] = []
+
+        for index, request in enumerate(requests):
+            key = (request.path, request.method, request.content_type, request.expires_in, bucket)
+            cached = self._cache.get(key)
+            results.append(cached)
+            if cached is None:
+                # Expire at the end of the bucket plus the TTL, so reuse never shortens validity
+                expires_at = (bucket + 1) * self.bucket_seconds + request.expires_in
+                misses.append((index, key, request, expires_at))
+
+        if misses:
+            urls = await asyncio.to_thread(
+                self._sign_blocking, [(request, expires_at) for _, _, request, expires_at in misses]
+            )
+            for (index, key, _, expires_at), url in zip(misses, urls):
+                signed = SignedURL(url=url, expires_at=expires_at)
+                self._store(key, signed)
+                results[index] = signed
+
+        return results  # type: ignore[return-value]
+
+    def _store(self, key: tuple, signed: SignedURL) -> None:
+        """Insert into the cache, evicting past buckets first, then oldest entries."""
+        if len(self._cache) >= self.max_entries:
+            current = key[-1]
+            for stale in [k for k in self._cache if k[-1] < current]:
+                del self._cache[stale]
+            while len(self._cache) >= self.max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = signed
+
+    def _sign_blocking(self, batch: List[Tuple[SignRequest, int]]) -> List[str]:
+        """Sign URLs (runs in a worker thread)."""
+        if self.mock:
+            return [
+                f"https://storage.googleapis.com/{self.bucket_name}/{request.path}"
+                f"?{'upload' if request.method == 'PUT' else 'download'}_token=mock"
+                for request, _ in batch
+            ]
+
+        from google.auth.credentials import Signing
+
+        credentials = self._get_credentials()
+        extra = {}
+        if not isinstance(credentials, Signing):
+            # No local private key (Compute/Cloud Run): sign through IAM with the access token
+            extra = {"service_account_email": credentials.service_account_email, "access_token": credentials.token}
+
+        urls = []
+        for request, expires_at in batch:
+            urls.append(
+                self._get_bucket().blob(request.path).generate_signed_url(
+                    version="v4",
+                    expiration=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+                    method=request.method,
+                    content_type=request.content_type,
+                    credentials=credentials,
+                    **extra,
+                )
+            )
+        return urls
+
+    def _get_credentials(self):
+        """Default credentials, resolved once and refreshed only when expired."""
+        import google.auth
+        from google.auth.transport.requests import Request
+
+        if self._credentials is None:
+            self._credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+        if not self._credentials.valid:
+            self._credentials.refresh(Request())
+        return self._credentials
+
+    def _get_bucket(self):
+        """Bucket handle (no API calls; used to build blob references)."""
+        if self._bucket is None:
+            from google.cloud import storage
+            self._bucket = storage.Client(project=settings.google_cloud_project).bucket(self.bucket_name)
+        return self._bucket
+
+
+_signer: Optional[URLSigner] = None
+
+
+def get_url_signer() -> URLSigner:
+    """Get the shared URL signer."""
+    global _signer
+    if _signer is None:
+        _signer = URLSigner(settings.gcs_bucket, mock=settings.storage_backend == "local")
+    return _signer
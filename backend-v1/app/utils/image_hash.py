@@ -0,0 +1,153 @@
+"""
+Perceptual image hashing and BK-tree search.
+
+pHash (DCT based) is robust to re-encoding, resizing and small exposure
+changes; dHash (gradient based) is cheap and confirms pHash matches. Both
+are 64-bit integers compared by Hamming distance.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Generic, List, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import numpy as np
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    """Perceptual hashes of one image."""
+    phash: int
+    dhash: int
+
+    def to_dict(self) -> Dict[str, str]:
+        """Hex encoding for storage alongside media metadata."""
+        return {"phash": f"{self.phash:016x}", "dhash": f"{self.dhash:016x}"}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "ImageHashes":
+        """Decode hashes stored by ``to_dict``."""
+        return cls(phash=int(data["phash"], 16), dhash=int(data["dhash"], 16))
+
+
+def compute_image_hashes(data: bytes) -> ImageHashes:
+    """
+    Compute pHash and dHash for encoded image bytes.
+
+    The image is decoded straight to quarter-scale grayscale, which is all
+    the hashes need and much cheaper than a full decode.
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        ImageHashes
+
+    Raises:
+        ValueError: If the image cannot be decoded
+    """
+    # Imported on first use: OpenCV and NumPy are slow to import and only needed here
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if image is None:
+        raise ValueError("Cannot decode image")
+
+    # pHash: low-frequency 8x8 DCT block compared with its median (DC term excluded)
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    phash = _pack_bits(low > np.median(low[1:]))
+
+    # dHash: horizontal gradient sign on a 9x8 thumbnail
+    thumb = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    dhash = _pack_bits((thumb[:, 1:] > thumb[:, :-1]).flatten())
+
+    return ImageHashes(phash=phash, dhash=dhash)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+def _pack_bits(bits: "np.ndarray") -> int:
+    """Pack 64 booleans into an integer."""
+    import numpy as np
+
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class BKTree(Generic[T]):
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+
+    Radius queries only descend into children whose edge distance lies within
+    ``[d - radius, d + radius]`` of the query's distance to the node, so a
+    lookup touches a small fraction of the stored hashes.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        """Initialize empty tree."""
+        # Node: (hash, items, children keyed by distance)
+        self._root: Optional[Tuple[int, List[T], Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: T) -> None:
+        """
+        Insert a hash.
+
+        Args:
+            value: Hash value
+            item: Payload returned by searches (e.g. media ID)
+        """
+        self._size += 1
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, T]]:
+        """
+        Find items within ``radius`` of a hash.
+
+        Args:
+            value: Query hash
+            radius: Max Hamming distance
+
+        Returns:
+            (distance, item) pairs sorted by distance
+        """
+        if self._root is None:
+            return []
+
+        matches: List[Tuple[int, T]] = []
+        stack = [self._root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= radius:
+                matches.extend((distance, item) for item in items)
+            for edge in range(max(1, distance - radius), distance + radius + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+
+        matches.sort(key=lambda match: match[0])
+        return matches
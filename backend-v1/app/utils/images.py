@@ -0,0 +1,151 @@
+"""
+Image normalization utilities.
+
+Pure CPU-bound functions (no app settings or I/O) so they can run inside
+worker processes; see ``app.services.ai.image_preprocess`` for the pool.
+Pillow is imported on first use, keeping it off the API import path.
+"""
+import io
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Encoder quality ladder tried until the output fits the byte budget
+QUALITY_STEPS = (85, 75, 65, 55, 45)
+
+# Downscale factor applied when even the lowest quality is over budget
+OVERSIZE_SCALE = 0.8
+
+OUTPUT_MIME_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+@dataclass(frozen=True)
+class NormalizedImage:
+    """Re-encoded image ready to be sent inline to the model."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_size: int
+    quality: int
+
+
+def normalize_image(
+    data: bytes,
+    max_side: int = 1536,
+    target_bytes: int = 350 * 1024,
+    output_format: str = "WEBP",
+) -> NormalizedImage:
+    """
+    Decode, orient, downscale and re-encode an image.
+
+    The image is decoded once (JPEG sources are decoded at reduced scale via
+    ``draft``), EXIF orientation is applied to the pixels, and the output is
+    written without EXIF/ICC/XMP metadata.
+
+    Args:
+        data: Original encoded image bytes
+        max_side: Longest side of the output in pixels
+        target_bytes: Output size budget in bytes
+        output_format: "WEBP" or "JPEG"
+
+    Returns:
+        NormalizedImage
+
+    Raises:
+        ValueError: If the data is not a decodable image or the format is unsupported
+    """
+    output_format = output_format.upper()
+    if output_format not in OUTPUT_MIME_TYPES:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format == "JPEG":
+            # Let libjpeg decode straight to the nearest scale >= max_side (1/2, 1/4, 1/8)
+            image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Cannot decode image: {e}") from e
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    image = _fit(image, max_side)
+
+    while True:
+        for quality in QUALITY_STEPS:
+            encoded = _encode(image, output_format, quality)
+            if len(encoded) <= target_bytes:
+                break
+        if len(encoded) <= target_bytes or min(image.size) <= 256:
+            break
+        image = _fit(image, int(max(image.size) * OVERSIZE_SCALE))
+
+    return NormalizedImage(
+        data=encoded,
+        mime_type=OUTPUT_MIME_TYPES[output_format],
+        width=image.width,
+        height=image.height,
+        original_size=len(data),
+        quality=quality,
+    )
+
+
+def _fit(image: "Image.Image", max_side: int) -> "Image.Image":
+    """Downscale so the longest side is at most ``max_side``."""
+    from PIL import Image
+
+    if max(image.size) <= max_side:
+        return image
+    scale = max_side / max(image.size)
+    size: Tuple[int, int] = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap does a cheap box reduction first, then a Lanczos pass
+    return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+
+def _encode(image: "Image.Image", output_format: str, quality: int) -> bytes:
+    """Encode without metadata."""
+    buffer = io.BytesIO()
+    if output_format == "WEBP":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_derivative(data: bytes, max_side: int, quality: int = 80) -> bytes:
+    """
+    Render a display-size WebP derivative (thumbnail) of an image.
+
+    Uses only core Pillow APIs, so it runs unchanged on Pillow-SIMD.
+
+    Args:
+        data: Original encoded image bytes
+        max_side: Longest side of the derivative in pixels
+        quality: WebP quality
+
+    Returns:
+        WebP bytes without metadata
+
+    Raises:
+        ValueError: If the data is not a decodable image
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format == "JPEG":
+            image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Cannot decode image: {e}") from e
+
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    return _encode(_fit(image, max_side), "WEBP", quality)
@@ -0,0 +1,122 @@
+"""
+Benchmark the image preprocessing stage over a corpus of photos.
+
+Reports bytes sent to the model before/after normalization, an estimate of
+image tokens (Gemini bills 258 tokens per 768x768 tile), per-image latency
+and throughput of the process pool.
+
+Usage:
+    python scripts/bench_image_preprocess.py --corpus ~/Pictures/phone --workers 4
+    python scripts/bench_image_preprocess.py --synthetic 40
+"""
+import argparse
+import io
+import math
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PIL import Image  # noqa: E402
+
+from app.utils.images import normalize_image  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Gemini image tokenization: small images are one tile, larger ones are tiled
+TOKENS_PER_TILE = 258
+TILE_SIZE = 768
+
+
+def _estimate_tokens(width: int, height: int) -> int:
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_TILE
+    return math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE) * TOKENS_PER_TILE
+
+
+def _load_corpus(directory: Path) -> list:
+    files = sorted(p for p in directory.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    return [p.read_bytes() for p in files]
+
+
+def _synthetic_corpus(count: int) -> list:
+    """12MP JPEGs with rotated EXIF orientation, roughly phone-camera sized."""
+    corpus = []
+    for i in range(count):
+        gradient = Image.linear_gradient("L").resize((4032, 3024))
+        noise = Image.effect_noise((4032, 3024), 40 + i % 20)
+        image = Image.merge("RGB", (gradient, noise, gradient.rotate(180)))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=92, exif=exif.tobytes())
+        corpus.append(buffer.getvalue())
+    return corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Directory of photos")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N synthetic 12MP photos instead")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-side", type=int, default=1536)
+    parser.add_argument("--target-kb", type=int, default=350)
+    parser.add_argument("--format", default="WEBP", choices=["WEBP", "JPEG"])
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = _load_corpus(args.corpus)
+    elif args.synthetic:
+        corpus = _synthetic_corpus(args.synthetic)
+    else:
+        parser.error("pass --corpus DIR or --synthetic N")
+    if not corpus:
+        parser.error("no images found")
+
+    job = partial(
+        normalize_image,
+        max_side=args.max_side,
+        target_bytes=args.target_kb * 1024,
+        output_format=args.format,
+    )
+
+    # Single process latency
+    latencies = []
+    results = []
+    for data in corpus:
+        start = time.perf_counter()
+        results.append(job(data))
+        latencies.append(time.perf_counter() - start)
+
+    # Pool throughput
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(job, corpus[: args.workers]))  # warm up workers
+        start = time.perf_counter()
+        list(pool.map(job, corpus))
+        pool_elapsed = time.perf_counter() - start
+
+    bytes_before = sum(len(data) for data in corpus)
+    bytes_after = sum(len(r.data) for r in results)
+    tokens_before = 0
+    for data in corpus:
+        with Image.open(io.BytesIO(data)) as image:
+            tokens_before += _estimate_tokens(*image.size)
+    tokens_after = sum(_estimate_tokens(r.width, r.height) for r in results)
+
+    latencies.sort()
+    print(f"images                {len(corpus)}")
+    print(f"bytes                 {bytes_before / 1e6:8.2f} MB -> {bytes_after / 1e6:8.2f} MB "
+          f"({100 * (1 - bytes_after / bytes_before):.1f}% less)")
+    print(f"image tokens (est.)   {tokens_before:8d}    -> {tokens_after:8d}    "
+          f"({100 * (1 - tokens_after / tokens_before):.1f}% less)")
+    print(f"latency per image     p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+          f"max {latencies[-1] * 1000:7.1f} ms")
+    print(f"pool throughput       {len(corpus) / pool_elapsed:7.1f} images/s with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
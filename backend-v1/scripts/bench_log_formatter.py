@@ -0,0 +1,91 @@
+"""
+Benchmark JSON log formatting throughput.
+
+Compares the previous StructuredFormatter (fresh datetime + json.dumps per
+record) with the current one, with and without orjson.
+
+Usage:
+    python scripts/bench_log_formatter.py --records 200000
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import logging as app_logging  # noqa: E402
+from app.core.logging import StructuredFormatter  # noqa: E402
+
+STATIC_FIELDS = {"service": "octa-backend", "version": "v1", "environment": "production"}
+
+
+class LegacyFormatter(logging.Formatter):
+    """The previous formatter, for comparison."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_obj = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            log_obj["request_id"] = request_id
+        if record.exc_info:
+            log_obj["exception"] = self.formatException(record.exc_info)
+        if hasattr(record, "extra_fields"):
+            log_obj.update(record.extra_fields)
+        return json.dumps(log_obj, default=str)
+
+
+def _records(count: int) -> list:
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            "app.api.v1.auth", logging.INFO, "/app/app/api/v1/auth.py", 140,
+            "User logged in: %s", (f"user_{i}",), None, func="login",
+        )
+        record.request_id = "5f0c3a52-1f7e-4d5e-9a44-5c1f0c7a9e21"
+        if i % 4 == 0:
+            record.extra_fields = {"user_id": f"user_{i}", "duration_ms": 12.5, "tier": "free"}
+        records.append(record)
+    return records
+
+
+def _bench(label: str, formatter: logging.Formatter, records: list) -> None:
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {len(records) / elapsed:>12.0f} records/s   {elapsed / len(records) * 1e6:6.2f} us/record")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    records = _records(args.records)
+    _bench("legacy (json)", LegacyFormatter(), records)
+
+    orjson = app_logging.orjson
+    app_logging.orjson = None
+    _bench("structured (json)", StructuredFormatter(STATIC_FIELDS), records)
+    app_logging.orjson = orjson
+
+    if orjson is not None:
+        _bench("structured (orjson)", StructuredFormatter(STATIC_FIELDS), records)
+    else:
+        print("orjson not installed; skipping")
+
+
+if __name__ == "__main__":
+    main()
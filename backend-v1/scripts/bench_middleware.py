@@ -0,0 +1,127 @@
+"""
+Benchmark request ID middleware overhead under uvicorn.
+
+Serves a trivial endpoint three ways - no middleware, the pure ASGI
+RequestIDMiddleware, and an equivalent BaseHTTPMiddleware (the previous
+implementation) - and measures requests/sec over keep-alive connections.
+
+Usage:
+    python scripts/bench_middleware.py --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Settings require these; the benchmark never talks to real services
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GCS_BUCKET", "bench")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.core.logging import request_id_var  # noqa: E402
+from app.middlewares.request_id import RequestIDMiddleware  # noqa: E402
+
+
+class BaseHTTPRequestIDMiddleware(BaseHTTPMiddleware):
+    """The previous BaseHTTPMiddleware implementation, for comparison."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request_id_var.set(request_id)
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+async def _ping(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+def _create_app(middleware) -> Starlette:
+    app = Starlette(routes=[Route("/ping", _ping)])
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start(app: Starlette, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _run(url: str, total: int, concurrency: int) -> list:
+    latencies = []
+    queue = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def worker() -> None:
+            for _ in queue:
+                start = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _report(label: str, latencies: list, elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<16} {len(latencies) / elapsed:>10.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    variants = [
+        ("none", None),
+        ("pure ASGI", RequestIDMiddleware),
+        ("BaseHTTP", BaseHTTPRequestIDMiddleware),
+    ]
+    for label, middleware in variants:
+        port = _free_port()
+        server = _start(_create_app(middleware), port)
+        url = f"http://127.0.0.1:{port}/ping"
+        try:
+            asyncio.run(_run(url, min(args.requests, 500), args.concurrency))  # warm up
+            start = time.perf_counter()
+            latencies = asyncio.run(_run(url, args.requests, args.concurrency))
+            _report(label, latencies, time.perf_counter() - start)
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
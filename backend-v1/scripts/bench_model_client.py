@@ -0,0 +1,101 @@
+"""
+Benchmark the pooled model client against the local stub server.
+
+Compares a shared keep-alive client with a fresh client per request
+(the pattern the pipelines would otherwise fall into).
+
+Usage:
+    python scripts/bench_model_client.py --requests 500 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Settings require these; the benchmark never talks to real services
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GCS_BUCKET", "bench")
+
+import uvicorn  # noqa: E402
+
+from app.services.ai.model_client import ModelClient  # noqa: E402
+from app.services.ai.stub_server import create_stub_app  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_stub(port: int, latency_ms: float) -> uvicorn.Server:
+    config = uvicorn.Config(
+        create_stub_app(latency_ms=latency_ms),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _run(base_url: str, total: int, concurrency: int, pooled: bool) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    shared = ModelClient(base_url=base_url, model="stub", max_connections=concurrency) if pooled else None
+
+    async def one() -> None:
+        async with semaphore:
+            client = shared or ModelClient(base_url=base_url, model="stub", max_connections=1)
+            start = time.perf_counter()
+            await client.generate("bench prompt")
+            latencies.append(time.perf_counter() - start)
+            if client is not shared:
+                await client.aclose()
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    if shared:
+        await shared.aclose()
+    return latencies
+
+
+def _report(label: str, latencies: list, elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<20} {len(latencies) / elapsed:>10.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = _start_stub(port, args.latency_ms)
+    base_url = f"http://127.0.0.1:{port}/v1beta"
+
+    try:
+        for label, pooled in (("pooled keep-alive", True), ("client per request", False)):
+            start = time.perf_counter()
+            latencies = asyncio.run(_run(base_url, args.requests, args.concurrency, pooled))
+            _report(label, latencies, time.perf_counter() - start)
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
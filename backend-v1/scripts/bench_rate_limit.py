@@ -0,0 +1,75 @@
+"""
+Benchmark rate limit checks.
+
+Measures the per-request overhead of a GCRA check on the in-memory backend
+(and on Redis, if --redis-url is given) across many distinct users.
+
+Usage:
+    python scripts/bench_rate_limit.py --requests 200000 --users 10000
+    python scripts/bench_rate_limit.py --redis-url redis://localhost:6379/0 --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Settings require these; the benchmark never talks to real services
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GCS_BUCKET", "bench")
+
+from app.core.rate_limit import (  # noqa: E402
+    MemoryRateLimitBackend,
+    Rate,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+)
+
+RATE = Rate(calls=60, period=60, burst=20)
+
+
+async def _run(backend: RateLimitBackend, total: int, users: int) -> list:
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        await backend.hit(f"bench:user{i % users}", RATE)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _report(label: str, latencies: list, elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    print(f"{label:<10} {len(latencies) / elapsed:>12.0f} checks/s   p50 {p50:8.2f} us   p99 {p99:8.2f} us")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    backends = [("memory", MemoryRateLimitBackend())]
+    if args.redis_url:
+        import redis.asyncio as redis
+        client = redis.from_url(args.redis_url)
+        backends.append(("redis", RedisRateLimitBackend(client, prefix="bench:rl:")))
+
+    for label, backend in backends:
+        await _run(backend, min(args.requests, 1000), args.users)  # warm up
+        start = time.perf_counter()
+        latencies = await _run(backend, args.requests, args.users)
+        _report(label, latencies, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=10000, help="Distinct rate limit keys")
+    parser.add_argument("--redis-url", help="Also benchmark the Redis backend")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
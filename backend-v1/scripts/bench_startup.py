@@ -0,0 +1,134 @@
+"""
+Benchmark cold start: import time of ``app.main`` and time to first response.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and
+reports the total and the heaviest top-level packages, then starts uvicorn
+and measures the time until ``/healthz`` answers. Exits non-zero when a
+budget is exceeded or a heavy SDK that must stay lazy (Firestore, OpenCV,
+NumPy, Pillow, python-jose, passlib) is imported by ``app.main``, so it can
+gate CI.
+
+Usage:
+    python scripts/bench_startup.py --runs 5 --import-budget-ms 1500 --startup-budget-ms 4000
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ("google.cloud.firestore", "cv2", "numpy", "PIL", "jose", "passlib")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Settings require these; the benchmark never talks to real services
+    env.setdefault("JWT_SECRET_KEY", "bench")
+    env.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+    env.setdefault("GCS_BUCKET", "bench")
+    env.setdefault("STORAGE_BACKEND", "local")
+    env["PYTHONPATH"] = str(ROOT)
+    return env
+
+
+def _import_profile() -> Tuple[float, Dict[str, float], List[str]]:
+    """Import app.main once; returns (total ms, self ms per root package, module names)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import app.main failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    by_package: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append(name)
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total_us = int(cumulative_us)
+    return total_us / 1000, by_package, modules
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_first_response(timeout: float = 30.0) -> float:
+    """Start uvicorn and return ms until /healthz answers."""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        sys.exit(f"server did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _report(label: str, samples: List[float], budget: float) -> bool:
+    median = statistics.median(samples)
+    ok = median <= budget
+    print(f"{label:<24} median {median:8.1f} ms  min {min(samples):8.1f} ms  budget {budget:8.1f} ms  {'ok' if ok else 'OVER BUDGET'}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Heaviest packages to list")
+    parser.add_argument("--import-budget-ms", type=float, default=1500.0)
+    parser.add_argument("--startup-budget-ms", type=float, default=4000.0)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+
+    import_times = []
+    for _ in range(args.runs):
+        total, by_package, modules = _import_profile()
+        import_times.append(total)
+
+    print("Heaviest packages imported by app.main (self time, last run):")
+    for package, ms in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {package:<30} {ms:8.1f} ms")
+    print()
+
+    ok = _report("import app.main", import_times, args.import_budget_ms)
+    if not args.skip_server:
+        startup_times = [_time_to_first_response() for _ in range(args.runs)]
+        ok = _report("start to first response", startup_times, args.startup_budget_ms) and ok
+
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        print(f"Imported eagerly (must be lazy): {', '.join(eager)}")
+        ok = False
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()